@@ -11,44 +11,33 @@ Public API (used by app.py):
 
 from __future__ import annotations
 import streamlit as st
+import pandas as pd
+
+import catalog
+import resultcache
+from diff import to_py
+from pool import write_cursor
+from writer import BatchWriter
 
 def render_add_page(get_connection, simple_rerun):
     st.title("Add Data to Table")
 
     # ── choose DATABASE first ───────────────────────────────────────────────
-    try:
-        conn = get_connection(); cur = conn.cursor()
-        cur.execute("SHOW DATABASES")
-        dbs = [
-            d[0] for d in cur.fetchall()
-            if d[0] not in ("information_schema", "mysql", "performance_schema", "sys")
-        ]
-    finally:
-        cur.close(); conn.close()
+    dbs = catalog.databases(get_connection)
 
     if not dbs:
         st.info("No user-created databases."); return
     db = st.selectbox("Database", dbs)
 
     # ── choose TABLE ─────────────────────────────────────────────────────────
-    try:
-        conn = get_connection(db); cur = conn.cursor()
-        cur.execute("SHOW TABLES")
-        tables = [t[0] for t in cur.fetchall()]
-    finally:
-        cur.close(); conn.close()
+    tables = catalog.tables(get_connection, db)
 
     if not tables:
         st.info("No tables in this database."); return
     tbl = st.selectbox("Table", tables)
 
     # ── fetch COLUMN metadata ────────────────────────────────────────────────
-    try:
-        conn = get_connection(db); cur = conn.cursor()
-        cur.execute(f"DESCRIBE `{tbl}`")
-        cols = cur.fetchall()  # (Field, Type, Null, Key, Default, Extra)
-    finally:
-        cur.close(); conn.close()
+    cols = catalog.columns(get_connection, db, tbl)  # (Field, Type, Null, Key, Default, Extra)
 
     # ── build INPUT form ─────────────────────────────────────────────────────
     with st.form("insert_form"):
@@ -74,6 +63,43 @@ def render_add_page(get_connection, simple_rerun):
 
         submit = st.form_submit_button("Insert Row")
 
+    # ── several rows at once (one multi-row INSERT per chunk) ────────────────
+    with st.expander("Add several rows at once"):
+        ins_cols = [
+            field for field, col_type, nullable, key, default, extra in cols
+            if "auto_increment" not in extra.lower()
+            and "generated" not in extra.lower()
+        ]
+        new_rows = st.data_editor(
+            pd.DataFrame(columns=ins_cols),
+            num_rows="dynamic",
+            use_container_width=True,
+            key=f"add_rows_{db}_{tbl}",
+        )
+        if st.button("Insert Rows", key="insert_rows"):
+            rows = [
+                {c: to_py(v) for c, v in rec.items()}
+                for rec in new_rows.dropna(how="all").to_dict("records")
+            ]
+            if not rows:
+                st.info("Nothing to insert – the grid is empty.")
+            else:
+                conn = None
+                try:
+                    conn = get_connection(db)
+                    count = BatchWriter(conn, tbl).insert(rows)
+                    conn.commit()
+                    resultcache.invalidate(db)
+                    st.success(f"✅ {count} row(s) inserted successfully!")
+                    simple_rerun()
+                except Exception as e:
+                    if conn is not None:
+                        conn.rollback()
+                    st.error(f"Insert failed: {e}")
+                finally:
+                    if conn is not None:
+                        conn.close()
+
     if not submit:
         return
 
@@ -82,16 +108,21 @@ def render_add_page(get_connection, simple_rerun):
     placeholders = ", ".join("%s" for _ in inputs)
     values = list(inputs.values())
 
+    conn = cur = None
     try:
-        conn = get_connection(db); cur = conn.cursor()
+        conn = get_connection(db); cur = write_cursor(conn, repeated=False)
         cur.execute(
             f"INSERT INTO `{tbl}` ({columns}) VALUES ({placeholders})",
             values
         )
         conn.commit()
+        resultcache.invalidate(db)
         st.success("✅ Row inserted successfully!")
         simple_rerun()
     except Exception as e:
         st.error(f"Insert failed: {e}")
     finally:
-        cur.close(); conn.close()
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
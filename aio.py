@@ -0,0 +1,120 @@
+# aio.py
+"""
+aio.py  –  Concurrent catalog lookups for page renders.
+
+Public API (used by edit.py and app.py):
+    databases(get_connection)             ┐
+    tables(get_connection, db)            │
+    columns(get_connection, db, tbl)      │ awaitables of the catalog.py
+    primary_key(get_connection, db, tbl)  │ calls of the same name
+    indexes(get_connection, db, tbl)      │
+    table_stats(get_connection, db)       ┘
+    warm(get_connection, db, tbl=None)    → [awaitable, …] for one database
+    quiet(awaitable)                      → its result, or None if it raised
+    gather(*awaitables)                   → [result, …]  (blocking)
+
+A page usually needs several independent lookups – the database list,
+the tables, columns and indexes of the database on screen – and asking
+for them one after another costs the sum of their round trips.
+`gather` runs the awaitables on one event loop; each lookup is
+offloaded to a small shared thread pool and checks out its own pooled
+connection, so a render waits for the slowest query only.  Results land
+in catalog.py's cache, so the plain `catalog.*` calls that follow are
+hits.
+
+mysql-connector has no asyncio driver, hence the threads.  `warm` /
+`quiet` lookups never raise: a failure surfaces again from the
+synchronous catalog call that needs the result.
+"""
+
+from __future__ import annotations
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import catalog
+
+AIO_WORKERS = 4            # lookups in flight at once (per server process)
+
+_executor = ThreadPoolExecutor(max_workers=AIO_WORKERS, thread_name_prefix="aio")
+
+
+async def _offload(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args))
+
+
+async def quiet(aw):
+    """`aw`, with any exception turned into None (for optional warm-ups)."""
+    try:
+        return await aw
+    except Exception:
+        return None
+
+
+# ── awaitable catalog lookups ────────────────────────────────────────────────
+async def databases(get_connection) -> list[str]:
+    return await _offload(catalog.databases, get_connection)
+
+
+async def tables(get_connection, db: str) -> list[str]:
+    return await _offload(catalog.tables, get_connection, db)
+
+
+async def columns(get_connection, db: str, tbl: str) -> list[tuple]:
+    return await _offload(catalog.columns, get_connection, db, tbl)
+
+
+async def primary_key(get_connection, db: str, tbl: str) -> list[str]:
+    return await _offload(catalog.primary_key, get_connection, db, tbl)
+
+
+async def indexes(get_connection, db: str, tbl: str) -> list[tuple]:
+    return await _offload(catalog.indexes, get_connection, db, tbl)
+
+
+async def table_stats(get_connection, db: str) -> list[dict]:
+    return await _offload(catalog.table_stats, get_connection, db)
+
+
+def warm(get_connection, db: str | None, tbl: str | None = None) -> list:
+    """Tables of `db` and, given a table of it, the columns / keys and indexes.
+
+    catalog.py loads columns and indexes for the whole database at once,
+    so this is one query each however many tables the page looks at.
+    """
+    if not db:
+        return []
+    aws = [quiet(tables(get_connection, db))]
+    if tbl:
+        aws += [quiet(columns(get_connection, db, tbl)),
+                quiet(indexes(get_connection, db, tbl))]
+    return aws
+
+
+# ── running them ─────────────────────────────────────────────────────────────
+def gather(*aws) -> list:
+    """Run `aws` concurrently and return their results in order."""
+    async def main():
+        return await asyncio.gather(*aws)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(main())
+
+    # called from inside a running loop: give the batch a loop of its own
+    out: dict = {}
+
+    def run():
+        try:
+            out["result"] = asyncio.run(main())
+        except BaseException as e:
+            out["error"] = e
+
+    t = threading.Thread(target=run, name="aio-gather")
+    t.start(); t.join()
+    if "error" in out:
+        raise out["error"]
+    return out["result"]
@@ -8,15 +8,23 @@ Pages in this file:
 Delegated pages (separate modules):
     • Edit Database     → edit.py
     • Add Data          → add.py
+    • Import CSV        → importer.py
     • Connection Info   → connection.py
     • Delete            → delete.py
+    • Jobs              → jobs.py
 """
 
 from __future__ import annotations
-import re
+import importlib
+import io
+import os
+import sys
+import time
 import streamlit as st
-import mysql.connector
-import pandas as pd
+
+# Only Streamlit is imported before the access gate.  pandas, pyarrow and
+# the page modules are imported on demand (see `_page` and the router), so
+# a cold start – and the gate – never pay for them.
 
 # ── ACCESS GATE ──────────────────────────────────────────────────────────────
 ACCESS_CODE = "meer"  # 🔐 change this!
@@ -32,6 +40,15 @@ if not st.session_state.access_granted:
         st.rerun()
     st.stop()
 
+import aio
+import catalog
+import jobs
+import preview
+import resultcache
+from instrument import SLOW_QUERY_MS, RunStats, instrument, render_stats_panel
+from pool import PROFILES, ConnectionPool
+from sqlscript import iter_statements, read_chunks, run_script
+
 # ── DB CONFIG ────────────────────────────────────────────────────────────────
 DB_CONFIG = {
     "host": "188.36.44.146",
@@ -40,11 +57,47 @@ DB_CONFIG = {
     "password": "Noway2025",
 }
 
+# One pool per server process, shared by every session and rerun.
+POOL_MAX_SIZE = 8          # open connections per database
+POOL_IDLE_TIMEOUT = 300    # seconds before an idle connection is closed
+POOL_PING_INTERVAL = 10    # seconds idle before a checkout is pinged
+# Wire settings (pool.PROFILES): "lan" (C extension, prepared writes, raw
+# reads), "wan" (the same plus protocol compression) or "plain".
+DB_PROFILE = os.environ.get("DB_PROFILE", "lan")
+
+@st.cache_resource
+def _connection_pool() -> ConnectionPool:
+    return ConnectionPool(
+        DB_CONFIG,
+        profile=PROFILES[DB_PROFILE],
+        max_size=POOL_MAX_SIZE,
+        idle_timeout=POOL_IDLE_TIMEOUT,
+        ping_interval=POOL_PING_INTERVAL,
+    )
+
+_POOL = _connection_pool()   # resolved here so worker threads never touch the cache
+
+# Read-only results (previews, editor loads, SQL-editor SELECTs) shared by all sessions.
+RESULT_CACHE_MB = 64
+resultcache.configure(RESULT_CACHE_MB)
+
+# Every statement of this rerun is timed and counted (sidebar “Query stats”).
+_RUN_STATS = RunStats(
+    st.session_state.get("page", "Provision Database"),
+    slow_ms=st.session_state.get("slow_query_ms", SLOW_QUERY_MS),
+)
+
 def get_connection(db: str | None = None):
-    cfg = DB_CONFIG.copy()
-    if db:
-        cfg["database"] = db
-    return mysql.connector.connect(**cfg)
+    """Warm pooled connection; `conn.close()` returns it to the pool.
+
+    Background jobs get it uninstrumented: they outlive the rerun that
+    started them, and a streamed script would keep one record per statement.
+    """
+    if jobs.current() is not None:
+        return _POOL.get(db)
+    t0 = time.perf_counter()
+    conn = _POOL.get(db)
+    return instrument(conn, _RUN_STATS, (time.perf_counter() - t0) * 1000, db)
 
 # ── MISC HELPER ──────────────────────────────────────────────────────────────
 def _simple_rerun():
@@ -57,8 +110,10 @@ PAGES = [
     "Database Browser",
     "Edit Database",
     "Add Data",
+    "Import CSV",
     "Connection Info",
     "Delete",
+    "Jobs",
 ]
 
 st.sidebar.title("Navigation")
@@ -69,8 +124,28 @@ for name in PAGES:
     if st.sidebar.button(name):
         st.session_state.page = name
 
+st.sidebar.markdown("---")
+show_stats = st.sidebar.checkbox("Show query stats", key="show_query_stats")
+if show_stats:
+    st.sidebar.number_input(
+        "Slow-query threshold (ms)", min_value=1, max_value=600_000,
+        value=SLOW_QUERY_MS, step=50, key="slow_query_ms",
+    )
+
 # ── PAGE: PROVISION ──────────────────────────────────────────────────────────
+def _script_source(tables_sql: str, dump_file, dump_path: str):
+    """(binary file, size) of the script: upload › server path › text area."""
+    if dump_file is not None:
+        # own copy: the job outlives this run's handle on the upload
+        return io.BytesIO(dump_file.getvalue()), dump_file.size
+    if dump_path:
+        return open(dump_path, "rb"), os.path.getsize(dump_path)
+    data = tables_sql.encode("utf-8")
+    return io.BytesIO(data), len(data)
+
 def page_provision():
+    from importer import IMPORT_DIR, server_file   # server files: same directory rule
+
     st.title("Provision New MySQL Database (+Tables)")
     with st.form("create_db_form"):
         db_name = st.text_input("Database name (letters, numbers, underscores)")
@@ -78,114 +153,356 @@ def page_provision():
             "Table-definition SQL (multiple statements OK)",
             height=260,
         )
+        dump_file = st.file_uploader("…or upload a .sql dump", type=["sql", "txt"])
+        dump_path = IMPORT_DIR and st.text_input(
+            f"…or a .sql dump under `{IMPORT_DIR}` on the app server"
+        )
         create = st.form_submit_button("Create")
-    if not create:
+
+    # ── a provisioning job of this session is running / just ended ──────────
+    job_id = st.session_state.get("provision_job")
+    if job_id and not create:
+        _render_provision_job(job_id)
+        return
+
+    # ── resume a script that stopped on an error ────────────────────────────
+    resume = st.session_state.get("provision_resume")
+    start_at, skip, resuming = 1, set(), False
+    if create:
+        st.session_state.pop("provision_resume", None)
+    elif resume:
+        st.warning(
+            f"`{resume['db']}`: statement {resume['failed_no']} failed – {resume['error']}. "
+            f"Everything before statement {resume['resume_at']} is applied."
+        )
+        st.code(resume["failed_sql"][:2000], language="sql")
+        # statements skipped on earlier resumes stay skipped
+        skip = set(resume.get("skipped", ()))
+        if skip:
+            st.caption("Skipped so far: " + ", ".join(map(str, sorted(skip))))
+        retry, skip_bad = st.columns(2)
+        if retry.button(f"↻ Resume from statement {resume['resume_at']}"):
+            start_at = resume["resume_at"]
+        elif skip_bad.button(f"⏭ Skip statement {resume['failed_no']} and resume"):
+            start_at = resume["resume_at"]
+            skip.add(resume["failed_no"])
+        else:
+            return
+        db_name, resuming = resume["db"], True
+    else:
         return
 
     if not db_name.replace("_", "").isalnum() or " " in db_name:
         st.error("Invalid database name.")
         return
+    if dump_path and dump_file is None:
+        try:
+            dump_path = server_file(dump_path)
+        except ValueError as e:
+            st.error(e)
+            return
 
+    src, size = _script_source(tables_sql, dump_file, dump_path)
     try:
-        conn = get_connection(); cur = conn.cursor()
-        # 1) CREATE DATABASE
-        cur.execute(
-            f"CREATE DATABASE {db_name} "
-            "DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;"
+        job = jobs.submit(
+            "provision", f"Provision `{db_name}`",
+            lambda job: _provision_job(job, db_name, src, size, start_at, skip, resuming),
+            db=db_name,
         )
-        conn.database = db_name
+    except jobs.JobQueueFull as e:
+        src.close()
+        st.error(e); return
+    st.session_state.pop("provision_resume", None)
+    st.session_state.provision_job = job.id
+    st.rerun()
 
-        # 2) Remove DELIMITER lines
-        sql = "\n".join(
-            line for line in tables_sql.splitlines()
-            if not line.strip().upper().startswith("DELIMITER")
-        )
+def _provision_job(job, db_name: str, src, size: int, start_at: int, skip,
+                   resuming: bool = False):
+    """Background part of provisioning; leaves resume info in `job.result`."""
+    text = io.TextIOWrapper(src, encoding="utf-8-sig")
 
-        # 3) Extract CREATE TRIGGER ... END blocks
-        trigger_blocks = re.findall(
-            r"(CREATE\s+TRIGGER[\s\S]+?END)", sql, flags=re.IGNORECASE
+    def on_progress(report):
+        job.update(
+            min(src.tell() / size, 1.0) if size else None,
+            f"{report.executed:,} statements executed",
         )
 
-        # 4) Remove trigger blocks from the main SQL so we can run tables first
-        for tb in trigger_blocks:
-            sql = sql.replace(tb, "")
-
-        # 5) Run all non-trigger statements (split on semicolons)
-        stmts = [s.strip() for s in sql.split(";") if s.strip()]
-        for stmt in stmts:
-            cur.execute(stmt)
+    conn = cur = None
+    try:
+        conn = get_connection(); cur = conn.cursor()
+        job.on_cancel(lambda: jobs.kill_query(get_connection, conn.connection_id))
+        # 1) CREATE DATABASE (already there when resuming)
+        if not resuming:
+            cur.execute(
+                f"CREATE DATABASE {db_name} "
+                "DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;"
+            )
+        conn.database = db_name
 
-        # 6) Finally, run each trigger block
-        for tb in trigger_blocks:
-            cur.execute(tb)
+        # 2) Stream the script statement by statement (DELIMITER-aware)
+        report = run_script(
+            conn, iter_statements(read_chunks(text)),
+            start_at=start_at, skip=skip, on_progress=on_progress,
+            should_stop=lambda: job.cancelled,
+        )
+        job.result = {
+            "db": db_name,
+            "executed": report.executed,
+            "last_ok": report.last_ok,
+            "resume_at": report.resume_at,
+            "failed_no": report.failed_no,
+            "failed_sql": (report.failed_sql or "")[:2000],
+            "error": report.error,
+            "skipped": sorted(skip),
+        }
+        if report.error:
+            raise RuntimeError(report.error)
+        job.update(1.0, f"{report.executed:,} statements executed")
+    finally:
+        catalog.invalidate(db_name)
+        resultcache.invalidate(db_name)
+        text.detach()
+        src.close()
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
 
-        conn.commit()
-        st.success(f"🎉 {db_name} and tables/triggers created!")
+def _render_provision_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        st.session_state.pop("provision_job", None); return
+    jobs.render_job_status(job, key="provision")
+    if job.active:
+        time.sleep(0.5)          # poll; the job carries on if this tab closes
+        st.rerun()
 
+    st.session_state.pop("provision_job", None)
+    res = job.result or {}
+    if job.status == "done":
+        st.success(f"🎉 {res.get('db')} and tables/triggers created!")
         st.markdown("### Quick connect")
         st.code(
             f"mysql -h {DB_CONFIG['host']} -P {DB_CONFIG['port']} "
-            f"-u {DB_CONFIG['user']} -p {db_name}",
+            f"-u {DB_CONFIG['user']} -p {res.get('db')}",
             language="bash",
         )
-    except Exception as e:
-        st.error(f"Error while provisioning: {e}")
-    finally:
-        cur.close(); conn.close()
+    elif res.get("resume_at"):
+        st.session_state.provision_resume = {
+            "db": res["db"],
+            "resume_at": res["resume_at"],
+            "failed_no": res["failed_no"] or res["resume_at"],
+            "failed_sql": res["failed_sql"],
+            "error": res["error"],
+            "skipped": res.get("skipped", []),
+        }
+        st.rerun()   # show the resume controls
+    else:
+        st.error(f"Error while provisioning: {job.error}")
 
 # ── PAGE: BROWSER ───────────────────────────────────────────────────────────
 def page_browser():
     st.title("Database Browser")
-    try:
-        conn = get_connection(); cur = conn.cursor()
-        cur.execute("SHOW DATABASES")
-        dbs = [d[0] for d in cur.fetchall()
-               if d[0] not in ("information_schema", "mysql",
-                               "performance_schema", "sys")]
-    finally:
-        cur.close(); conn.close()
+    dbs = catalog.databases(get_connection)
 
     if not dbs:
         st.info("No databases yet."); return
 
     db = st.selectbox("Database", dbs)
-    try:
-        conn = get_connection(db); cur = conn.cursor()
-        cur.execute("SHOW TABLES"); tables = [t[0] for t in cur.fetchall()]
-    finally:
-        cur.close(); conn.close()
+    # the overview's statistics load alongside the table list (aio.py)
+    tables, _ = aio.gather(
+        aio.tables(get_connection, db), aio.quiet(aio.table_stats(get_connection, db)),
+    )
 
     if not tables:
         st.info("No tables."); return
 
+    with st.expander("Tables overview", expanded=True):
+        _render_table_overview(db, tables)
+
+    page_size = int(st.number_input(
+        "Rows per preview page", min_value=10, max_value=10_000,
+        value=100, step=10, key="preview_page_size",
+    ))
+
     for t in tables:
         col1, col2 = st.columns([2, 1])
         col1.write(f"**{t}**")
-        if col2.button("Preview all rows", key=f"prev_{db}_{t}"):
+        pos_key = f"prev_pos_{db}_{t}"
+        if col2.button("Preview", key=f"prev_{db}_{t}"):
+            st.session_state[pos_key] = {}          # start at the first page
+        if pos_key in st.session_state:
+            _render_preview(db, t, page_size, pos_key)
+
+    from export import render_export_controls
+    import spatial
+
+    st.markdown("---")
+    st.subheader("Area search")
+    sp_tbl = st.selectbox("Table", tables, key=f"sp_tbl_{db}")
+    spatial.render_area_search(get_connection, db, sp_tbl)
+
+    st.markdown("---")
+    st.subheader("Export a table")
+    exp_tbl = st.selectbox("Table to export", tables, key=f"exp_tbl_{db}")
+    render_export_controls(
+        get_connection, db, f"SELECT * FROM `{exp_tbl}`",
+        name=exp_tbl, key=f"exp_{db}_{exp_tbl}",
+    )
+
+_OVERVIEW_SORT = {
+    "Total size": "total_mb",
+    "Estimated rows": "est_rows",
+    "Data size": "data_mb",
+    "Index size": "index_mb",
+    "Last update": "updated",
+    "Auto-increment": "auto_increment",
+    "Name": "table",
+}
+
+def _render_table_overview(db: str, tables: list[str]):
+    """Size / engine / activity grid from one catalog query (no table scans)."""
+    import pandas as pd
+
+    counts = st.session_state.setdefault("exact_counts", {})   # (db, tbl) → rows
+
+    # exact COUNT(*) only on request – it scans the table
+    pick_col, go_col = st.columns([4, 1])
+    picked = pick_col.multiselect(
+        "Exact COUNT(*) for", tables, key=f"count_pick_{db}",
+        help="Estimated rows come from the catalog; an exact count reads the whole table.",
+    )
+    if go_col.button("Count rows", key=f"count_go_{db}", disabled=not picked):
+        for t in picked:
             try:
-                conn = get_connection(db); cur = conn.cursor()
-                cur.execute(f"SELECT * FROM `{t}`")
-                cols = [d[0] for d in cur.description]
-                st.dataframe(
-                    pd.DataFrame(cur.fetchall(), columns=cols),
-                    use_container_width=True
-                )
+                counts[(db, t)] = preview.exact_count(get_connection, db, t)
             except Exception as e:
-                st.error(e)
-            finally:
-                cur.close(); conn.close()
+                st.error(f"COUNT(*) on `{t}` failed: {e}")
+
+    try:
+        stats = catalog.table_stats(get_connection, db)
+    except Exception as e:
+        st.error(f"Could not read table statistics: {e}"); return
+
+    df = pd.DataFrame(stats)
+    df["data_mb"] = df.pop("data_bytes").astype("float64") / 1e6
+    df["index_mb"] = df.pop("index_bytes").astype("float64") / 1e6
+    df["total_mb"] = df["data_mb"].fillna(0) + df["index_mb"].fillna(0)
+    df["exact_rows"] = [counts.get((db, t)) for t in df["table"]]
+
+    sort_col, dir_col = st.columns([4, 1])
+    sort_by = sort_col.selectbox("Sort by", list(_OVERVIEW_SORT), key="overview_sort")
+    descending = dir_col.checkbox("Descending", value=True, key="overview_desc")
+    df = df.sort_values(
+        _OVERVIEW_SORT[sort_by], ascending=not descending, na_position="last"
+    )
+
+    st.dataframe(
+        df[["table", "engine", "est_rows", "exact_rows", "data_mb", "index_mb",
+            "total_mb", "indexes", "auto_increment", "updated", "created", "type"]],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "est_rows": st.column_config.NumberColumn("≈ rows", format="%d"),
+            "exact_rows": st.column_config.NumberColumn("exact rows", format="%d"),
+            "data_mb": st.column_config.NumberColumn("data MB", format="%.2f"),
+            "index_mb": st.column_config.NumberColumn("index MB", format="%.2f"),
+            "total_mb": st.column_config.NumberColumn("total MB", format="%.2f"),
+        },
+    )
+    st.caption(
+        f"{len(df)} table(s) · ≈ {int(df['est_rows'].fillna(0).sum()):,} rows · "
+        f"{df['total_mb'].sum():,.1f} MB (estimates from information_schema)"
+    )
+
+def _render_preview(db: str, tbl: str, page_size: int, pos_key: str):
+    """One preview page plus Prev/Next navigation (keyset when a PK exists)."""
+    import frames   # pandas
+    import filters
+
+    columns = catalog.columns(get_connection, db, tbl)
+    pk_cols = catalog.primary_key(get_connection, db, tbl)
+    try:
+        with st.expander("Filter / sort (server-side)"):
+            spec = filters.render_filter_builder(
+                [c[0] for c in columns], catalog.indexes(get_connection, db, tbl),
+                key=f"{pos_key}_flt", with_limit=False,
+            )
+    except ValueError as e:
+        st.error(e); return
+    if st.session_state.get(f"{pos_key}_sig") != spec.signature():
+        st.session_state[f"{pos_key}_sig"] = spec.signature()
+        st.session_state[pos_key] = {}             # new filter → first page
+    pos = st.session_state[pos_key]
+    where, params = spec.where()
+    kinds = frames.kinds_from_describe(columns)
+
+    try:
+        if pk_cols and not spec.order:
+            page = preview.fetch_page(
+                get_connection, db, tbl, pk_cols, page_size,
+                after=pos.get("after"), before=pos.get("before"),
+                where=where, params=params, kinds=kinds,
+            )
+            prev_pos, next_pos = {"before": page.first_key}, {"after": page.last_key}
+            mode = "keyset on " + ", ".join(f"`{c}`" for c in pk_cols)
+        else:
+            page = preview.fetch_offset_page(
+                get_connection, db, tbl, page_size, pos.get("page_no", 0),
+                where=where, params=params, order_sql=spec.order_sql(), kinds=kinds,
+            )
+            prev_pos = {"page_no": page.page_no - 1}
+            next_pos = {"page_no": page.page_no + 1}
+            why = "custom sort" if spec.order else "no primary key"
+            mode = f"LIMIT/OFFSET ({why}), page {page.page_no + 1}"
+        if where:
+            mode += " · filtered"
+    except Exception as e:
+        st.error(e); return
+
+    st.dataframe(page.frame, use_container_width=True)
+
+    def go(new_pos):
+        st.session_state[pos_key] = new_pos
+
+    nav_prev, nav_next, nav_close, info = st.columns([1, 1, 1, 4])
+    nav_prev.button("◀ Prev", key=f"{pos_key}_prev", disabled=not page.has_prev,
+                    on_click=go, args=(prev_pos,))
+    nav_next.button("Next ▶", key=f"{pos_key}_next", disabled=not page.has_next,
+                    on_click=go, args=(next_pos,))
+    nav_close.button("Close", key=f"{pos_key}_close",
+                     on_click=st.session_state.pop, args=(pos_key,))
+    info.caption(f"{len(page.frame)} row(s) · {mode}")
 
-# ── IMPORT DELEGATED PAGES ──────────────────────────────────────────────────
-from edit import render_edit_page
-from add import render_add_page
-from connection import render_connection_page
-from delete import render_delete_page
+# ── DELEGATED PAGES (imported on first use) ────────────────────────────────
+def _page(module: str, func: str):
+    """`module.func`, importing the module now if this process hasn't yet."""
+    if module in sys.modules:
+        return getattr(sys.modules[module], func)
+    t0 = time.perf_counter()
+    mod = importlib.import_module(module)
+    _RUN_STATS.note_import(module, (time.perf_counter() - t0) * 1000)
+    return getattr(mod, func)
 
 # ── ROUTER ─────────────────────────────────────────────────────────────────
-match st.session_state.page:
-    case "Provision Database": page_provision()
-    case "Database Browser":   page_browser()
-    case "Edit Database":      render_edit_page(get_connection, _simple_rerun)
-    case "Add Data":           render_add_page(get_connection, _simple_rerun)
-    case "Connection Info":    render_connection_page(get_connection)
-    case "Delete":             render_delete_page(get_connection, _simple_rerun)
+_RUN_STATS.page = st.session_state.page
+try:
+    match st.session_state.page:
+        case "Provision Database": page_provision()
+        case "Database Browser":   page_browser()
+        case "Edit Database":
+            _page("edit", "render_edit_page")(get_connection, _simple_rerun)
+        case "Add Data":
+            _page("add", "render_add_page")(get_connection, _simple_rerun)
+        case "Import CSV":
+            _page("importer", "render_import_page")(get_connection, _simple_rerun)
+        case "Connection Info":
+            _page("connection", "render_connection_page")(get_connection)
+        case "Delete":
+            _page("delete", "render_delete_page")(get_connection, _simple_rerun)
+        case "Jobs":
+            jobs.render_jobs_page(get_connection)
+finally:
+    # also after st.stop(), so pages that bail out early are still measured
+    if show_stats:
+        render_stats_panel(_RUN_STATS, _POOL, resultcache.stats())
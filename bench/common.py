@@ -0,0 +1,148 @@
+# bench/common.py
+"""
+bench/common.py  –  Shared plumbing for the benchmark scripts.
+
+Public API (used by bench/seed.py and bench/run.py):
+    server_config()              → mysql.connector kwargs from BENCH_MYSQL_*
+    selected_sizes()             → {"10k": 10_000, …} filtered by BENCH_SIZES
+    make_get_connection(stats)   → get_connection(db) like app.py's, over a bench pool
+    measure(results, scenario, size)  → context manager appending a Result
+    print_results(results)
+
+Configuration (environment):
+    BENCH_MYSQL_HOST / _PORT / _USER / _PASSWORD   local server (127.0.0.1:3306 root)
+    BENCH_DB        database holding the seeded tables (impactdata_bench)
+    BENCH_SIZES     comma list out of 10k,100k,1m (default: all three)
+    BENCH_MEMORY    0 turns tracemalloc off (it slows Python-heavy paths ~2×)
+    DB_PROFILE      connection profile, pool.PROFILES (default lan) – also read
+                    by app.py, so `DB_PROFILE=plain` gives the baseline run
+"""
+
+from __future__ import annotations
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import instrument
+from pool import PROFILES, ConnectionPool
+
+BENCH_DB = os.environ.get("BENCH_DB", "impactdata_bench")
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+TRACE_MEMORY = os.environ.get("BENCH_MEMORY", "1") != "0"
+
+
+def server_config() -> dict:
+    return {
+        "host": os.environ.get("BENCH_MYSQL_HOST", "127.0.0.1"),
+        "port": int(os.environ.get("BENCH_MYSQL_PORT", "3306")),
+        "user": os.environ.get("BENCH_MYSQL_USER", "root"),
+        "password": os.environ.get("BENCH_MYSQL_PASSWORD", ""),
+    }
+
+
+def selected_sizes() -> dict[str, int]:
+    wanted = os.environ.get("BENCH_SIZES")
+    if not wanted:
+        return dict(SIZES)
+    return {k: SIZES[k] for k in (w.strip().lower() for w in wanted.split(",")) if k in SIZES}
+
+
+def synth_table(label: str) -> str:
+    return f"synth_{label}"
+
+
+# ── connections ──────────────────────────────────────────────────────────────
+_pool: ConnectionPool | None = None
+
+
+def bench_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(
+            server_config(), profile=PROFILES[os.environ.get("DB_PROFILE", "lan")], max_size=8,
+        )
+    return _pool
+
+
+def make_get_connection(stats):
+    """Same shape as `app.get_connection`, instrumented into `stats`."""
+    def get_connection(db: str | None = None):
+        t0 = time.perf_counter()
+        conn = bench_pool().get(db)
+        return instrument.instrument(conn, stats, (time.perf_counter() - t0) * 1000, db)
+    return get_connection
+
+
+# ── measuring ────────────────────────────────────────────────────────────────
+@dataclass
+class Result:
+    scenario: str
+    size: str
+    wall_ms: float = 0.0
+    peak_mb: float | None = None
+    statements: int = 0
+    round_trips: int = 0
+    rows: int = 0
+    checkouts: int = 0
+    fresh_connections: int = 0
+    error: str | None = None
+
+
+@contextmanager
+def measure(results: list, scenario: str, size: str):
+    """Time the block and sum every `instrument.RunStats` created inside it.
+
+    `RunStats` is swapped for a recording subclass for the duration, so
+    both direct calls and AppTest reruns of app.py (which re-import it on
+    every run) are counted.
+    """
+    created = []
+    base = instrument.RunStats
+
+    class Recorded(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    res = Result(scenario, size)
+    instrument.RunStats = Recorded
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        yield res
+    except Exception as e:
+        res.error = f"{type(e).__name__}: {e}"
+    finally:
+        res.wall_ms = round((time.perf_counter() - t0) * 1000, 1)
+        if TRACE_MEMORY:
+            res.peak_mb = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+            tracemalloc.stop()
+        instrument.RunStats = base
+        for stats in created:
+            tot = stats.totals()
+            res.statements += tot["statements"]
+            res.round_trips += tot["round_trips"]
+            res.rows += tot["rows"]
+            res.checkouts += tot["checkouts"]
+            res.fresh_connections += tot["fresh_connections"]
+        results.append(res)
+
+
+def print_results(results: list[Result]):
+    cols = ["scenario", "size", "wall_ms", "peak_mb", "statements",
+            "round_trips", "rows", "checkouts", "fresh_connections"]
+    table = [[("" if v is None else str(v)) for v in (getattr(r, c) for c in cols)]
+             for r in results]
+    widths = [max(len(c), *(len(row[i]) for row in table)) for i, c in enumerate(cols)]
+    print("  ".join(c.ljust(w) for c, w in zip(cols, widths)))
+    for r, row in zip(results, table):
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+        if r.error:
+            print(f"    ↳ {r.error}")
+
+
+def as_dicts(results: list[Result]) -> list[dict]:
+    return [asdict(r) for r in results]
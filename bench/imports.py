@@ -0,0 +1,77 @@
+# bench/imports.py
+"""
+bench/imports.py  –  Import-time profile of the app's modules.
+
+    python -m bench.imports [--top 15]
+
+Each target is imported in a fresh interpreter under `python -X importtime`
+(so nothing is cached between them) and the report lists the cold import
+cost plus the heaviest packages it pulled in.  "gate" is what app.py
+imports before the access gate; every other target is measured on top
+of it, i.e. what that route adds on first use.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "gate": "import streamlit",
+    "core (pool, catalog, instrument)": "import pool, catalog, preview, instrument, sqlscript, aio",
+    "browser (+pandas, export, frames)": "import pandas, export, frames",
+    "edit": "import edit",
+    "add": "import add",
+    "importer": "import importer",
+    "connection": "import connection",
+    "delete": "import delete",
+}
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(stmt: str) -> list[tuple[str, int, int]]:
+    """[(package, self µs, cumulative µs), …] for top-level imports of `stmt`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    out = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            out.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3))))
+    indent = min((d for *_, d in out), default=0)
+    return [(pkg, own, cum) for pkg, own, cum, depth in out if depth == indent]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold import cost per route.")
+    ap.add_argument("--top", type=int, default=8, help="heaviest packages to list per target")
+    args = ap.parse_args()
+
+    startup = {pkg for pkg, *_ in profile("pass")}       # site, encodings, …
+    gate = {pkg for pkg, *_ in profile(TARGETS["gate"])}
+    for label, stmt in TARGETS.items():
+        seen = startup if label == "gate" else startup | gate
+        if label != "gate":
+            stmt = f"{TARGETS['gate']}; {stmt}"
+        try:
+            rows = [r for r in profile(stmt) if r[0] not in seen]
+        except RuntimeError as e:
+            print(f"{label:<34} failed: {e}")
+            continue
+        total = sum(cum for _, _, cum in rows)
+        print(f"{label:<34} {total / 1000:8.1f} ms")
+        for pkg, _, cum in sorted(rows, key=lambda r: -r[2])[: args.top]:
+            print(f"    {pkg:<30} {cum / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# bench/run.py
+"""
+bench/run.py  –  Headless benchmarks of the app's pages.
+
+    python -m bench.seed                       # once
+    python -m bench.run [--only browser,…] [--json results.json]
+
+The real app.py is executed with Streamlit's AppTest, with
+`mysql.connector.connect` redirected to the BENCH_MYSQL_* server, and the
+widgets are clicked the way a user would:
+
+    browser     Database Browser → Preview (and Next page) of every table
+    edit_load   Edit Database → pick a table (loads it into the editor)
+    edit_save   the Save Changes path (diff_frames + BatchWriter) on a
+                1 % update / 0.1 % delete / 100-insert edit, rolled back
+                (AppTest cannot type into a data_editor)
+    add         Add Data → submit the single-row form ADD_REPEATS times
+    provision   Provision Database → run a generated script of one
+                INSERT per row through sqlscript (a background job; the
+                page polls it to completion inside the same click)
+
+Every result reports wall time, tracemalloc peak and the round trips /
+statements / connection checkouts counted by `instrument`.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import tempfile
+from unittest import mock
+
+import mysql.connector
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import instrument
+from bench.common import (
+    BENCH_DB, Result, as_dicts, bench_pool, make_get_connection, measure,
+    print_results, selected_sizes, server_config, synth_table,
+)
+from diff import diff_frames
+from writer import BatchWriter
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+TIMEOUT_S = float(os.environ.get("BENCH_TIMEOUT", "900"))
+ADD_REPEATS = 20
+SCENARIOS = ["browser", "edit_load", "edit_save", "add", "provision"]
+
+_real_connect = mysql.connector.connect
+
+
+def _bench_connect(*args, **cfg):
+    cfg.update(server_config())     # keep `database`, swap the server
+    return _real_connect(*args, **cfg)
+
+
+# ── AppTest helpers ──────────────────────────────────────────────────────────
+def _check(at: AppTest) -> AppTest:
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    if at.error:
+        raise RuntimeError(at.error[0].value)
+    return at
+
+
+def _open(page: str) -> AppTest:
+    at = AppTest.from_file(APP_PATH, default_timeout=TIMEOUT_S)
+    at.session_state["access_granted"] = True
+    at.session_state["page"] = page
+    return _check(at.run())
+
+
+def _by_label(widgets, label: str):
+    return next(w for w in widgets if w.label == label)
+
+
+def _open_db(page: str) -> AppTest:
+    at = _open(page)
+    _by_label(at.selectbox, "Database").set_value(BENCH_DB)
+    return _check(at.run())
+
+
+# ── scenarios ────────────────────────────────────────────────────────────────
+def _bench_tables() -> list[tuple[str, str]]:
+    """(size label, table) for the synthetic and the sheet/*.csv tables."""
+    out = [(label, synth_table(label)) for label in selected_sizes()]
+    stats = instrument.RunStats("bench")
+    try:
+        conn = make_get_connection(stats)(BENCH_DB); cur = conn.cursor()
+        cur.execute("SHOW TABLES LIKE 'sheet\\_%'")
+        out += [(f"sheet:{t[6:]}", t) for (t,) in cur.fetchall()]
+    finally:
+        cur.close(); conn.close()
+    return out
+
+
+def bench_browser(results):
+    for label, tbl in _bench_tables():
+        at = _open_db("Database Browser")
+        with measure(results, "browser_preview", label):
+            _check(at.button(key=f"prev_{BENCH_DB}_{tbl}").click().run())
+        with measure(results, "browser_next", label):
+            _check(at.button(key=f"prev_pos_{BENCH_DB}_{tbl}_next").click().run())
+
+
+def bench_edit_load(results):
+    for label in selected_sizes():
+        at = _open_db("Edit Database")
+        with measure(results, "edit_load", label):
+            _by_label(at.selectbox, "Table").set_value(synth_table(label))
+            _check(at.run())
+
+
+def bench_edit_save(results):
+    for label in selected_sizes():
+        tbl = synth_table(label)
+        with measure(results, "edit_save", label):
+            get_connection = make_get_connection(instrument.RunStats("edit_save"))
+            try:
+                conn = get_connection(BENCH_DB); cur = conn.cursor()
+                cur.execute(f"SELECT * FROM `{tbl}`")
+                orig_df = pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+            finally:
+                cur.close(); conn.close()
+
+            edited = orig_df.copy()
+            n = len(edited)
+            edited.loc[edited.index[:: 100], "qty"] += 1               # 1 % updates
+            edited = edited.drop(edited.index[1:: 1000])                # 0.1 % deletes
+            extra = orig_df.head(100).copy()
+            extra["id"] = range(n + 1, n + 1 + len(extra))
+            edited = pd.concat([edited, extra], ignore_index=True)      # 100 inserts
+
+            conn = get_connection(BENCH_DB)
+            try:
+                changes = diff_frames(orig_df, edited, "id")
+                BatchWriter(conn, tbl).apply("id", changes)
+            finally:
+                conn.rollback()       # keep the seeded data unchanged
+                conn.close()
+            print(f"  edit_save {label}: {n:,} rows, {len(changes.updates):,} updates")
+
+
+def bench_add(results):
+    at = _open_db("Add Data")
+    _by_label(at.selectbox, "Table").set_value("bench_add")
+    _check(at.run())
+    values = {"name": "bench", "category": "alpha", "qty": "1",
+              "price": "9.99", "created": "2024-01-01 00:00:00", "note": "x"}
+    with measure(results, "add_row", f"{ADD_REPEATS}×"):
+        for _ in range(ADD_REPEATS):
+            for w in at.text_input:
+                field = w.label.split(" (")[0]
+                if field in values:
+                    w.input(values[field])
+            _check(_by_label(at.button, "Insert Row").click().run())
+
+
+def _write_script(path: str, n: int):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(
+            "CREATE TABLE t (id INT PRIMARY KEY, name VARCHAR(64), qty INT);\n"
+            "CREATE TABLE t_log (id INT, at DATETIME);\n"
+            "DELIMITER //\n"
+            "CREATE TRIGGER t_ai AFTER INSERT ON t FOR EACH ROW\n"
+            "BEGIN\n  IF NEW.qty < 0 THEN INSERT INTO t_log VALUES (NEW.id, NOW()); END IF;\nEND//\n"
+            "DELIMITER ;\n"
+        )
+        for i in range(1, n + 1):
+            fh.write(f"INSERT INTO t VALUES ({i}, 'row {i}; ok', {i % 97});\n")
+
+
+def bench_provision(results):
+    for label, n in selected_sizes().items():
+        db = f"bench_prov_{label}"
+        fd, path = tempfile.mkstemp(prefix="bench_", suffix=".sql")
+        os.close(fd)
+        _write_script(path, n)
+        get_connection = make_get_connection(instrument.RunStats("bench"))
+        drop = f"DROP DATABASE IF EXISTS `{db}`"
+        try:
+            _run(get_connection, drop)
+            at = _open("Provision Database")
+            _by_label(at.text_input, "Database name (letters, numbers, underscores)").input(db)
+            _by_label(at.text_input, "…or path to a .sql dump on the app server").input(path)
+            with measure(results, "provision", label):
+                _check(_by_label(at.button, "Create").click().run())
+                if at.warning:        # the script stopped on a statement
+                    raise RuntimeError(at.warning[0].value)
+        finally:
+            _run(get_connection, drop)
+            os.remove(path)
+
+
+def _run(get_connection, sql: str):
+    try:
+        conn = get_connection(); cur = conn.cursor()
+        cur.execute(sql)
+    finally:
+        cur.close(); conn.close()
+
+
+# ── entry point ──────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Headless page benchmarks.")
+    ap.add_argument("--only", help="comma list out of " + ",".join(SCENARIOS))
+    ap.add_argument("--json", help="also write the results to this file")
+    args = ap.parse_args()
+    chosen = args.only.split(",") if args.only else SCENARIOS
+
+    results: list[Result] = []
+    with mock.patch("mysql.connector.connect", _bench_connect):
+        for name in SCENARIOS:
+            if name in chosen:
+                print(f"… {name}")
+                globals()[f"bench_{name}"](results)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(as_dicts(results), fh, indent=2)
+    bench_pool().close_all()
+
+
+if __name__ == "__main__":
+    main()
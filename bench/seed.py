@@ -0,0 +1,166 @@
+# bench/seed.py
+"""
+bench/seed.py  –  Create the benchmark database.
+
+    python -m bench.seed [--reset]
+
+Creates BENCH_DB with
+    • synth_10k / synth_100k / synth_1m   synthetic rows (see BENCH_SIZES)
+    • bench_add                          empty twin used by the Add Data run
+    • one table per sheet/*.csv          loaded through importer.load_csv
+
+Data is generated from a fixed seed, so every machine benchmarks the same
+rows.  Tables that already hold the expected row count are left alone;
+`--reset` drops the database first.
+"""
+
+from __future__ import annotations
+import argparse
+import datetime as dt
+import glob
+import os
+import random
+import string
+from decimal import Decimal
+
+import instrument
+from bench.common import (
+    BENCH_DB, bench_pool, make_get_connection, selected_sizes, synth_table,
+)
+from importer import create_table_sql, infer_sql_type, load_csv, read_sample
+from writer import BatchWriter
+
+SEED = 20240601
+CHUNK_ROWS = 5_000
+SHEET_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sheet")
+
+SYNTH_DDL = """
+CREATE TABLE IF NOT EXISTS `{tbl}` (
+  id       INT AUTO_INCREMENT PRIMARY KEY,
+  name     VARCHAR(64)   NOT NULL,
+  category VARCHAR(16)   NOT NULL,
+  qty      INT           NOT NULL,
+  price    DECIMAL(10,2) NOT NULL,
+  created  DATETIME      NOT NULL,
+  note     TEXT,
+  KEY idx_category (category)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+_CATEGORIES = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta"]
+
+
+def synth_rows(n: int, rng: random.Random):
+    """Deterministic synthetic rows, `CHUNK_ROWS` dicts at a time."""
+    t0 = dt.datetime(2020, 1, 1)
+    chunk = []
+    for i in range(1, n + 1):
+        chunk.append({
+            "id": i,
+            "name": f"item-{i:07d}",
+            "category": rng.choice(_CATEGORIES),
+            "qty": rng.randint(0, 10_000),
+            "price": Decimal(rng.randint(0, 10_000_000)) / 100,
+            "created": t0 + dt.timedelta(seconds=rng.randint(0, 4 * 365 * 86_400)),
+            "note": "".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(0, 120)))
+                    or None,
+        })
+        if len(chunk) == CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _scalar(get_connection, sql: str, db: str | None = None):
+    try:
+        conn = get_connection(db); cur = conn.cursor()
+        cur.execute(sql)
+        row = cur.fetchone()
+    finally:
+        cur.close(); conn.close()
+    return row[0] if row else None
+
+
+def _execute(get_connection, sql: str, db: str | None = None):
+    try:
+        conn = get_connection(db); cur = conn.cursor()
+        cur.execute(sql)
+        conn.commit()
+    finally:
+        cur.close(); conn.close()
+
+
+def seed_synth(get_connection, label: str, n: int):
+    tbl = synth_table(label)
+    _execute(get_connection, SYNTH_DDL.format(tbl=tbl), BENCH_DB)
+    if _scalar(get_connection, f"SELECT COUNT(*) FROM `{tbl}`", BENCH_DB) == n:
+        print(f"  {tbl}: {n:,} rows already there"); return
+    _execute(get_connection, f"TRUNCATE TABLE `{tbl}`", BENCH_DB)
+
+    rng = random.Random(SEED)
+    conn = get_connection(BENCH_DB)
+    try:
+        writer = BatchWriter(conn, tbl, CHUNK_ROWS)
+        done = 0
+        for chunk in synth_rows(n, rng):
+            done += writer.insert(chunk)
+            conn.commit()
+            print(f"\r  {tbl}: {done:,}/{n:,}", end="", flush=True)
+        print()
+    finally:
+        conn.close()
+
+
+def seed_sheets(get_connection):
+    for path in sorted(glob.glob(os.path.join(SHEET_DIR, "*.csv"))):
+        tbl = "sheet_" + os.path.splitext(os.path.basename(path))[0]
+        with open(path, "rb") as fh:
+            header, sample = read_sample(fh)
+            rows_in_file = sum(1 for _ in fh) - 1
+            fh.seek(0)
+            if _scalar(
+                get_connection,
+                "SELECT COUNT(*) FROM information_schema.TABLES "
+                f"WHERE TABLE_SCHEMA = '{BENCH_DB}' AND TABLE_NAME = '{tbl}'",
+            ):
+                if _scalar(get_connection, f"SELECT COUNT(*) FROM `{tbl}`", BENCH_DB) == rows_in_file:
+                    print(f"  {tbl}: already loaded"); continue
+                _execute(get_connection, f"DROP TABLE `{tbl}`", BENCH_DB)
+
+            types = [infer_sql_type([r[i] if i < len(r) else "" for r in sample])
+                     for i in range(len(header))]
+            _execute(get_connection, create_table_sql(tbl, header, types, header[0]), BENCH_DB)
+            conn = get_connection(BENCH_DB)
+            try:
+                report = load_csv(
+                    conn, tbl, fh, dict(enumerate(header)), dict(zip(header, types)),
+                )
+            finally:
+                conn.close()
+        print(f"  {tbl}: {report.inserted:,} rows, {len(report.errors)} failed chunk(s)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--reset", action="store_true", help="drop BENCH_DB first")
+    args = ap.parse_args()
+
+    get_connection = make_get_connection(instrument.RunStats("seed"))
+    if args.reset:
+        _execute(get_connection, f"DROP DATABASE IF EXISTS `{BENCH_DB}`")
+    _execute(
+        get_connection,
+        f"CREATE DATABASE IF NOT EXISTS `{BENCH_DB}` "
+        "DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci",
+    )
+    print(f"Seeding `{BENCH_DB}` …")
+    for label, n in selected_sizes().items():
+        seed_synth(get_connection, label, n)
+    _execute(get_connection, SYNTH_DDL.format(tbl="bench_add"), BENCH_DB)
+    seed_sheets(get_connection)
+    bench_pool().close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# catalog.py
+"""
+catalog.py  –  Shared, TTL-bound cache of schema metadata.
+
+Public API (used by the page modules):
+    databases(get_connection)            → [db, …]  (system schemas removed)
+    tables(get_connection, db)           → [table, …]
+    columns(get_connection, db, tbl)     → [(Field, Type, Null, Key, Default, Extra), …]
+    primary_key(get_connection, db, tbl) → [pk_col, …]  (index order)
+    indexes(get_connection, db, tbl)     → [(name, [col, …], unique, type), …]
+    table_stats(get_connection, db)      → [{table, engine, est_rows, …}, …]
+    invalidate(db:str|None = None)
+
+The cache lives at module level, so every session and rerun served by
+this process shares it.  Columns and primary keys for a whole database
+are loaded with a single information_schema query the first time any
+table of that database is asked for.
+
+Entries expire after `CATALOG_TTL` seconds; the DDL paths (provisioning,
+drops, SQL-editor writes) call `invalidate()` so their effect is visible
+on the very next rerun.
+"""
+
+from __future__ import annotations
+import threading
+import time
+
+EXCLUDED_SYS_DBS = ("information_schema", "mysql", "performance_schema", "sys")
+
+CATALOG_TTL = 60.0  # seconds
+
+_lock = threading.Lock()
+_cache: dict[tuple, tuple[float, object]] = {}   # key → (expires_at, value)
+
+
+# ── cache plumbing ───────────────────────────────────────────────────────────
+def _cached(key: tuple, load):
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+    value = load()
+    with _lock:
+        _cache[key] = (now + CATALOG_TTL, value)
+    return value
+
+
+def invalidate(db: str | None = None):
+    """Forget cached metadata for `db` (and the database list), or everything."""
+    with _lock:
+        if db is None:
+            _cache.clear()
+            return
+        for key in [k for k in _cache if k[0] == "databases" or k[1:2] == (db,)]:
+            del _cache[key]
+
+
+def _s(val):
+    """information_schema text may arrive as bytes on some server versions."""
+    if isinstance(val, (bytes, bytearray)):
+        return val.decode("utf-8")
+    return val
+
+
+def _query(get_connection, sql: str, params=()):
+    conn = cur = None
+    try:
+        conn = get_connection(); cur = conn.cursor()
+        cur.execute(sql, params)
+        return cur.fetchall()
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+
+
+# ── loaders ──────────────────────────────────────────────────────────────────
+def databases(get_connection) -> list[str]:
+    def load():
+        return [
+            _s(d[0]) for d in _query(get_connection, "SHOW DATABASES")
+            if _s(d[0]) not in EXCLUDED_SYS_DBS
+        ]
+    return _cached(("databases",), load)
+
+
+def tables(get_connection, db: str) -> list[str]:
+    def load():
+        rows = _query(
+            get_connection,
+            "SELECT TABLE_NAME FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA=%s ORDER BY TABLE_NAME",
+            (db,),
+        )
+        return [_s(r[0]) for r in rows]
+    return _cached(("tables", db), load)
+
+
+def _schema(get_connection, db: str) -> dict[str, dict]:
+    """{table: {"columns": [DESCRIBE rows], "pk": [cols]}} for a whole database."""
+    def load():
+        rows = _query(
+            get_connection,
+            """
+            SELECT c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE, c.IS_NULLABLE,
+                   c.COLUMN_KEY, c.COLUMN_DEFAULT, c.EXTRA, s.SEQ_IN_INDEX
+            FROM information_schema.COLUMNS c
+            LEFT JOIN information_schema.STATISTICS s
+                   ON s.TABLE_SCHEMA = c.TABLE_SCHEMA
+                  AND s.TABLE_NAME   = c.TABLE_NAME
+                  AND s.COLUMN_NAME  = c.COLUMN_NAME
+                  AND s.INDEX_NAME   = 'PRIMARY'
+            WHERE c.TABLE_SCHEMA = %s
+            ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+            """,
+            (db,),
+        )
+        schema: dict[str, dict] = {}
+        for tbl, field, col_type, nullable, key, default, extra, pk_seq in rows:
+            entry = schema.setdefault(_s(tbl), {"columns": [], "pk": []})
+            entry["columns"].append((
+                _s(field), _s(col_type), _s(nullable), _s(key),
+                _s(default), _s(extra) or "",
+            ))
+            if pk_seq is not None:
+                entry["pk"].append((pk_seq, _s(field)))
+        for entry in schema.values():
+            entry["pk"] = [col for _, col in sorted(entry["pk"])]
+        return schema
+
+    return _cached(("schema", db), load)
+
+
+def table_stats(get_connection, db: str) -> list[dict]:
+    """Size / engine / activity of every table from one catalog query.
+
+    Row counts are InnoDB's estimate (no scan); sizes are in bytes.
+    """
+    def load():
+        rows = _query(
+            get_connection,
+            """
+            SELECT t.TABLE_NAME, t.TABLE_TYPE, t.ENGINE, t.TABLE_ROWS,
+                   t.DATA_LENGTH, t.INDEX_LENGTH, t.AUTO_INCREMENT,
+                   t.CREATE_TIME, t.UPDATE_TIME, COALESCE(s.n_indexes, 0)
+            FROM information_schema.TABLES t
+            LEFT JOIN (
+                SELECT TABLE_NAME, COUNT(DISTINCT INDEX_NAME) AS n_indexes
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = %s
+                GROUP BY TABLE_NAME
+            ) s ON s.TABLE_NAME = t.TABLE_NAME
+            WHERE t.TABLE_SCHEMA = %s
+            ORDER BY t.TABLE_NAME
+            """,
+            (db, db),
+        )
+        return [
+            {
+                "table": _s(tbl), "type": _s(kind), "engine": _s(engine),
+                "est_rows": est_rows, "data_bytes": data, "index_bytes": index,
+                "auto_increment": auto_inc, "created": created,
+                "updated": updated, "indexes": int(n_idx),
+            }
+            for tbl, kind, engine, est_rows, data, index, auto_inc,
+                created, updated, n_idx in rows
+        ]
+    return _cached(("table_stats", db), load)
+
+
+def _indexes(get_connection, db: str) -> dict[str, list[tuple]]:
+    """What SHOW INDEX reports, for every table of `db` in one query."""
+    def load():
+        rows = _query(
+            get_connection,
+            """
+            SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, NON_UNIQUE, INDEX_TYPE
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = %s
+            ORDER BY TABLE_NAME, INDEX_NAME = 'PRIMARY' DESC, INDEX_NAME, SEQ_IN_INDEX
+            """,
+            (db,),
+        )
+        out: dict[str, dict[str, tuple]] = {}
+        for tbl, name, col, non_unique, kind in rows:
+            idx = out.setdefault(_s(tbl), {}).setdefault(
+                _s(name), (_s(name), [], not int(non_unique), _s(kind))
+            )
+            if col is not None:            # functional key parts have no column
+                idx[1].append(_s(col))
+        return {tbl: list(idx.values()) for tbl, idx in out.items()}
+    return _cached(("indexes", db), load)
+
+
+def indexes(get_connection, db: str, tbl: str) -> list[tuple]:
+    return _indexes(get_connection, db).get(tbl, [])
+
+
+def _table(get_connection, db: str, tbl: str) -> dict:
+    entry = _schema(get_connection, db).get(tbl)
+    if entry is None:
+        # table created after the cache was filled – reload once
+        with _lock:
+            _cache.pop(("schema", db), None)
+        entry = _schema(get_connection, db).get(tbl, {"columns": [], "pk": []})
+    return entry
+
+
+def columns(get_connection, db: str, tbl: str) -> list[tuple]:
+    return _table(get_connection, db, tbl)["columns"]
+
+
+def primary_key(get_connection, db: str, tbl: str) -> list[str]:
+    return _table(get_connection, db, tbl)["pk"]
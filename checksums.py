@@ -0,0 +1,307 @@
+# checksums.py
+"""
+checksums.py  –  Chunked row checksums for conflict-checked editor saves.
+
+Public API (used by edit.py):
+    ROW_HASH_COL                              → name of the per-row hash column
+    row_hash_sql(columns)                     → SQL expression of a row's hash
+    Snapshot.build(df, hashes, pk_col, where="", params=())
+        .verify(get_connection, db, tbl, columns) → [stale chunk, …]
+        .fetch(get_connection, db, tbl, columns, chunks) → {pk: (hash, row dict)}
+        .lock_and_check(conn, tbl, columns, changes, extra_deletes=(), acked=None)
+                                              → raises RowsChanged
+    RowsChanged(pks)                          → a touched row moved under the save
+    find_conflicts(snapshot, original_df, current, stale, changes, extra_deletes=())
+                                              → [{pk, kind, column, original, theirs, yours}, …]
+
+The editor loads its rows together with a 64-bit hash of each row, made
+by MySQL itself (first 16 hex digits of MD5 over the row's columns), so
+server and client digests are computed from the same bytes.  The loaded
+key range is cut into at most MAX_CHUNKS ranges; a chunk's digest is
+(COUNT(*), BIT_XOR(hash)) of the rows in it, and the snapshot's digests
+are computed locally from the loaded hashes.
+
+Before a save, `verify` asks the server for the same per-chunk digests
+with one GROUP BY – a few KB whatever the table size – and returns the
+chunks that changed since load.  Only those ranges are re-read to tell
+which of the user's own changes collide with someone else's.
+
+The save itself then locks exactly the rows it touches with one
+`SELECT pk, hash … FOR UPDATE` per chunk of keys, inside its own
+transaction, and gives up if any of them differs from what the check
+assumed – nothing can slip in between that check and the writes.
+
+Ranges follow a numeric key (INTERVAL); other keys are checked as one
+chunk, since MySQL collations do not sort like Python strings.
+"""
+
+from __future__ import annotations
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from diff import to_py
+
+ROW_HASH_COL = "__row_hash"
+MAX_CHUNKS = 256          # digests per verification (~24 bytes each)
+MIN_CHUNK_ROWS = 500      # smaller chunks only add digests, not precision
+LOCK_CHUNK = 1_000        # keys per SELECT … FOR UPDATE
+
+
+class RowsChanged(Exception):
+    """Rows a save touches changed after its conflict check; nothing was written."""
+
+    def __init__(self, pks):
+        self.pks = list(pks)
+        super().__init__(
+            f"{len(self.pks)} row(s) changed while saving "
+            f"(e.g. key {_show(self.pks[0])}) – nothing was saved."
+        )
+
+
+def row_hash_sql(columns) -> str:
+    """64-bit unsigned hash of a row; ISNULL flags keep NULL ≠ '' apart."""
+    parts = ", ".join(f"ISNULL(`{c}`), `{c}`" for c in columns)
+    return f"CAST(CONV(LEFT(MD5(CONCAT_WS(0x1f, {parts})), 16), 16, 10) AS UNSIGNED)"
+
+
+def _digests(chunk_ids: np.ndarray, hashes: np.ndarray) -> dict[int, tuple[int, int]]:
+    """{chunk: (rows, xor of hashes)} – mirrors the server's GROUP BY."""
+    if not len(chunk_ids):
+        return {}
+    order = np.argsort(chunk_ids, kind="stable")
+    ids, h = chunk_ids[order], hashes[order]
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    xors = np.bitwise_xor.reduceat(h, starts)
+    counts = np.diff(np.r_[starts, len(ids)])
+    return {int(ids[s]): (int(n), int(x)) for s, n, x in zip(starts, counts, xors)}
+
+
+@dataclass
+class Snapshot:
+    pk_col: str
+    bounds: list                         # chunk i starts at bounds[i-1]
+    digests: dict[int, tuple[int, int]]
+    hashes: pd.Series = field(default_factory=pd.Series)   # row hash at load, by pk
+    where: str = ""
+    params: tuple = ()
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, hashes, pk_col: str, where: str = "", params=()):
+        pks = df[pk_col]
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        bounds: list = []
+        if pd.api.types.is_numeric_dtype(pks) and not pd.api.types.is_bool_dtype(pks):
+            keys = pks.dropna().sort_values().unique()
+            step = max(MIN_CHUNK_ROWS, math.ceil(len(keys) / MAX_CHUNKS))
+            bounds = [to_py(k) for k in keys[step::step]]
+        snap = cls(pk_col, bounds, {}, where=where, params=tuple(params))
+        snap.digests = _digests(snap.chunk_of(pks), hashes)
+        snap.hashes = pd.Series(hashes, index=pks.to_numpy(dtype=object))
+        return snap
+
+    def chunk_of(self, pks) -> np.ndarray:
+        """INTERVAL(pk, bounds…) for every key: -1 for NULL, else ranges below it."""
+        pks = pd.Series(pks)
+        if not self.bounds:
+            return np.where(pks.isna(), -1, 0)
+        vals = pd.to_numeric(pks, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        ids = np.searchsorted(np.asarray(self.bounds, dtype=float), vals, side="right")
+        return np.where(np.isnan(vals), -1, ids)
+
+    # ── server side ─────────────────────────────────────────────────────────
+    def _chunk_sql(self) -> tuple[str, list]:
+        if not self.bounds:
+            return f"IF(`{self.pk_col}` IS NULL, -1, 0)", []
+        marks = ", ".join("%s" for _ in self.bounds)
+        return f"INTERVAL(`{self.pk_col}`, {marks})", list(self.bounds)
+
+    def _where(self, extra: str = "", extra_params=()) -> tuple[str, list]:
+        conds = [f"({self.where})"] if self.where else []
+        if extra:
+            conds.append(f"({extra})")
+        sql = " WHERE " + " AND ".join(conds) if conds else ""
+        return sql, [*self.params, *extra_params]
+
+    def verify(self, get_connection, db: str, tbl: str, columns) -> list[int]:
+        """Chunks whose server digest no longer matches the snapshot."""
+        chunk_sql, chunk_params = self._chunk_sql()
+        where_sql, where_params = self._where()
+        conn = cur = None
+        try:
+            conn = get_connection(db); cur = conn.cursor()
+            cur.execute(
+                f"SELECT {chunk_sql} AS c, COUNT(*), BIT_XOR({row_hash_sql(columns)}) "
+                f"FROM `{tbl}`{where_sql} GROUP BY c",
+                [*chunk_params, *where_params],
+            )
+            server = {int(c): (int(n), int(x)) for c, n, x in cur.fetchall()}
+        finally:
+            if cur is not None:
+                cur.close()
+            if conn is not None:
+                conn.close()
+        return sorted(
+            c for c in set(server) | set(self.digests)
+            if server.get(c) != self.digests.get(c)
+        )
+
+    def _range(self, chunk: int) -> tuple[str, list]:
+        col = f"`{self.pk_col}`"
+        if chunk < 0:
+            return f"{col} IS NULL", []
+        if not self.bounds:
+            return f"{col} IS NOT NULL", []
+        lo = self.bounds[chunk - 1] if chunk > 0 else None
+        hi = self.bounds[chunk] if chunk < len(self.bounds) else None
+        if lo is None:
+            return f"{col} < %s", [hi]
+        if hi is None:
+            return f"{col} >= %s", [lo]
+        return f"{col} >= %s AND {col} < %s", [lo, hi]
+
+    def fetch(self, get_connection, db: str, tbl: str, columns, chunks) -> dict:
+        """Current server rows of `chunks`: {pk: (hash, {col: value})}."""
+        if not chunks:
+            return {}
+        ranges = [self._range(c) for c in chunks]
+        where_sql, params = self._where(
+            " OR ".join(f"({sql})" for sql, _ in ranges),
+            [p for _, args in ranges for p in args],
+        )
+        conn = cur = None
+        try:
+            conn = get_connection(db); cur = conn.cursor()
+            cur.execute(
+                f"SELECT *, {row_hash_sql(columns)} AS `{ROW_HASH_COL}` FROM `{tbl}`{where_sql}",
+                params,
+            )
+            names = [d[0] for d in cur.description]
+            out = {}
+            for row in cur.fetchall():
+                rec = dict(zip(names, row))
+                h = rec.pop(ROW_HASH_COL)
+                out[to_py(rec[self.pk_col])] = (int(h), rec)
+        finally:
+            if cur is not None:
+                cur.close()
+            if conn is not None:
+                conn.close()
+        return out
+
+
+    def row_hash(self, pk):
+        """Hash of row `pk` at load, or None if it was not loaded."""
+        h = self.hashes.get(pk)
+        if isinstance(h, pd.Series):       # duplicate keys (no real primary key)
+            h = h.iloc[0]
+        return None if h is None else int(h)
+
+    def lock_and_check(self, conn, tbl: str, columns, changes, extra_deletes=(), acked=None):
+        """Lock every row the save touches and check it is as the save assumes.
+
+        Run on the save's connection, in its transaction, right before the
+        writes.  Updated and deleted rows must still hash as loaded – or as
+        in `acked` ({pk: their hash, None if gone}), the conflicts the user
+        chose to overwrite; a deleted row may also be gone, and the key of
+        an inserted row must be free.  Raises RowsChanged otherwise.
+        """
+        acked = acked or {}
+        pk_col = self.pk_col
+        deletes = {*changes.deletes, *extra_deletes}
+        want = {pk: self.row_hash(pk) for pk in [*changes.updates, *deletes]}
+        for row in changes.inserts:
+            if row.get(pk_col) is not None:
+                want.setdefault(row[pk_col], None)
+        want.update((pk, h) for pk, h in acked.items() if pk in want)
+
+        keys, changed = list(want), []
+        cur = conn.cursor()
+        try:
+            for i in range(0, len(keys), LOCK_CHUNK):
+                chunk = keys[i:i + LOCK_CHUNK]
+                marks = ", ".join("%s" for _ in chunk)
+                cur.execute(
+                    f"SELECT `{pk_col}`, {row_hash_sql(columns)} FROM `{tbl}` "
+                    f"WHERE `{pk_col}` IN ({marks}) FOR UPDATE",
+                    chunk,
+                )
+                have = {to_py(pk): int(h) for pk, h in cur.fetchall()}
+                changed += [
+                    pk for pk in chunk
+                    if have.get(pk) != want[pk] and not (pk in deletes and pk not in have)
+                ]
+        finally:
+            cur.close()
+        if changed:
+            raise RowsChanged(changed)
+
+
+# ── conflicts ────────────────────────────────────────────────────────────────
+def find_conflicts(snap: Snapshot, original: pd.DataFrame, current: dict,
+                   stale: list[int], changes, extra_deletes=()) -> list[dict]:
+    """The user's changes that touch rows someone else changed since load.
+
+    `current` is `snap.fetch(…)` of the `stale` chunks; every other chunk
+    is unchanged, so nothing outside them can conflict.
+    """
+    stale = set(stale)
+    pk_col = snap.pk_col
+    keys = pd.Index(original[pk_col])
+    out = []
+
+    def original_row(pk):
+        try:
+            loc = keys.get_loc(pk)
+        except KeyError:
+            return {}
+        if isinstance(loc, slice):             # duplicate keys → first row
+            loc = loc.start
+        elif not isinstance(loc, (int, np.integer)):
+            loc = int(np.argmax(loc))
+        return original.iloc[loc].to_dict()
+
+    mine = {pk: ("update", cols) for pk, cols in changes.updates.items()}
+    for pk in [*changes.deletes, *extra_deletes]:
+        mine[pk] = ("delete", {})
+    chunks = snap.chunk_of(list(mine)) if mine else []
+    for (pk, (kind, cols)), chunk in zip(mine.items(), chunks):
+        if int(chunk) not in stale:
+            continue
+        theirs = current.get(pk)
+        if theirs is not None and theirs[0] == snap.row_hash(pk):
+            continue                                   # row itself untouched
+        if theirs is None and kind == "delete":
+            continue                                   # gone either way
+        orig = original_row(pk)
+        if theirs is None:
+            out.append({"pk": pk, "kind": f"{kind} · deleted by someone else",
+                        "column": "", "original": "", "theirs": "(deleted)", "yours": ""})
+            continue
+        their_row = theirs[1]
+        touched = [c for c in their_row if not _same(their_row[c], orig.get(c))]
+        for c in sorted(set(touched) | set(cols), key=list(their_row).index):
+            out.append({
+                "pk": pk, "kind": f"{kind} · changed by someone else", "column": c,
+                "original": _show(orig.get(c)), "theirs": _show(their_row.get(c)),
+                "yours": "(delete)" if kind == "delete" else _show(cols.get(c, orig.get(c))),
+            })
+
+    for row in changes.inserts:
+        pk = row.get(pk_col)
+        if pk in current and pk not in snap.hashes:
+            out.append({"pk": pk, "kind": "insert · key now taken by someone else",
+                        "column": "", "original": "", "theirs": "(row exists)", "yours": ""})
+    return out
+
+
+def _same(a, b) -> bool:
+    a, b = to_py(a), to_py(b)
+    return a == b or (a is None and b is None)
+
+
+def _show(v):
+    v = to_py(v)
+    return "NULL" if v is None else str(v)
@@ -11,17 +11,13 @@ contains **zero duplicated credentials**.
 
 import streamlit as st
 
-EXCLUDED_SYS_DBS = ("information_schema", "mysql", "performance_schema", "sys")
+import catalog
 
 def render_connection_page(get_connection):
     """Display connection snippets for any user-created database."""
     st.title("Database Connection Info")
-    try:
-        conn = get_connection(); cur = conn.cursor()
-        cur.execute("SHOW DATABASES")
-        dbs = [d[0] for d in cur.fetchall() if d[0] not in EXCLUDED_SYS_DBS]
-    finally:
-        cur.close(); conn.close()
+    dbs = catalog.databases(get_connection)
+    conn = get_connection(); conn.close()   # only for host/port/user below
 
     if not dbs:
         st.info("No user-created databases."); return
@@ -1,26 +1,65 @@
 import streamlit as st
 
+import catalog
+import jobs
+import resultcache
+
 """
 Delete page for the Streamlit app.
 
 `render_delete_page(get_connection, simple_rerun)` is imported
-and called by app.py.
+and called by app.py.  Drops run as background jobs (see jobs.py): a
+DROP of a big database can take minutes and should not die with the tab.
 """
 
 
+def _drop_job(get_connection, conn_db, sql, invalidate_db):
+    def run(job):
+        conn = cur = None
+        try:
+            conn = get_connection(conn_db); cur = conn.cursor()
+            job.on_cancel(lambda: jobs.kill_query(get_connection, conn.connection_id))
+            job.update(message="waiting for metadata lock / dropping…")
+            cur.execute(sql)
+            conn.commit()
+        finally:
+            catalog.invalidate(invalidate_db)
+            resultcache.invalidate(invalidate_db)
+            if cur is not None:
+                cur.close()
+            if conn is not None:
+                conn.close()
+    return run
+
+
+def _submit_drop(get_connection, conn_db, sql, title, invalidate_db):
+    try:
+        job = jobs.submit("drop", title, _drop_job(get_connection, conn_db, sql, invalidate_db),
+                          db=invalidate_db)
+    except jobs.JobQueueFull as e:
+        st.error(e); return
+    st.success(f"Queued as job `{job.id}` – see the Jobs page for progress.")
+    st.session_state.setdefault("drop_jobs", []).append(job.id)
+
+
+def _render_drop_jobs():
+    """Status of this session's drops that are still running or just ended."""
+    ids = st.session_state.get("drop_jobs", [])
+    for job_id in list(ids):
+        job = jobs.get(job_id)
+        if job is None:
+            ids.remove(job_id); continue
+        jobs.render_job_status(job, key="drop")
+        if not job.active:
+            ids.remove(job_id)
+
+
 def render_delete_page(get_connection, simple_rerun):
     st.title("Delete Database or Table")
+    _render_drop_jobs()
 
     # ── Fetch user databases ─────────────────────────────────────────────────
-    try:
-        conn = get_connection(); cur = conn.cursor()
-        cur.execute("SHOW DATABASES")
-        dbs = [
-            d[0] for d in cur.fetchall()
-            if d[0] not in ("information_schema", "mysql", "performance_schema", "sys")
-        ]
-    finally:
-        cur.close(); conn.close()
+    dbs = catalog.databases(get_connection)
 
     if not dbs:
         st.info("No user-created databases.")
@@ -34,16 +73,10 @@ def render_delete_page(get_connection, simple_rerun):
     )
     if st.button(f"❌ Drop database `{db_to_drop}`"):
         if confirm_drop_db:
-            try:
-                conn = get_connection(); cur = conn.cursor()
-                cur.execute(f"DROP DATABASE `{db_to_drop}`")
-                conn.commit()
-                st.success(f"Database `{db_to_drop}` deleted.")
-                simple_rerun()
-            except Exception as e:
-                st.error(f"Failed to drop `{db_to_drop}`: {e}")
-            finally:
-                cur.close(); conn.close()
+            _submit_drop(
+                get_connection, None, f"DROP DATABASE `{db_to_drop}`",
+                f"Drop database `{db_to_drop}`", db_to_drop,
+            )
         else:
             st.warning("Please confirm deletion by checking the box above.")
         return  # stop here so the rerun will refresh the list
@@ -53,12 +86,7 @@ def render_delete_page(get_connection, simple_rerun):
     # ── Drop a table ─────────────────────────────────────────────────────────
     st.subheader("Drop a table from a database")
     db_for_tables = st.selectbox("Choose database", dbs, key="tbl_db_drop")
-    try:
-        conn = get_connection(db_for_tables); cur = conn.cursor()
-        cur.execute("SHOW TABLES")
-        tables = [t[0] for t in cur.fetchall()]
-    finally:
-        cur.close(); conn.close()
+    tables = catalog.tables(get_connection, db_for_tables)
 
     if not tables:
         st.info(f"No tables in `{db_for_tables}`.")
@@ -70,16 +98,10 @@ def render_delete_page(get_connection, simple_rerun):
     )
     if st.button(f"❌ Drop table `{tbl_to_drop}` from `{db_for_tables}`"):
         if confirm_drop_tbl:
-            try:
-                conn = get_connection(db_for_tables); cur = conn.cursor()
-                cur.execute(f"DROP TABLE `{tbl_to_drop}`")
-                conn.commit()
-                st.success(f"Table `{tbl_to_drop}` dropped.")
-                simple_rerun()
-            except Exception as e:
-                st.error(f"Failed to drop table `{tbl_to_drop}`: {e}")
-            finally:
-                cur.close(); conn.close()
+            _submit_drop(
+                get_connection, db_for_tables, f"DROP TABLE `{tbl_to_drop}`",
+                f"Drop table `{db_for_tables}`.`{tbl_to_drop}`", db_for_tables,
+            )
         else:
             st.warning("Please confirm deletion by checking the box above.")
         return  # stop here so the rerun will refresh the table list
@@ -0,0 +1,186 @@
+# diff.py
+"""
+diff.py  –  Vectorised diff between a loaded table and its edited copy.
+
+Public API (used by edit.py):
+    diff_from_editor(orig_df, edited_df, editor_state, pk_col, generated_cols=())
+                                                                → FrameDiff
+    diff_frames(orig_df, edited_df, pk_col, generated_cols=())  → FrameDiff
+    to_py(val)                                                  → DB-safe value
+
+`diff_from_editor` reads the delta `st.data_editor` already keeps in
+session state (`edited_rows`, `added_rows`, `deleted_rows`, all keyed by
+row position in the frame that was passed in), so a save costs
+O(changes) no matter how large the table is.
+
+`diff_frames` is the fallback when no editor state is available: both
+frames are indexed by `pk_col`, so matching rows is a hash join instead
+of a per-row `.loc[df[pk_col] == pk]` scan, and the cell-level
+comparison is a single `DataFrame.ne` over the rows present on both
+sides.  Only rows that actually changed are touched in Python.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Utility: convert numpy / pandas scalars to plain-Python objects
+# ─────────────────────────────────────────────────────────────────────────────
+def to_py(val):
+    """Return a DB-safe pure-Python value (no numpy scalars, no NaN/NA)."""
+    if val is None or val is pd.NA or val is pd.NaT:
+        return None
+    if isinstance(val, float) and np.isnan(val):
+        return None
+    if isinstance(val, np.generic):
+        return None if pd.isna(val) else val.item()
+    if isinstance(val, pd.Timestamp):
+        return val.to_pydatetime()
+    return val
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Result container
+# ─────────────────────────────────────────────────────────────────────────────
+@dataclass
+class FrameDiff:
+    deletes: list = field(default_factory=list)        # [pk, …]
+    updates: dict = field(default_factory=dict)        # pk → {col: new value}
+    inserts: list = field(default_factory=list)        # [{col: value}, …]
+
+    def __bool__(self):
+        return bool(self.deletes or self.updates or self.inserts)
+
+
+def _blank(s: pd.Series) -> pd.Series:
+    """True where a PK cell is empty (None / NaN / "")."""
+    return s.isna() | s.astype(object).eq("")
+
+
+def _keyed(df: pd.DataFrame, pk_col: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Index `df` by its PK; return (first row per PK, surplus duplicates)."""
+    keyed = df.set_index(pk_col, drop=False)
+    dup = keyed.index.duplicated(keep="first")
+    return keyed[~dup], keyed[dup]
+
+
+def _same(a, b) -> bool:
+    a, b = to_py(a), to_py(b)
+    return a == b or (a is None and b is None)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Delta from the data_editor state
+# ─────────────────────────────────────────────────────────────────────────────
+def diff_from_editor(
+    orig_df: pd.DataFrame,
+    edited_df: pd.DataFrame,
+    editor_state: dict,
+    pk_col: str,
+    generated_cols=(),
+) -> FrameDiff:
+    """Changes recorded by `st.data_editor` for `orig_df`, as a FrameDiff.
+
+    `orig_df` must carry the default RangeIndex (row label == position),
+    which is what the editor's positions refer to.  Values are taken from
+    `edited_df`, where Streamlit has already parsed them to column dtypes.
+    A changed PK becomes an UPDATE of the key itself (the writer assigns
+    it last); rows left without a PK are ignored, like in `diff_frames`.
+    """
+    generated = set(generated_cols)
+    write_cols = [c for c in edited_df.columns if c not in generated]
+    pk_pos = orig_df.columns.get_loc(pk_col)
+    deleted = {int(p) for p in editor_state.get("deleted_rows", ())}
+
+    deletes = [to_py(orig_df.iat[p, pk_pos]) for p in sorted(deleted)]
+
+    updates: dict = {}
+    for pos, cells in editor_state.get("edited_rows", {}).items():
+        pos = int(pos)
+        if pos in deleted or pos not in edited_df.index:
+            continue
+        old_pk = to_py(orig_df.iat[pos, pk_pos])
+        if old_pk is None or old_pk == "":
+            continue
+        row = edited_df.loc[pos]
+        changed = {
+            c: to_py(row[c]) for c in cells
+            if c in write_cols and not _same(row[c], orig_df.iat[pos, orig_df.columns.get_loc(c)])
+        }
+        if changed.get(pk_col, old_pk) in (None, ""):
+            changed.pop(pk_col)        # never blank out a key
+        if changed:
+            updates[old_pk] = changed
+
+    # added rows are appended after the surviving originals
+    n_added = len(editor_state.get("added_rows", ()))
+    added = edited_df.iloc[len(edited_df) - n_added:] if n_added else edited_df.iloc[:0]
+    added = added[~_blank(added[pk_col])]
+    inserts = [
+        {c: to_py(v) for c, v in zip(write_cols, row)}
+        for row in added[write_cols].to_numpy(dtype=object)
+    ]
+
+    return FrameDiff(deletes=deletes, updates=updates, inserts=inserts)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Whole-frame comparison
+# ─────────────────────────────────────────────────────────────────────────────
+def diff_frames(
+    orig_df: pd.DataFrame,
+    edited_df: pd.DataFrame,
+    pk_col: str,
+    generated_cols=(),
+) -> FrameDiff:
+    """Deletes, per-row changed columns and inserts that turn orig into edited.
+
+    Rows whose PK changed show up as a delete of the old key plus an insert
+    of the new one; edited rows without a PK value are ignored, as are
+    generated columns (the server computes those).
+    """
+    generated = set(generated_cols)
+    write_cols = [c for c in edited_df.columns if c not in generated]
+    cmp_cols = [c for c in write_cols if c != pk_col and c in orig_df.columns]
+
+    orig, _ = _keyed(orig_df[~_blank(orig_df[pk_col])], pk_col)
+    edited, surplus = _keyed(edited_df[~_blank(edited_df[pk_col])], pk_col)
+
+    # ── deletes / inserts: set arithmetic on the PK index ───────────────────
+    gone = orig.index.difference(edited.index, sort=False)
+    new = edited.index.difference(orig.index, sort=False)
+
+    # ── updates: one vectorised comparison over the shared keys ─────────────
+    common = orig.index.intersection(edited.index, sort=False)
+    old_vals = orig.loc[common, cmp_cols]
+    new_vals = edited.loc[common, cmp_cols]
+    changed = new_vals.ne(old_vals) & ~(new_vals.isna() & old_vals.isna())
+    row_changed = changed.to_numpy().any(axis=1)
+
+    updates = {}
+    for pk_val, mask, vals in zip(
+        common[row_changed],
+        changed.to_numpy()[row_changed],
+        new_vals.to_numpy(dtype=object)[row_changed],
+    ):
+        updates[to_py(pk_val)] = {
+            c: to_py(v) for c, m, v in zip(cmp_cols, mask, vals) if m
+        }
+
+    added = edited.loc[new, write_cols]
+    if len(surplus):        # a new row reused an existing PK → let the DB reject it
+        added = pd.concat([added, surplus[write_cols]])
+    inserts = [
+        {c: to_py(v) for c, v in zip(write_cols, row)}
+        for row in added.to_numpy(dtype=object)
+    ]
+
+    return FrameDiff(
+        deletes=[to_py(v) for v in gone],
+        updates=updates,
+        inserts=inserts,
+    )
@@ -1,28 +1,26 @@
 from __future__ import annotations
+import hashlib
 import re
+import time
 import streamlit as st
 import pandas as pd
-import numpy as np
 
-EXCLUDED_SYS_DBS = (
-    "information_schema",
-    "mysql",
-    "performance_schema",
-    "sys",
-)
-
-# ─────────────────────────────────────────────────────────────────────────────
-# Utility: convert numpy / pandas scalars to plain-Python objects
-# ─────────────────────────────────────────────────────────────────────────────
-def _py(val):
-    """Return a DB-safe pure-Python value (no numpy scalars)."""
-    if val is None or (isinstance(val, float) and pd.isna(val)):
-        return None
-    if isinstance(val, np.generic):
-        return val.item()
-    if isinstance(val, pd.Timestamp):
-        return val.to_pydatetime()
-    return val
+import aio
+import catalog
+import jobs
+import resultcache
+from checksums import ROW_HASH_COL, RowsChanged, Snapshot, find_conflicts, row_hash_sql
+from diff import FrameDiff, diff_frames, diff_from_editor, to_py
+from export import render_export_controls
+from filters import render_filter_builder
+from frames import kinds_from_describe
+from profiler import profile_script, render_profile
+from schema_dump import dump_schema
+from sqlscript import is_read_only, split_sql
+from sql_runner import FanOut, ScriptRun, FANOUT_WORKERS, ROW_CAP, TIMEOUT_S
+from writer import BatchWriter, DEFAULT_CHUNK_SIZE
+
+BACKGROUND_SAVE_CHANGES = 5_000     # saves with more changed rows run as a job
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Main entry
@@ -33,72 +31,105 @@ def render_edit_page(get_connection, simple_rerun):
     # --------------------------------------------------------------------- #
     # 1 – Pick database
     # --------------------------------------------------------------------- #
-    try:
-        conn = get_connection(); cur = conn.cursor()
-        cur.execute("SHOW DATABASES")
-        dbs = [d[0] for d in cur.fetchall() if d[0] not in EXCLUDED_SYS_DBS]
-    finally:
-        cur.close(); conn.close()
+    # The database / table picked on the last render are known before the
+    # widgets are drawn, so their lookups run side by side with the
+    # database list (aio.py); the catalog calls below are cache hits.
+    last_db = st.session_state.get("edit_db")
+    dbs, *_ = aio.gather(
+        aio.databases(get_connection),
+        *aio.warm(get_connection, last_db, st.session_state.get(f"edit_tbl_{last_db}")),
+    )
 
     if not dbs:
         st.info("No user-created databases.")
         return
 
-    db = st.selectbox("Database", dbs)
+    db = st.selectbox("Database", dbs, key="edit_db")
     tab_sheet, tab_sql = st.tabs(["Spreadsheet Editor", "SQL Editor"])
 
     # =====================================================================
     # TAB 1 – Spreadsheet Editor
     # =====================================================================
     with tab_sheet:
-        try:
-            conn = get_connection(db); cur = conn.cursor()
-            cur.execute("SHOW TABLES")
-            tables = [t[0] for t in cur.fetchall()]
-        finally:
-            cur.close(); conn.close()
+        tables = catalog.tables(get_connection, db)
 
         if not tables:
             st.info("No tables in this DB.")
             return
 
-        tbl = st.selectbox("Table", tables)
+        tbl = st.selectbox("Table", tables, key=f"edit_tbl_{db}")
 
-        # Pull rows & column metadata (no LIMIT → fetches all rows)
-        conn = get_connection(db); cur = conn.cursor()
-        cur.execute(f"SELECT * FROM `{tbl}`")
-        cols = [d[0] for d in cur.description]
-        rows = cur.fetchall()
+        # Field, Type, Null, Key, Default, Extra – fetched together with the indexes
+        desc, _ = aio.gather(
+            aio.columns(get_connection, db, tbl), aio.indexes(get_connection, db, tbl),
+        )
 
-        cur.execute(f"SHOW COLUMNS FROM `{tbl}`")
-        desc = cur.fetchall()   # Field, Type, Null, Key, Default, Extra
+        # Only the rows matching the filter are loaded and edited; Save
+        # touches those rows (and new ones) and nothing else
+        with st.expander("Filter / sort (server-side)"):
+            try:
+                spec = render_filter_builder(
+                    [d[0] for d in desc], catalog.indexes(get_connection, db, tbl),
+                    key=f"sheet_flt_{db}_{tbl}",
+                )
+            except ValueError as e:
+                st.error(e); return
+        # rows come with a server-made hash each, so a save can check
+        # cheaply what others changed since load (see checksums.py); a
+        # LIMIT makes the loaded set arbitrary, so it is not checked
+        check_conflicts = not spec.limit
+        sql, params = spec.select(
+            tbl,
+            extra=f"{row_hash_sql([d[0] for d in desc])} AS `{ROW_HASH_COL}`"
+            if check_conflicts else "",
+        )
+        where, where_params = spec.where()
+
+        # one editor state per loaded subset: its row positions refer to it
+        editor_key = "sheet_editor_" + hashlib.md5(
+            repr((db, sql, params)).encode()
+        ).hexdigest()[:12]
+
+        # Pull rows (no filter/LIMIT → fetches all rows; cached until the
+        # table changes) straight into typed columns – no categoricals /
+        # range downcasts, so every value the column accepts stays editable.
+        # While there are unsaved edits the loaded snapshot stays pinned.
+        snapshot = st.session_state.get("sheet_snapshot")
+        if snapshot is None or snapshot["key"] != editor_key or not _has_edits(editor_key):
+            try:
+                loaded = resultcache.frame(
+                    get_connection, db, sql, params, tables=(tbl,),
+                    overrides=kinds_from_describe(desc), read_only=False,
+                )
+            except Exception as e:
+                st.error(f"Could not load `{tbl}`: {e}"); return
+            hashes = loaded.pop(ROW_HASH_COL).to_numpy() if check_conflicts else None
+            snapshot = {"key": editor_key, "df": loaded, "hashes": hashes,
+                        "at": time.strftime("%H:%M:%S")}
+            st.session_state.sheet_snapshot = snapshot
+        orig_df = snapshot["df"]
+        cols = list(orig_df.columns)
+        if spec:
+            st.caption(f"Editing {len(orig_df):,} row(s) matching the filter.")
         generated_cols = {
             field for field, *_, extra in desc
             if "GENERATED" in extra.upper()
         }
-        cur.close(); conn.close()
 
         # Detect PK column
-        try:
-            conn = get_connection(db); cur = conn.cursor()
-            cur.execute(f"SHOW KEYS FROM `{tbl}` WHERE Key_name='PRIMARY'")
-            pk_info = cur.fetchone()
-        finally:
-            cur.close(); conn.close()
-
-        pk_col_auto = pk_info[4] if pk_info else cols[0]
+        pk_info = catalog.primary_key(get_connection, db, tbl)
+        pk_col_auto = pk_info[0] if pk_info else cols[0]
         pk_col = st.selectbox(
             "Primary-key column",
             cols,
             index=cols.index(pk_col_auto),
         )
 
-        orig_df = pd.DataFrame(rows, columns=cols)
         edited_df = st.data_editor(
             orig_df,
             num_rows="dynamic",
             use_container_width=True,
-            key="sheet_editor",
+            key=editor_key,
         ).where(pd.notnull, None)   # convert pd.NA → None
 
         # Manual Delete Selector
@@ -108,78 +139,129 @@ def render_edit_page(get_connection, simple_rerun):
             format_func=lambda v: f"{v}",
         )
 
-        if st.button("Save Changes", key="save_btn"):
+        chunk_size = st.number_input(
+            "Rows per write statement",
+            min_value=1, max_value=10_000, value=DEFAULT_CHUNK_SIZE,
+            key="save_chunk_size",
+        )
+
+        save_job = jobs.get(st.session_state.get("save_job"))
+        if save_job is not None:
+            jobs.render_job_status(save_job, key="save")
+            if save_job.active:
+                time.sleep(0.5)
+                st.rerun()
+            st.session_state.pop("save_job", None)
+            if save_job.status == "done":
+                st.session_state.pop("sheet_snapshot", None)
+                st.success(_save_summary(*save_job.result) + " committed.")
+
+        st.caption(f"Snapshot loaded at {snapshot['at']}"
+                   + (" · kept while you have unsaved edits" if _has_edits(editor_key) else ""))
+
+        conflict_key = f"{editor_key}_conflicts"
+        if st.session_state.get(conflict_key):
+            _render_conflicts(editor_key, conflict_key)
+
+        resolve = st.session_state.pop(f"{editor_key}_resolve", None)
+        if st.button("Save Changes", key="save_btn") or resolve:
+            merged, conn = "", None
             try:
-                conn = get_connection(db); cur = conn.cursor()
-
-                orig_pk_set   = set(orig_df[pk_col].dropna())
-                edited_pk_set = set(edited_df[pk_col].dropna())
-
-                # Deletes
-                del_pks = (orig_pk_set - edited_pk_set) | set(to_delete)
-                del_cnt = 0
-                for pk_val in del_pks:
-                    cur.execute(
-                        f"DELETE FROM `{tbl}` WHERE `{pk_col}`=%s",
-                        (_py(pk_val),),
+                conn = get_connection(db)
+                # the editor already knows what changed → O(changes), not O(table)
+                editor_state = st.session_state.get(editor_key)
+                if editor_state is not None:
+                    changes = diff_from_editor(
+                        orig_df, edited_df, editor_state, pk_col, generated_cols
                     )
-                    del_cnt += cur.rowcount
-
-                # Updates
-                upd_cnt = 0
-                for pk_val in edited_pk_set & orig_pk_set:
-                    row_old = orig_df.loc[orig_df[pk_col] == pk_val].iloc[0]
-                    row_new = edited_df.loc[edited_df[pk_col] == pk_val].iloc[0]
-
-                    for c in cols:
-                        if c in generated_cols:
-                            continue
-                        if row_new[c] != row_old[c]:
-                            cur.execute(
-                                f"UPDATE `{tbl}` SET `{c}`=%s WHERE `{pk_col}`=%s",
-                                (_py(row_new[c]), _py(pk_val)),
-                            )
-                            upd_cnt += cur.rowcount
-
-                # Inserts: only if both PK and fullname are set
-                ins_cnt = 0
-                insert_cols = [c for c in cols if c not in generated_cols]
-                placeholders = ", ".join("%s" for _ in insert_cols)
-                col_list     = ", ".join(f"`{c}`" for c in insert_cols)
-
-                for _, row in edited_df.iterrows():
-                    pk_val = row[pk_col]
-                    is_new = pk_val in (None, "", 0) or pk_val not in orig_pk_set
-                    if not is_new:
-                        continue
-
-                    # Skip rows missing username or fullname
-                    if row.get(pk_col) in (None, "") or row.get('fullname') in (None, ""):
-                        continue
-
-                    cur.execute(
-                        f"INSERT INTO `{tbl}` ({col_list}) VALUES ({placeholders})",
-                        tuple(_py(row[c]) for c in insert_cols),
+                else:
+                    changes = diff_frames(orig_df, edited_df, pk_col, generated_cols)
+                extra_deletes = [to_py(v) for v in to_delete]
+
+                # ── conflict check: per-range digests, then only stale ranges.
+                # Also after "overwrite" / "skip": only conflicts the user has
+                # seen (same key, same server row) count as acknowledged.
+                snap, acked = None, {}
+                if check_conflicts and (changes or extra_deletes):
+                    snap = Snapshot.build(
+                        orig_df, snapshot["hashes"], pk_col, where, where_params
                     )
-                    ins_cnt += cur.rowcount
+                    seen = st.session_state.get(f"{conflict_key}_acked", {}) if resolve else {}
+                    stale = snap.verify(get_connection, db, tbl, cols)
+                    if stale:
+                        current = snap.fetch(get_connection, db, tbl, cols, stale)
+                        conflicts = find_conflicts(
+                            snap, orig_df, current, stale, changes, extra_deletes
+                        )
+                        theirs = {c["pk"]: current[c["pk"]][0] if c["pk"] in current else None
+                                  for c in conflicts}
+                        if any(pk not in seen or seen[pk] != h for pk, h in theirs.items()):
+                            st.session_state[conflict_key] = conflicts
+                            st.session_state[f"{conflict_key}_acked"] = theirs
+                            st.rerun()      # show the (new) conflict view
+                        acked = theirs
+                        merged = (f" {len(theirs)} conflicting row(s) resolved as you chose."
+                                  if theirs else
+                                  f" {len(stale)} changed range(s) from others did not "
+                                  "overlap your edits and were kept.")
+                if resolve == "skip":
+                    changes = FrameDiff(
+                        deletes=[pk for pk in changes.deletes if pk not in acked],
+                        updates={pk: v for pk, v in changes.updates.items() if pk not in acked},
+                        inserts=[row for row in changes.inserts if row.get(pk_col) not in acked],
+                    )
+                    extra_deletes = [pk for pk in extra_deletes if pk not in acked]
+                    acked = {}
+                for k in (conflict_key, f"{conflict_key}_acked"):
+                    st.session_state.pop(k, None)
+                n_changes = (len(changes.inserts) + len(changes.updates)
+                             + len(changes.deletes) + len(extra_deletes))
+
+                if n_changes > BACKGROUND_SAVE_CHANGES:
+                    # big save → background job, so it survives the tab
+                    conn.close(); conn = None
+                    job = jobs.submit(
+                        "save", f"Save {n_changes:,} changes to `{db}`.`{tbl}`",
+                        lambda job: _save_job(
+                            job, get_connection, db, tbl, int(chunk_size),
+                            pk_col, changes, extra_deletes, snap, cols, acked,
+                        ),
+                        db=db,
+                    )
+                    st.session_state.save_job = job.id
+                    st.rerun()
+
+                # lock the touched rows: none may change between check and write
+                if snap is not None:
+                    snap.lock_and_check(conn, tbl, cols, changes, extra_deletes, acked)
+
+                # Deletes, then one UPDATE per chunk, then multi-row INSERTs
+                ins_cnt, upd_cnt, del_cnt = BatchWriter(conn, tbl, chunk_size).apply(
+                    pk_col, changes, extra_deletes=extra_deletes,
+                )
 
                 # Commit & Feedback
                 if del_cnt or upd_cnt or ins_cnt:
                     conn.commit()
-                    parts = []
-                    if ins_cnt: parts.append(f"🟢 {ins_cnt} insert")
-                    if upd_cnt: parts.append(f"🟡 {upd_cnt} update")
-                    if del_cnt: parts.append(f"🔴 {del_cnt} delete")
-                    st.success(" | ".join(parts) + " committed.")
+                    resultcache.invalidate(db)
+                    st.session_state.pop("sheet_snapshot", None)
+                    st.success(_save_summary(ins_cnt, upd_cnt, del_cnt) + " committed." + merged)
                     simple_rerun()
                 else:
                     st.info("Nothing to save – no changes detected.")
 
-            except Exception as e:
+            except jobs.JobQueueFull as e:
+                st.error(f"Save not queued: {e}")
+            except RowsChanged as e:
                 conn.rollback()
+                st.error(f"{e} Press Save Changes again to review what changed.")
+            except Exception as e:
+                if conn is not None:
+                    conn.rollback()
                 st.error(f"Save failed: {e}")
             finally:
-                cur.close(); conn.close()
+                if conn is not None:
+                    conn.close()
 
     # =====================================================================
     # TAB 2 – Free SQL / DDL Editor
@@ -195,29 +277,10 @@ def render_edit_page(get_connection, simple_rerun):
 
         # Button to load full schema
         if st.button("Load current schema", key="load_schema"):
-            schema_statements = []
-            conn = get_connection(db); cur = conn.cursor()
-
-            # Tables
-            cur.execute("SHOW TABLES")
-            tables = [t[0] for t in cur.fetchall()]
-            for tbl in tables:
-                cur.execute(f"SHOW CREATE TABLE `{tbl}`")
-                row = cur.fetchone()
-                create_sql = row[1]
-                schema_statements.append(f"{create_sql};\n\n")
-
-            # Triggers
-            cur.execute("SHOW TRIGGERS")
-            triggers = [r[0] for r in cur.fetchall()]
-            for trg in triggers:
-                cur.execute(f"SHOW CREATE TRIGGER `{trg}`")
-                row = cur.fetchone()
-                create_sql = row[2]
-                schema_statements.append(f"{create_sql};\n\n")
-
-            cur.close(); conn.close()
-            st.session_state.schema_sql = "".join(schema_statements)
+            try:
+                st.session_state.schema_sql = dump_schema(get_connection, db)
+            except Exception as e:
+                st.error(f"Could not load schema: {e}")
 
         # Editable SQL area
         sql_code = st.text_area(
@@ -227,40 +290,257 @@ def render_edit_page(get_connection, simple_rerun):
             key="schema_sql_area",
         )
 
-        if st.button("Execute", key="exec_sql"):
-            cleaned_sql = "\n".join(
-                line for line in sql_code.splitlines()
-                if not line.strip().upper().startswith("DELIMITER")
+        with st.expander("Export the result of a single SELECT"):
+            export_stmts = split_sql(sql_code)
+            if len(export_stmts) != 1:
+                st.info("Export works on one statement – reduce the editor to a single SELECT.")
+            elif not is_read_only(export_stmts[0]):
+                st.info("Only a read-only SELECT / TABLE statement can be exported.")
+            else:
+                export_sql = export_stmts[0]
+                render_export_controls(
+                    get_connection, db, export_sql,
+                    name=f"{db}_query", key=f"exp_sql_{db}",
+                )
+
+        limit_rows, limit_time = st.columns(2)
+        row_cap = limit_rows.number_input(
+            "Max rows kept per result set", min_value=1, max_value=1_000_000,
+            value=ROW_CAP, key="sql_row_cap",
+        )
+        timeout_s = limit_time.number_input(
+            "Timeout per SELECT (seconds, 0 = none)", min_value=0, max_value=86_400,
+            value=TIMEOUT_S, key="sql_timeout",
+        )
+
+        # ── profile: EXPLAIN plans + index suggestions, nothing is changed ──
+        with st.expander("Profile (EXPLAIN) and index advice"):
+            analyze = st.checkbox(
+                "Also run EXPLAIN ANALYZE on SELECTs (executes them, bounded by the timeout)",
+                key="sql_profile_analyze",
+            )
+            if st.button("🔍 Profile", key="profile_sql"):
+                try:
+                    with st.spinner("Explaining…"):
+                        st.session_state.sql_profile = (db, profile_script(
+                            get_connection, db, sql_code,
+                            analyze=analyze, timeout_s=timeout_s,
+                        ))
+                except Exception as e:
+                    st.error(f"Profiling failed: {e}")
+            profiled = st.session_state.get("sql_profile")
+            if profiled and profiled[0] == db:
+                for prof in profiled[1]:
+                    render_profile(prof)
+
+        # ── fan-out: same script on several databases ──────────────────────
+        if st.toggle("Fan out to several databases", key="sql_fanout_mode"):
+            targets = st.multiselect(
+                "Databases", dbs, default=[db], key="sql_fanout_dbs",
             )
+            par_col, err_col = st.columns(2)
+            workers = par_col.number_input(
+                "Databases in parallel", min_value=1, max_value=16,
+                value=FANOUT_WORKERS, key="sql_fanout_workers",
+            )
+            on_error = err_col.radio(
+                "On error", ["Stop starting new databases", "Continue with the rest"],
+                key="sql_fanout_on_error",
+            )
+            fan = st.session_state.get("sql_fanout")
+            if st.button(f"Execute on {len(targets)} database(s)", key="exec_fanout",
+                         disabled=not targets):
+                if fan is not None and not fan.done:
+                    st.warning("A fan-out is still running – cancel it or wait for it.")
+                else:
+                    try:
+                        fan = FanOut(
+                            get_connection, targets, sql_code,
+                            workers=int(workers),
+                            stop_on_error=on_error.startswith("Stop"),
+                            row_cap=int(row_cap), timeout_s=timeout_s,
+                        ).start()
+                        st.session_state.sql_fanout = fan
+                    except jobs.JobQueueFull as e:
+                        st.error(f"Fan-out not queued: {e}")
+            if fan is not None:
+                if not fan.done and st.button("⏹ Cancel", key="cancel_fanout"):
+                    fan.cancel(get_connection)
+                _render_fanout(fan, simple_rerun)
+            return
 
-            try:
-                conn = get_connection(db); cur = conn.cursor()
-                any_write = False
-
-                for idx, result in enumerate(
-                        cur.execute(cleaned_sql, multi=True), start=1):
-                    if result.with_rows:
-                        st.markdown(f"##### Result set {idx}")
-                        st.dataframe(
-                            pd.DataFrame(
-                                result.fetchall(),
-                                columns=[d[0] for d in result.description],
-                            ),
-                            use_container_width=True,
-                        )
-                    else:
-                        any_write = True
-                        st.success(
-                            f"Statement {idx}: {result.rowcount} row(s) affected."
-                        )
+        run = st.session_state.get("sql_run")
+        if st.button("Execute", key="exec_sql"):
+            if run is not None and not run.done:
+                st.warning("A script is still running – cancel it or wait for it.")
+            else:
+                try:
+                    run = ScriptRun(
+                        get_connection, db, sql_code,
+                        row_cap=int(row_cap), timeout_s=timeout_s,
+                    ).start()
+                    st.session_state.sql_run = run
+                except jobs.JobQueueFull as e:
+                    st.error(f"Script not queued: {e}")
+
+        if run is not None:
+            if not run.done and st.button("⏹ Cancel", key="cancel_sql"):
+                run.cancel(get_connection)
+            _render_run(run, simple_rerun)
 
-                if any_write:
-                    conn.commit()
-                    st.success("Changes committed.")
-                    simple_rerun()
 
-            except Exception as e:
-                conn.rollback()
-                st.error(f"Execution failed: {e}")
-            finally:
-                cur.close(); conn.close()
+# ─────────────────────────────────────────────────────────────────────────────
+# Spreadsheet saves
+# ─────────────────────────────────────────────────────────────────────────────
+def _has_edits(editor_key: str) -> bool:
+    state = st.session_state.get(editor_key) or {}
+    return any(state.get(k) for k in ("edited_rows", "added_rows", "deleted_rows"))
+
+def _render_conflicts(editor_key: str, conflict_key: str):
+    """Side-by-side view of edits that collide with someone else's."""
+    conflicts = st.session_state[conflict_key]
+    rows = len({c["pk"] for c in conflicts})
+    st.warning(f"{rows} row(s) you changed were also changed by someone else "
+               "since you loaded the table. Nothing has been saved yet.")
+    st.dataframe(conflicts, hide_index=True, use_container_width=True)
+
+    def resolve(mode):
+        st.session_state[f"{editor_key}_resolve"] = mode
+
+    def discard():
+        for key in (editor_key, conflict_key, f"{conflict_key}_acked", "sheet_snapshot"):
+            st.session_state.pop(key, None)
+
+    keep_col, skip_col, drop_col = st.columns(3)
+    keep_col.button("Overwrite theirs with mine", key=f"{conflict_key}_overwrite",
+                    on_click=resolve, args=("overwrite",))
+    skip_col.button("Save only the other rows", key=f"{conflict_key}_skip",
+                    on_click=resolve, args=("skip",))
+    drop_col.button("Discard my edits and reload", key=f"{conflict_key}_discard",
+                    on_click=discard)
+
+def _save_summary(ins_cnt, upd_cnt, del_cnt) -> str:
+    parts = []
+    if ins_cnt: parts.append(f"🟢 {ins_cnt} insert")
+    if upd_cnt: parts.append(f"🟡 {upd_cnt} update")
+    if del_cnt: parts.append(f"🔴 {del_cnt} delete")
+    return " | ".join(parts) or "Nothing"
+
+def _save_job(job, get_connection, db, tbl, chunk_size, pk_col, changes, extra_deletes,
+              snap=None, cols=(), acked=None):
+    """Background variant of Save Changes: one transaction, rolled back on error."""
+    conn = get_connection(db)
+    job.on_cancel(lambda: jobs.kill_query(get_connection, conn.connection_id))
+    try:
+        if snap is not None:
+            job.update(message="locking the touched rows…")
+            snap.lock_and_check(conn, tbl, cols, changes, extra_deletes, acked)
+        job.update(message="writing…")
+        counts = BatchWriter(conn, tbl, chunk_size).apply(
+            pk_col, changes, extra_deletes=extra_deletes,
+        )
+        if job.cancelled:
+            raise InterruptedError("Cancelled – nothing was saved.")
+        conn.commit()
+        resultcache.invalidate(db)
+        return list(counts)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SQL-editor output: poll the background run, render finished statements
+# ─────────────────────────────────────────────────────────────────────────────
+def _render_result(res):
+    if res.columns is None:
+        st.success(f"Statement {res.idx}: {res.rowcount} row(s) affected.")
+        return
+    st.markdown(f"##### Result set {res.idx}")
+    st.dataframe(
+        pd.DataFrame(res.rows, columns=res.columns),
+        use_container_width=True,
+    )
+    if res.truncated:
+        st.caption(f"Showing the first {len(res.rows):,} of {res.total:,} rows.")
+    if res.cached:
+        st.caption("Served from the result cache (tables unchanged since it was stored).")
+
+
+def _render_run(run, simple_rerun):
+    st.caption(f"Last run against `{run.db}`")
+    status = st.empty()
+    shown = 0
+    while True:
+        finished = run.done          # read first so the final results are drawn
+        for res in run.results[shown:]:
+            if not res.done:
+                break
+            _render_result(res)
+            shown += 1
+        if finished:
+            break
+        current = run.results[shown] if shown < len(run.results) else None
+        status.caption(
+            f"⏳ Running statement {shown + 1}…"
+            + (f" {current.total:,} rows fetched" if current and current.columns else "")
+        )
+        time.sleep(0.25)         # every st call here is a point where Cancel can land
+    status.empty()
+
+    if run.error:
+        st.error(f"Execution failed: {run.error}")
+    elif run.committed:
+        st.success("Changes committed.")
+        if st.session_state.get("sql_run_reloaded") is not run:
+            st.session_state.sql_run_reloaded = run
+            simple_rerun()
+
+
+def _render_fanout(fan, simple_rerun):
+    st.caption(f"Last fan-out: {len(fan.runs)} database(s)")
+    status, grid = st.empty(), st.empty()
+    while not fan.done:
+        summary = fan.summary()
+        finished = sum(1 for row in summary if row["status"] not in ("queued", "running"))
+        status.caption(f"⏳ {finished}/{len(summary)} databases finished…")
+        grid.dataframe(summary, hide_index=True, use_container_width=True)
+        time.sleep(0.5)          # every st call here is a point where Cancel can land
+    status.empty()
+
+    summary = fan.summary()
+    grid.dataframe(summary, hide_index=True, use_container_width=True)
+
+    # result sets with the same statement / columns are stacked into one table
+    groups: dict[tuple, list] = {}
+    for db, run in fan.runs.items():
+        for res in run.results:
+            if res.done and res.columns is not None:
+                groups.setdefault((res.idx, tuple(res.columns)), []).append((db, res))
+    for (idx, columns), parts in sorted(groups.items(), key=lambda g: g[0][0]):
+        st.markdown(f"##### Result set {idx} ({len(parts)} database(s))")
+        st.dataframe(
+            pd.DataFrame(
+                [(db, *row) for db, res in parts for row in res.rows],
+                columns=["_database", *columns],
+            ),
+            use_container_width=True,
+        )
+        if any(res.truncated for _, res in parts):
+            st.caption("Some databases returned more rows than the per-result cap.")
+
+    failed = [row for row in summary if row["status"] == "failed"]
+    if failed:
+        st.error(f"{len(failed)} database(s) failed – see the error column above.")
+    if fan.skipped:
+        st.warning(f"Stopped after the first error: {len(fan.skipped)} database(s) not run.")
+    if fan.not_started:
+        st.warning(f"Cancelled: {len(fan.not_started)} database(s) not run.")
+    if any(run.committed for run in fan.runs.values()):
+        st.success("Changes committed on "
+                   f"{sum(run.committed for run in fan.runs.values())} database(s).")
+        if st.session_state.get("sql_fanout_reloaded") is not fan:
+            st.session_state.sql_fanout_reloaded = fan
+            simple_rerun()
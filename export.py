@@ -0,0 +1,217 @@
+# export.py
+"""
+export.py  –  Stream a table or query result to CSV / gzip-CSV / Parquet.
+
+Public API (used by app.py and edit.py):
+    FORMATS                                                   → {label: (ext, mime)}
+    export_query(get_connection, db, sql, fmt, params=(), …)  → (path, rows)
+    render_export_controls(get_connection, db, sql, name, key)
+
+Rows are pulled through an unbuffered cursor with `fetchmany`, and each
+batch is written to a temporary file before the next one is fetched, so
+the app never holds more than `FETCH_SIZE` rows of the result at once.
+Parquet needs pyarrow (a Streamlit dependency); it is hidden otherwise,
+and only imported once a Parquet export actually runs.
+
+Files go to `EXPORT_DIR`.  A session that is closed never says so, so
+each new export first deletes the files older than `EXPORT_MAX_AGE_S`
+(a download still on screen then simply disappears).
+"""
+
+from __future__ import annotations
+import csv
+import datetime as dt
+import gzip
+import importlib.util
+import os
+import tempfile
+import time
+
+import streamlit as st
+
+from sqlscript import is_read_only
+
+pa = pq = None   # pyarrow, imported by the first _ParquetSink
+
+FETCH_SIZE = 10_000
+EXPORT_MAX_AGE_S = 3_600     # finished export files older than this are deleted
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "impactdata_exports")
+
+FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+}
+if importlib.util.find_spec("pyarrow") is not None:
+    FORMATS["Parquet"] = (".parquet", "application/vnd.apache.parquet")
+
+
+# ── row sinks ────────────────────────────────────────────────────────────────
+class _CsvSink:
+    def __init__(self, path: str, columns, compress: bool):
+        opener = gzip.open if compress else open
+        self.fh = opener(path, "wt", encoding="utf-8", newline="")
+        self.out = csv.writer(self.fh)
+        self.out.writerow(columns)
+
+    def write(self, rows):
+        self.out.writerows(rows)
+
+    def close(self):
+        self.fh.close()
+
+
+class _ParquetSink:
+    """One Parquet row group per fetched batch; schema fixed by the first batch."""
+
+    def __init__(self, path: str, columns):
+        global pa, pq
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.path, self.columns = path, columns
+        self.schema, self.writer = None, None
+
+    @staticmethod
+    def _arrow_type(values):
+        sample = next((v for v in values if v is not None), None)
+        if isinstance(sample, bool):
+            return pa.bool_()
+        if isinstance(sample, int):
+            return pa.int64()
+        if isinstance(sample, float):
+            return pa.float64()
+        if isinstance(sample, dt.datetime):
+            return pa.timestamp("us")
+        if isinstance(sample, dt.date):
+            return pa.date32()
+        if isinstance(sample, dt.timedelta):
+            return pa.duration("us")
+        if isinstance(sample, (bytes, bytearray)):
+            return pa.binary()
+        return pa.string()   # str, Decimal (kept exact as text), JSON, sets, …
+
+    def write(self, rows):
+        cols = list(zip(*rows))
+        if self.schema is None:
+            self.schema = pa.schema(
+                [(name, self._arrow_type(vals)) for name, vals in zip(self.columns, cols)]
+            )
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        arrays = []
+        for vals, f in zip(cols, self.schema):
+            if pa.types.is_string(f.type):
+                vals = [None if v is None else str(v) for v in vals]
+            arrays.append(pa.array(vals, type=f.type))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        if self.writer is None:   # empty result → header-only file
+            self.writer = pq.ParquetWriter(
+                self.path, pa.schema([(c, pa.string()) for c in self.columns])
+            )
+        self.writer.close()
+
+
+def _sink(fmt: str, path: str, columns):
+    if fmt == "Parquet":
+        return _ParquetSink(path, columns)
+    return _CsvSink(path, columns, compress=fmt == "CSV (gzip)")
+
+
+# ── export ───────────────────────────────────────────────────────────────────
+def _sweep(max_age: float = EXPORT_MAX_AGE_S):
+    """Create EXPORT_DIR if needed and delete the exports older than `max_age`."""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    cutoff = time.time() - max_age
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass   # another session got there first
+
+
+def export_query(
+    get_connection,
+    db: str,
+    sql: str,
+    fmt: str,
+    params=(),
+    fetch_size: int = FETCH_SIZE,
+    on_progress=None,
+) -> tuple[str, int]:
+    """Run `sql` and stream its rows into a temp file; returns (path, rows).
+
+    Only read-only queries (SELECT / TABLE / VALUES, CTEs allowed) are run.
+    """
+    if not is_read_only(sql):
+        raise ValueError("Only a read-only SELECT / TABLE statement can be exported.")
+    ext, _ = FORMATS[fmt]
+    _sweep()
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=ext, dir=EXPORT_DIR)
+    os.close(fd)
+    rows_out = 0
+    conn = cur = None
+    try:
+        conn = get_connection(db)
+        cur = conn.cursor(buffered=False)      # rows stay on the server until fetched
+        cur.execute(sql, params)
+        if not cur.with_rows:
+            raise ValueError("Statement returns no rows to export.")
+        sink = _sink(fmt, path, [d[0] for d in cur.description])
+        try:
+            while batch := cur.fetchmany(fetch_size):
+                sink.write(batch)
+                rows_out += len(batch)
+                if on_progress:
+                    on_progress(rows_out)
+        finally:
+            sink.close()
+    except Exception:
+        os.remove(path)
+        raise
+    finally:
+        try:
+            if cur is not None:
+                cur.close()      # may complain about unread rows after a failure …
+        finally:
+            if conn is not None:
+                conn.close()     # … the pool then discards the connection
+    return path, rows_out
+
+
+# ── Streamlit widget ─────────────────────────────────────────────────────────
+def render_export_controls(get_connection, db: str, sql: str, name: str, key: str):
+    """Format picker + “Prepare export” + download button for one query."""
+    fmt = st.selectbox("Export format", list(FORMATS), key=f"{key}_fmt")
+    state_key = f"{key}_file"
+
+    if st.button("Prepare export", key=f"{key}_go"):
+        old = st.session_state.pop(state_key, None)
+        if old and os.path.exists(old[0]):
+            os.remove(old[0])
+        status = st.empty()
+        try:
+            path, rows = export_query(
+                get_connection, db, sql, fmt,
+                on_progress=lambda n: status.caption(f"{n:,} rows written…"),
+            )
+        except Exception as e:
+            st.error(f"Export failed: {e}")
+            return
+        status.empty()
+        st.session_state[state_key] = (path, rows, fmt)
+
+    if state_key in st.session_state:
+        path, rows, fmt = st.session_state[state_key]
+        if not os.path.exists(path):
+            st.session_state.pop(state_key); return
+        ext, mime = FORMATS[fmt]
+        with open(path, "rb") as fh:
+            st.download_button(
+                f"⬇️ Download {rows:,} rows ({os.path.getsize(path) / 1e6:.1f} MB)",
+                fh,
+                file_name=f"{name}{ext}",
+                mime=mime,
+                key=f"{key}_dl",
+            )
@@ -0,0 +1,235 @@
+# filters.py
+"""
+filters.py  –  Server-side filter / sort builder.
+
+Public API (used by app.py and edit.py):
+    FilterSpec(predicates, order, limit)
+        .where()        → ("cond AND …", [params])   ("" when unfiltered)
+        .order_sql()    → "ORDER BY …"               ("" when unsorted)
+        .select(tbl, extra="") → ("SELECT *[, extra] FROM … WHERE … ORDER BY … LIMIT %s", params)
+    index_report(spec, indexes)            → [{condition, index, note}, …]
+    render_filter_builder(columns, indexes, key, with_limit=True) → FilterSpec
+
+The builder compiles to a parameterised WHERE / ORDER BY / LIMIT that
+MySQL evaluates, so only matching rows leave the server.  Column names
+are checked against the table's columns before they are quoted; values
+always travel as parameters.
+
+`index_report` looks at the table's indexes (information_schema.STATISTICS,
+the same data as SHOW INDEX) the way the optimiser picks a range: an
+index serves the equality predicates on its leading columns plus one
+range predicate right after them, and it serves ORDER BY when the sort
+columns follow that equality prefix in one direction.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+OPERATORS = [
+    "=", "≠", "<", "≤", ">", "≥", "between", "in",
+    "starts with", "contains", "is null", "is not null",
+]
+_NO_VALUE = ("is null", "is not null")
+_EQUALITY = ("=", "in", "is null")
+_RANGE = ("<", "≤", ">", "≥", "between", "starts with", "is not null")
+_SQL_OP = {"=": "=", "≠": "<>", "<": "<", "≤": "<=", ">": ">", "≥": ">="}
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@dataclass
+class Predicate:
+    column: str
+    op: str
+    value: str | None = None
+    value2: str | None = None          # upper bound of "between"
+
+    def label(self) -> str:
+        if self.op in _NO_VALUE:
+            return f"`{self.column}` {self.op}"
+        if self.op == "between":
+            return f"`{self.column}` between {self.value!r} and {self.value2!r}"
+        return f"`{self.column}` {self.op} {self.value!r}"
+
+    def compile(self) -> tuple[str, list]:
+        col = f"`{self.column}`"
+        v = "" if self.value is None else str(self.value)
+        match self.op:
+            case "is null":
+                return f"{col} IS NULL", []
+            case "is not null":
+                return f"{col} IS NOT NULL", []
+            case "between":
+                return f"{col} BETWEEN %s AND %s", [v, "" if self.value2 is None else str(self.value2)]
+            case "in":
+                items = [x.strip() for x in v.split(",")]
+                return f"{col} IN ({', '.join('%s' for _ in items)})", items
+            case "starts with":
+                return f"{col} LIKE %s", [_like_escape(v) + "%"]
+            case "contains":
+                return f"{col} LIKE %s", ["%" + _like_escape(v) + "%"]
+            case _:
+                return f"{col} {_SQL_OP[self.op]} %s", [v]
+
+
+@dataclass
+class FilterSpec:
+    predicates: list[Predicate] = field(default_factory=list)
+    order: list[tuple[str, bool]] = field(default_factory=list)   # (column, descending)
+    limit: int | None = None
+
+    def __bool__(self):
+        return bool(self.predicates or self.order or self.limit)
+
+    def validate(self, columns):
+        known = set(columns)
+        bad = {p.column for p in self.predicates} | {c for c, _ in self.order}
+        bad -= known
+        if bad:
+            raise ValueError(f"Unknown column(s): {', '.join(sorted(bad))}")
+        bad_ops = {p.op for p in self.predicates} - set(OPERATORS)
+        if bad_ops:
+            raise ValueError(f"Unknown operator(s): {', '.join(sorted(bad_ops))}")
+
+    def where(self) -> tuple[str, list]:
+        parts, params = [], []
+        for p in self.predicates:
+            sql, args = p.compile()
+            parts.append(sql)
+            params += args
+        return " AND ".join(parts), params
+
+    def order_sql(self) -> str:
+        if not self.order:
+            return ""
+        return "ORDER BY " + ", ".join(
+            f"`{c}` {'DESC' if desc else 'ASC'}" for c, desc in self.order
+        )
+
+    def select(self, tbl: str, extra: str = "") -> tuple[str, list]:
+        where, params = self.where()
+        sql = f"SELECT *{', ' + extra if extra else ''} FROM `{tbl}`"
+        if where:
+            sql += f" WHERE {where}"
+        if self.order:
+            sql += " " + self.order_sql()
+        if self.limit:
+            sql += " LIMIT %s"
+            params = params + [int(self.limit)]
+        return sql, params
+
+    def signature(self) -> tuple:
+        """Hashable identity – changes whenever the compiled query does."""
+        return (
+            tuple((p.column, p.op, p.value, p.value2) for p in self.predicates),
+            tuple(self.order), self.limit,
+        )
+
+
+# ── index usability ──────────────────────────────────────────────────────────
+def _served(spec: FilterSpec, cols: list[str]) -> tuple[list[str], int]:
+    """(columns of `cols` a range scan can bound, length of its equality prefix)."""
+    eq = {p.column for p in spec.predicates if p.op in _EQUALITY}
+    rng = {p.column for p in spec.predicates if p.op in _RANGE}
+    used = []
+    for c in cols:
+        if c in eq:
+            used.append(c)
+            continue
+        n_eq = len(used)
+        if c in rng:
+            used.append(c)
+        return used, n_eq
+    return used, len(used)
+
+
+def index_report(spec: FilterSpec, indexes) -> list[dict]:
+    """Which index (if any) can serve each predicate and the ORDER BY."""
+    served = [(name, cols, *_served(spec, cols)) for name, cols, *_ in indexes]
+    out = []
+    for p in spec.predicates:
+        best = max(
+            (s for s in served if p.column in s[2]),
+            key=lambda s: len(s[2]), default=None,
+        )
+        if best is not None:
+            note = "index range" if p.op not in ("=", "is null") else "index lookup"
+        elif p.op == "contains":
+            note = "leading % wildcard – never uses an index"
+        elif p.op == "≠":
+            note = "≠ cannot bound an index range"
+        elif any(cols and cols[0] == p.column for _, cols, *_ in indexes):
+            note = "indexed, but an earlier predicate already takes the range"
+        else:
+            note = "no index starts with this column – rows are scanned"
+        out.append({
+            "condition": p.label(),
+            "index": best[0] if best else "—",
+            "note": note,
+        })
+
+    if spec.order:
+        order_cols = [c for c, _ in spec.order]
+        one_way = len({d for _, d in spec.order}) == 1
+        match = next(
+            (name for name, cols, _, n_eq in served
+             if one_way and cols[n_eq:n_eq + len(order_cols)] == order_cols),
+            None,
+        )
+        out.append({
+            "condition": "ORDER BY " + ", ".join(
+                f"`{c}`{' DESC' if d else ''}" for c, d in spec.order
+            ),
+            "index": match or "—",
+            "note": "read in index order" if match else "sorted after reading (filesort)",
+        })
+    return out
+
+
+# ── Streamlit widget ─────────────────────────────────────────────────────────
+def render_filter_builder(columns, indexes, key: str, with_limit: bool = True) -> FilterSpec:
+    """Conditions grid + sort + limit; returns the (validated) FilterSpec."""
+    import pandas as pd
+
+    st.caption("Conditions are combined with AND and evaluated by MySQL.")
+    grid = st.data_editor(
+        pd.DataFrame({"column": pd.Series(dtype=object), "op": pd.Series(dtype=object),
+                      "value": pd.Series(dtype=object), "value2": pd.Series(dtype=object)}),
+        num_rows="dynamic",
+        use_container_width=True,
+        key=f"{key}_grid",
+        column_config={
+            "column": st.column_config.SelectboxColumn("column", options=list(columns), required=True),
+            "op": st.column_config.SelectboxColumn("operator", options=OPERATORS, default="="),
+            "value": st.column_config.TextColumn("value", help="`in`: comma-separated list"),
+            "value2": st.column_config.TextColumn("and (between)"),
+        },
+    )
+    predicates = [
+        Predicate(r["column"], r["op"] or "=", r["value"], r["value2"])
+        for r in grid.to_dict("records")
+        if isinstance(r["column"], str) and r["column"]
+    ]
+
+    sort_col, dir_col, *limit_col = st.columns([3, 1, 2] if with_limit else [3, 1])
+    order_by = sort_col.multiselect("Sort by", list(columns), key=f"{key}_order")
+    desc = dir_col.checkbox("Descending", key=f"{key}_desc")
+    limit = None
+    if with_limit:
+        limit = int(limit_col[0].number_input(
+            "Row limit (0 = none)", min_value=0, max_value=10_000_000,
+            value=0, step=100, key=f"{key}_limit",
+        )) or None
+
+    spec = FilterSpec(predicates, [(c, desc) for c in order_by], limit)
+    spec.validate(columns)
+
+    if spec.predicates or spec.order:
+        st.dataframe(index_report(spec, indexes), hide_index=True, use_container_width=True)
+        where, params = spec.where()
+        st.caption(f"WHERE {where or 'TRUE'} {spec.order_sql()}  ·  params {params}")
+    return spec
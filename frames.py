@@ -0,0 +1,290 @@
+# frames.py
+"""
+frames.py  –  Compact, type-aware DataFrames from MySQL results.
+
+Public API (used by app.py, edit.py and resultcache.py):
+    kinds_from_description(description)  → [kind, …]  (cursor.description)
+    kinds_from_describe(columns)         → {col: kind}  (catalog.columns rows)
+    frame_from_cursor(cursor, overrides=None, read_only=True,
+                      batch_rows=FETCH_BATCH, raw=False) → DataFrame
+    frame_from_rows(columns, rows, kinds, read_only=True) → DataFrame
+    frame_bytes(df)                      → int  (deep memory usage)
+
+`pd.DataFrame(cur.fetchall(), columns=cols)` keeps every value as a
+Python object and holds the whole list of tuples next to the frame.
+Here the column types come from MySQL, and every `fetchmany` batch is
+turned into typed columns before the next one is fetched; the batches'
+frames are concatenated at the end.  So the Python objects of only one
+batch are alive at a time, next to the compact arrays built so far:
+
+    TINYINT … BIGINT     → int8 … int64 (uint* when UNSIGNED); the
+                           nullable Int*/UInt* dtypes when NULLs occur
+    FLOAT / DOUBLE       → float32 / float64
+    DECIMAL(p ≤ 15)      → float64   (only when DESCRIBE gives p; else objects)
+    DATE / DATETIME / TIMESTAMP → datetime64
+    CHAR / VARCHAR / TEXT / ENUM → Arrow-backed strings
+    anything else        → objects (TIME, BIT, SET, JSON, BLOB, spatial, …)
+
+With `read_only=True` (previews, cached results) integers are further
+downcast to the range actually present and low-cardinality text becomes
+a categorical – both once the whole column is in.  The spreadsheet editor passes `read_only=False`: a
+categorical would restrict edits to the existing values and a range
+downcast would reject values the column itself accepts.
+
+`raw=True` takes rows of a raw cursor (`pool.read_cursor`): undecoded
+column bytes.  Numbers and dates are then parsed a whole column at a
+time by numpy / pandas, and low-cardinality text is decoded once per
+distinct value; only the remaining "object" columns go through the
+connector's per-value converter.
+"""
+
+from __future__ import annotations
+import importlib.util
+import re
+
+import numpy as np
+import pandas as pd
+from mysql.connector.constants import FieldFlag, FieldType
+from mysql.connector.conversion import MySQLConverter
+
+FETCH_BATCH = 5_000            # rows per fetchmany()
+CATEGORY_MIN_ROWS = 64         # below this a categorical saves nothing
+CATEGORY_MAX_RATIO = 0.5       # distinct / rows at most, to become categorical
+
+STRING_DTYPE = (
+    "string[pyarrow]" if importlib.util.find_spec("pyarrow") is not None else "string"
+)
+
+_INT_TYPES = {
+    FieldType.TINY: "int8", FieldType.SHORT: "int16", FieldType.YEAR: "int16",
+    FieldType.INT24: "int32", FieldType.LONG: "int32", FieldType.LONGLONG: "int64",
+}
+_NULLABLE = {
+    "int8": "Int8", "int16": "Int16", "int32": "Int32", "int64": "Int64",
+    "uint8": "UInt8", "uint16": "UInt16", "uint32": "UInt32", "uint64": "UInt64",
+}
+_TEXT_TYPES = {
+    FieldType.VARCHAR, FieldType.VAR_STRING, FieldType.STRING, FieldType.ENUM,
+    FieldType.TINY_BLOB, FieldType.MEDIUM_BLOB, FieldType.BLOB, FieldType.LONG_BLOB,
+}
+_DATE_TYPES = {FieldType.DATE, FieldType.NEWDATE, FieldType.DATETIME, FieldType.TIMESTAMP}
+
+_BINARY_CHARSET = 63           # charset id of BINARY / VARBINARY / BLOB columns
+
+_DESCRIBE_RE = re.compile(r"^\s*(\w+)(?:\((\d+)(?:,\s*\d+)?\))?(.*)$")
+_DESCRIBE_INTS = {
+    "tinyint": "int8", "smallint": "int16", "year": "int16", "mediumint": "int32",
+    "int": "int32", "integer": "int32", "bigint": "int64",
+}
+
+
+# ── column kinds ─────────────────────────────────────────────────────────────
+def kinds_from_description(description) -> list[str]:
+    """One kind per result column, from the cursor's type code and flags."""
+    out = []
+    for d in description:
+        type_code = d[1]
+        flags = d[7] if len(d) > 7 and d[7] else 0
+        if type_code in _INT_TYPES:
+            kind = _INT_TYPES[type_code]
+            out.append("u" + kind if flags & FieldFlag.UNSIGNED else kind)
+        elif type_code == FieldType.FLOAT:
+            out.append("float32")
+        elif type_code == FieldType.DOUBLE:
+            out.append("float64")
+        elif type_code in _DATE_TYPES:
+            out.append("datetime")
+        elif type_code in _TEXT_TYPES:
+            out.append("text")          # binary values are caught per column
+        else:
+            out.append("object")        # DECIMAL precision is unknown here
+    return out
+
+
+def kinds_from_describe(columns) -> dict[str, str]:
+    """{column: kind} from `(Field, Type, …)` rows of DESCRIBE / catalog.columns."""
+    out = {}
+    for field, sql_type, *_ in columns:
+        m = _DESCRIBE_RE.match(str(sql_type).lower())
+        base, size, rest = (m.group(1), m.group(2), m.group(3)) if m else ("", None, "")
+        if base in _DESCRIBE_INTS:
+            kind = _DESCRIBE_INTS[base]
+            out[field] = "u" + kind if "unsigned" in rest else kind
+        elif base == "float":
+            out[field] = "float32"
+        elif base in ("double", "real"):
+            out[field] = "float64"
+        elif base in ("decimal", "numeric"):
+            out[field] = "float64" if size and int(size) <= 15 else "object"
+        elif base in ("date", "datetime", "timestamp"):
+            out[field] = "datetime"
+        elif base in ("char", "varchar", "tinytext", "text", "mediumtext", "longtext", "enum"):
+            out[field] = "text"
+        else:
+            out[field] = "object"
+    return out
+
+
+# ── column builders ──────────────────────────────────────────────────────────
+def _smallest_int(lo, hi, signed: bool) -> str:
+    for bits in (8, 16, 32, 64):
+        dtype = f"int{bits}" if signed else f"uint{bits}"
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return "int64" if signed else "uint64"
+
+
+def _int_column(values: list, kind: str, read_only: bool):
+    try:
+        arr = pd.array(values, dtype=_NULLABLE[kind])
+    except (OverflowError, TypeError, ValueError):
+        return pd.array(values, dtype=object)     # out of the declared range
+    if read_only and len(arr) and not arr.isna().all():
+        kind = _smallest_int(arr.min(), arr.max(), signed=not kind.startswith("u"))
+        arr = arr.astype(_NULLABLE[kind])
+    return arr if arr.isna().any() else arr.to_numpy(dtype=kind)
+
+
+def _text_column(values: list, read_only: bool):
+    sample = next((v for v in values if v is not None), None)
+    if sample is not None and not isinstance(sample, str):
+        return pd.array(values, dtype=object)     # binary collation / BLOB → bytes
+    if read_only and len(values) >= CATEGORY_MIN_ROWS:
+        cat = pd.Categorical(values)
+        if len(cat.categories) <= len(values) * CATEGORY_MAX_RATIO:
+            return cat
+    return pd.array(values, dtype=STRING_DTYPE)
+
+
+def _datetime_column(values: list):
+    try:
+        return pd.to_datetime(pd.Series(values, dtype=object), errors="raise").array
+    except (ValueError, TypeError, OverflowError, pd.errors.OutOfBoundsDatetime):
+        return pd.array(values, dtype=object)     # e.g. year 9999 or 0001
+
+
+def _column(values: list, kind: str, read_only: bool):
+    if kind in _NULLABLE:
+        return _int_column(values, kind, read_only)
+    if kind in ("float32", "float64"):
+        try:
+            return np.array([np.nan if v is None else v for v in values], dtype=kind)
+        except (TypeError, ValueError):
+            return pd.array(values, dtype=object)
+    if kind == "datetime":
+        return _datetime_column(values)
+    if kind == "text":
+        return _text_column(values, read_only)
+    return pd.array(values, dtype=object)
+
+
+# ── raw (undecoded) columns ──────────────────────────────────────────────────
+def _bytes_array(values: list, fill: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """(fixed-width bytes array with NULLs as `fill`, NULL mask)."""
+    mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    return np.array([fill if v is None else bytes(v) for v in values], dtype="S"), mask
+
+
+def _raw_int_column(values: list, kind: str, read_only: bool):
+    data, mask = _bytes_array(values, b"0")
+    wide = np.uint64 if kind.startswith("u") else np.int64
+    arr = pd.arrays.IntegerArray(data.astype(wide), mask)
+    return _int_column(arr, kind, read_only)
+
+
+def _raw_text_column(values: list, read_only: bool):
+    if read_only and len(values) >= CATEGORY_MIN_ROWS:
+        cat = pd.Categorical([None if v is None else bytes(v) for v in values])
+        if len(cat.categories) <= len(values) * CATEGORY_MAX_RATIO:
+            return cat.rename_categories([c.decode("utf-8") for c in cat.categories])
+    return pd.array([None if v is None else v.decode("utf-8") for v in values],
+                    dtype=STRING_DTYPE)
+
+
+def _raw_column(values: list, kind: str, desc, read_only: bool, converter):
+    """Column of raw bytes → the same column `_column` builds from Python values."""
+    binary = len(desc) > 8 and desc[8] == _BINARY_CHARSET
+    try:
+        if kind in _NULLABLE and desc[1] in _INT_TYPES:
+            return _raw_int_column(values, kind, read_only)
+        if kind in ("float32", "float64"):
+            data, _ = _bytes_array(values, b"nan")
+            return data.astype(kind)
+        if kind == "datetime" and desc[1] in _DATE_TYPES:
+            data, _ = _bytes_array(values, b"")
+            return pd.to_datetime(data.astype("U"), format="ISO8601", errors="raise").array
+        if kind == "text" and not binary and desc[1] in _TEXT_TYPES:
+            return _raw_text_column(values, read_only)
+    except (ValueError, TypeError, OverflowError, UnicodeDecodeError,
+            pd.errors.OutOfBoundsDatetime):
+        pass                                      # zero dates, odd values … → per value
+    return _column([converter.to_python(desc, v) for v in values], kind, read_only)
+
+
+# ── frames ───────────────────────────────────────────────────────────────────
+def _frame(columns: list[str], values: list[list], kinds, read_only: bool,
+           raw_description=None) -> pd.DataFrame:
+    data = {}
+    converter = MySQLConverter("utf8mb4") if raw_description else None
+    for i, (name, kind) in enumerate(zip(columns, kinds)):
+        if raw_description:
+            data[name] = _raw_column(values[i], kind, raw_description[i], read_only, converter)
+        else:
+            data[name] = _column(values[i], kind, read_only)
+        values[i] = None                          # free the Python list as we go
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+def _compact(df: pd.DataFrame, kinds) -> pd.DataFrame:
+    """The read-only narrowing that needs whole columns: int ranges, categoricals."""
+    for i, kind in enumerate(kinds):
+        col = df.iloc[:, i]
+        if kind in _NULLABLE and col.dtype != object:
+            df.isetitem(i, _int_column(col.array, kind, read_only=True))
+        elif (kind == "text" and isinstance(col.dtype, pd.StringDtype)
+              and len(col) >= CATEGORY_MIN_ROWS):
+            cat = pd.Categorical(col.array)
+            if len(cat.categories) <= len(col) * CATEGORY_MAX_RATIO:
+                df.isetitem(i, cat)
+    return df
+
+
+def frame_from_cursor(
+    cursor, overrides: dict | None = None, read_only: bool = True,
+    batch_rows: int = FETCH_BATCH, raw: bool = False,
+) -> pd.DataFrame:
+    """Fetch the rest of `cursor`'s result into a compact frame.
+
+    `overrides` ({col: kind}, e.g. from `kinds_from_describe`) wins over
+    the cursor's own types – it is how DECIMAL precision gets in.  Pass
+    `raw=True` when `cursor` is a raw cursor.
+    """
+    columns = [d[0] for d in cursor.description]
+    kinds = kinds_from_description(cursor.description)
+    if overrides:
+        kinds = [overrides.get(c, k) for c, k in zip(columns, kinds)]
+    raw_description = list(cursor.description) if raw else None
+
+    parts = []
+    while batch := cursor.fetchmany(batch_rows):
+        values = [list(v) for v in zip(*batch)]
+        del batch
+        parts.append(_frame(columns, values, kinds, False, raw_description))
+    if not parts:
+        return _frame(columns, [[] for _ in columns], kinds, read_only, raw_description)
+    df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True, copy=False)
+    del parts
+    return _compact(df, kinds) if read_only else df
+
+
+def frame_from_rows(columns, rows, kinds, read_only: bool = True) -> pd.DataFrame:
+    """Same, for rows already fetched; `kinds` is a list or {col: kind}."""
+    if isinstance(kinds, dict):
+        kinds = [kinds.get(c, "object") for c in columns]
+    values = [list(v) for v in zip(*rows)] if rows else [[] for _ in columns]
+    return _frame(list(columns), values, kinds, read_only)
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
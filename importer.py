@@ -0,0 +1,356 @@
+# importer.py
+"""
+importer.py  –  Stream a CSV file into a table, chunk by chunk.
+
+Public API (used by app.py):
+    render_import_page(get_connection, simple_rerun)
+
+Helpers (usable without Streamlit):
+    iter_csv_chunks(binary_file, chunk_rows, delimiter)  → (rows, bytes_read)…
+    infer_sql_type(values)                               → "INT" | "DOUBLE" | …
+    create_table_sql(tbl, columns, types, pk=None, extra_defs=()) → CREATE TABLE …
+    coerce(value, col_type)                              → DB-ready value
+    load_csv(conn, tbl, binary_file, mapping, types, …)  → ImportReport
+    server_file(name)                                    → real path inside IMPORT_DIR
+
+Only one chunk of rows is held in memory at a time; every chunk is sent
+as multi-row INSERTs through `writer.BatchWriter` and committed on its
+own, so a bad row costs one chunk (reported with its row numbers), not
+the whole import.  A new table whose CSV has an EOV coordinate pair can
+be created with a stored POINT column and SPATIAL INDEX (spatial.py).
+"""
+
+from __future__ import annotations
+import csv
+import io
+import os
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+import streamlit as st
+
+import catalog
+import resultcache
+import spatial
+from writer import BatchWriter
+
+CHUNK_ROWS = 5_000          # CSV rows per INSERT batch / commit
+SAMPLE_ROWS = 1_000         # rows used to infer types for a new table
+SKIP = "— skip —"
+# files already on the app server are read from this directory (and below)
+# only; unset, the page offers uploads alone
+IMPORT_DIR = os.environ.get("IMPACTDATA_IMPORT_DIR")
+
+_INT_RE = re.compile(r"^[+-]?(0|[1-9]\d*)$")
+_LEADING_ZERO_RE = re.compile(r"^[+-]?0\d")    # codes like "007" / "01234" stay text
+_NUM_RE = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+_INT_TYPES = {"tinyint", "smallint", "mediumint", "int", "integer", "bigint", "year"}
+_FLOAT_TYPES = {"float", "double", "real"}
+_DECIMAL_TYPES = {"decimal", "numeric"}
+
+
+# ── CSV streaming ────────────────────────────────────────────────────────────
+def iter_csv_chunks(binary_file, chunk_rows: int = CHUNK_ROWS, delimiter: str = ","):
+    """Yield (header, None) once, then (rows, bytes_read) per chunk."""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text, delimiter=delimiter)
+        yield next(reader), None
+        while rows := list(islice(reader, chunk_rows)):
+            yield rows, binary_file.tell()
+    finally:
+        text.detach()   # leave the caller's file open
+
+
+def read_sample(binary_file, rows: int = SAMPLE_ROWS, delimiter: str = ","):
+    """(header, first `rows` data rows); rewinds the file afterwards."""
+    chunks = iter_csv_chunks(binary_file, rows, delimiter)
+    header, _ = next(chunks)
+    sample, _ = next(chunks, ([], None))
+    chunks.close()
+    binary_file.seek(0)
+    return header, sample
+
+
+def server_file(name: str) -> str:
+    """Resolved path of `name` under IMPORT_DIR; ValueError if it is outside or no file.
+
+    Symlinks and `..` are resolved before the containment check.
+    """
+    if not IMPORT_DIR:
+        raise ValueError("Reading files on the app server is disabled (IMPACTDATA_IMPORT_DIR).")
+    root = os.path.realpath(IMPORT_DIR)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"`{name}` is outside {root}.")
+    if not os.path.isfile(path):
+        raise ValueError(f"`{name}` is not a file in {root}.")
+    return path
+
+
+# ── type inference / coercion ────────────────────────────────────────────────
+def infer_sql_type(values) -> str:
+    """Narrowest MySQL type that fits every non-empty sample value."""
+    vals = [v for v in values if v != ""]
+    if not vals:
+        return "VARCHAR(255)"
+    numeric = not any(_LEADING_ZERO_RE.match(v) for v in vals)   # else keep the zeros
+    if numeric and all(_INT_RE.match(v) for v in vals):
+        return "BIGINT" if any(abs(int(v)) > 2**31 - 1 for v in vals) else "INT"
+    if numeric and all(_NUM_RE.match(v) for v in vals):
+        return "DOUBLE"
+    longest = max(len(v) for v in vals)
+    if longest <= 127:
+        return f"VARCHAR({max(64, 2 * longest)})"   # head-room for unseen rows
+    return "TEXT"
+
+
+def _base_type(col_type: str) -> str:
+    return re.match(r"\s*(\w+)", col_type).group(1).lower()
+
+
+def coerce(value: str, col_type: str):
+    """CSV text → value for a column of `col_type` ("" is NULL unless textual)."""
+    base = _base_type(col_type)
+    if base in _INT_TYPES:
+        return int(value) if value != "" else None
+    if base in _FLOAT_TYPES:
+        return float(value) if value != "" else None
+    if base in _DECIMAL_TYPES:
+        if value == "":
+            return None
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            raise ValueError(f"invalid decimal {value!r}") from None
+    if value == "" and not ("char" in base or "text" in base):
+        return None   # dates, blobs, enums, … – let an empty cell be NULL
+    return value
+
+
+def create_table_sql(tbl: str, columns, types, pk: str | None = None, extra_defs=()) -> str:
+    defs = [f"`{c}` {t}{' NOT NULL' if c == pk else ''}" for c, t in zip(columns, types)]
+    if pk:
+        defs.append(f"PRIMARY KEY (`{pk}`)")
+    defs.extend(extra_defs)
+    return (
+        f"CREATE TABLE `{tbl}` (\n  " + ",\n  ".join(defs) + "\n) "
+        "DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+    )
+
+
+# ── loading ──────────────────────────────────────────────────────────────────
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    chunks: int = 0
+    errors: list = field(default_factory=list)   # [(first_row, last_row, message)]
+    stopped: bool = False
+
+
+def load_csv(
+    conn,
+    tbl: str,
+    binary_file,
+    mapping: dict[int, str],
+    types: dict[str, str],
+    *,
+    chunk_rows: int = CHUNK_ROWS,
+    delimiter: str = ",",
+    stop_on_error: bool = False,
+    on_progress=None,
+) -> ImportReport:
+    """Insert the CSV into `tbl`.
+
+    `mapping` is CSV column index → table column, `types` is table column →
+    column type (as in DESCRIBE).  `on_progress(bytes_read, report)` is
+    called after every chunk.
+    """
+    report = ImportReport()
+    writer = BatchWriter(conn, tbl, chunk_size=chunk_rows)
+    targets = list(mapping.items())
+    row_no = 1   # 1-based data row number (header excluded)
+
+    chunks = iter_csv_chunks(binary_file, chunk_rows, delimiter)
+    next(chunks)
+    for rows, bytes_read in chunks:
+        first, row_no = row_no, row_no + len(rows)
+        try:
+            batch = [
+                {col: coerce(row[i] if i < len(row) else "", types[col])
+                 for i, col in targets}
+                for row in rows
+            ]
+            report.inserted += writer.insert(batch)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            report.errors.append((first, row_no - 1, str(e)))
+            if stop_on_error:
+                report.stopped = True
+                break
+        report.chunks += 1
+        if on_progress:
+            on_progress(bytes_read, report)
+    chunks.close()
+    return report
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Page
+# ─────────────────────────────────────────────────────────────────────────────
+def render_import_page(get_connection, simple_rerun):
+    st.title("Import CSV")
+
+    dbs = catalog.databases(get_connection)
+    if not dbs:
+        st.info("No user-created databases."); return
+    db = st.selectbox("Database", dbs, key="imp_db")
+
+    # ── source: browser upload or a file already on the app server ──────────
+    upload = st.file_uploader("CSV file", type=["csv", "txt"])
+    server_path = IMPORT_DIR and st.text_input(
+        f"…or a CSV under `{IMPORT_DIR}` on the app server (streamed from disk)",
+        key="imp_path",
+    )
+    delimiter = st.selectbox(
+        "Delimiter", [",", ";", "\t", "|"], key="imp_delim",
+        format_func=lambda d: {"\t": "TAB"}.get(d, d),
+    )
+
+    if upload is not None:
+        src, size = upload, upload.size
+    elif server_path:
+        try:
+            path = server_file(server_path)
+        except ValueError as e:
+            st.error(e); return
+        src, size = open(path, "rb"), os.path.getsize(path)
+    else:
+        return
+
+    try:
+        _render_import(get_connection, simple_rerun, db, src, size, delimiter)
+    finally:
+        if src is not upload:
+            src.close()
+
+
+def _render_import(get_connection, simple_rerun, db, src, size, delimiter):
+    src.seek(0)
+    header, sample = read_sample(src, SAMPLE_ROWS, delimiter)
+    st.caption(f"{len(header)} columns · {size / 1e6:.1f} MB")
+
+    # ── target table: existing (map onto DESCRIBE) or new (inferred) ────────
+    tables = catalog.tables(get_connection, db)
+    mode = st.radio(
+        "Target", ["Existing table", "New table"], horizontal=True, key="imp_mode",
+        index=0 if tables else 1,
+    )
+
+    if mode == "Existing table":
+        if not tables:
+            st.info("No tables in this database."); return
+        tbl = st.selectbox("Table", tables, key="imp_tbl")
+        desc = catalog.columns(get_connection, db, tbl)
+        types = {field: col_type for field, col_type, *_ in desc}
+        by_lower = {field.lower(): field for field in types}
+        options = [SKIP] + list(types)
+
+        with st.expander("Column mapping", expanded=True):
+            mapping = {}
+            for i, name in enumerate(header):
+                guess = by_lower.get(name.strip().lower(), SKIP)
+                target = st.selectbox(
+                    f"`{name}` →", options, index=options.index(guess),
+                    key=f"imp_map_{db}_{tbl}_{i}",
+                )
+                if target != SKIP:
+                    mapping[i] = target
+        create_sql = None
+    else:
+        tbl = st.text_input("New table name", key="imp_new_tbl").strip()
+        inferred = [infer_sql_type([r[i] if i < len(r) else "" for r in sample])
+                    for i in range(len(header))]
+        with st.expander("Inferred column types", expanded=True):
+            types = {}
+            for i, (name, guess) in enumerate(zip(header, inferred)):
+                types[name] = st.text_input(
+                    f"`{name}`", value=guess, key=f"imp_type_{i}_{name}"
+                )
+        pk = st.selectbox("Primary key", ["(none)"] + header, key="imp_pk")
+        mapping = {i: name for i, name in enumerate(header)}
+        extra = []
+        pairs = spatial.coordinate_pairs(header)
+        if pairs:
+            pair = st.selectbox(
+                "Point column + SPATIAL INDEX from", [None] + pairs, key="imp_point",
+                index=1,
+                format_func=lambda p: "(none)" if p is None else f"{p[0]} / {p[1]} (EOV)",
+                help="A stored POINT column, SRID 23700, kept in step with the "
+                     "coordinates; the Browser's area search uses its index.",
+            )
+            if pair:
+                extra = spatial.point_defs(pair[0], pair[1])
+        create_sql = create_table_sql(
+            tbl, header, [types[h] for h in header],
+            None if pk == "(none)" else pk, extra,
+        )
+        st.code(create_sql, language="sql")
+
+    if not mapping:
+        st.warning("Map at least one CSV column."); return
+
+    chunk_rows = st.number_input(
+        "Rows per chunk", min_value=100, max_value=100_000,
+        value=CHUNK_ROWS, step=100, key="imp_chunk",
+    )
+    stop_on_error = st.checkbox("Stop at the first failing chunk", key="imp_stop")
+
+    if not st.button("Import", key="imp_go"):
+        return
+    if mode == "New table" and not tbl.replace("_", "").isalnum():
+        st.error("Invalid table name."); return
+
+    progress = st.progress(0.0, text="Starting…")
+
+    def on_progress(bytes_read, report):
+        progress.progress(
+            min(bytes_read / size, 1.0) if size else 1.0,
+            text=f"{report.inserted:,} rows · chunk {report.chunks} · "
+                 f"{len(report.errors)} failed chunk(s)",
+        )
+
+    conn = None
+    try:
+        conn = get_connection(db)
+        if create_sql:
+            cur = conn.cursor()
+            cur.execute(create_sql)
+            cur.close()
+            catalog.invalidate(db)
+        src.seek(0)
+        report = load_csv(
+            conn, tbl, src, mapping, types,
+            chunk_rows=int(chunk_rows), delimiter=delimiter,
+            stop_on_error=stop_on_error, on_progress=on_progress,
+        )
+    except Exception as e:
+        st.error(f"Import failed: {e}"); return
+    finally:
+        resultcache.invalidate(db)   # chunks before a failure are committed
+        if conn is not None:
+            conn.close()
+
+    progress.progress(1.0, text="Done")
+    st.success(f"✅ {report.inserted:,} row(s) imported into `{tbl}`.")
+    if report.errors:
+        st.error(
+            f"{len(report.errors)} chunk(s) failed"
+            + (" – import stopped." if report.stopped else ".")
+        )
+        st.table([
+            {"CSV rows": f"{a}–{b}", "Error": msg} for a, b, msg in report.errors
+        ])
@@ -0,0 +1,340 @@
+# instrument.py
+"""
+instrument.py  –  Per-rerun query statistics and a process-wide slow-query log.
+
+Public API (used by app.py):
+    RunStats(page, slow_ms=SLOW_QUERY_MS)       → counters for one rerun
+    instrument(pooled_conn, stats, checkout_ms) → InstrumentedConnection
+    render_stats_panel(stats, pool, cache_stats) → sidebar panel + JSON export
+    slow_queries()                              → [dict, …] newest last
+
+`app.get_connection` wraps every pooled connection so that each
+`cursor.execute` / `executemany` / fetch, `commit` and `rollback` is
+timed and counted without the pages changing a line.  Row counts are
+exact; byte counts are an estimate (size of the first row × rows) so the
+fetch path stays cheap.
+"""
+
+from __future__ import annotations
+import json
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+
+import streamlit as st
+
+SLOW_QUERY_MS = 500        # statements slower than this go to the slow log
+SLOW_LOG_SIZE = 200        # entries kept across all sessions
+_SQL_PREVIEW = 300         # characters of SQL kept per record
+
+_slow_lock = threading.Lock()
+_slow_log: deque[dict] = deque(maxlen=SLOW_LOG_SIZE)
+
+_INSERT_RE = re.compile(r"\s*INSERT\b", re.I)
+
+
+# ── records ──────────────────────────────────────────────────────────────────
+@dataclass
+class QueryRecord:
+    sql: str
+    db: str
+    ms: float = 0.0              # execute + fetch time
+    rows: int = 0                # rows fetched (or affected, for writes)
+    bytes: int = 0               # estimated payload of fetched rows
+    round_trips: int = 1
+    _row_size: int = field(default=0, repr=False)
+
+
+def _row_bytes(row) -> int:
+    size = 0
+    for v in row:
+        if isinstance(v, (str, bytes, bytearray)):
+            size += len(v)
+        elif v is not None:
+            size += 8
+    return size
+
+
+class RunStats:
+    """Counters for one Streamlit rerun; safe to update from worker threads."""
+
+    def __init__(self, page: str, slow_ms: float = SLOW_QUERY_MS):
+        self.page = page
+        self.slow_ms = slow_ms
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.queries: list[QueryRecord] = []
+        self.checkouts = 0
+        self.fresh_connections = 0
+        self.checkout_ms = 0.0       # time spent in pool.get (incl. new connects)
+        self.connect_ms = 0.0        # part of it spent opening new connections
+        self.commits = 0
+        self.rollbacks = 0
+        self.tx_ms = 0.0             # commit + rollback time
+        self.imports: dict[str, float] = {}   # module → ms, first import only
+
+    # ── recording ───────────────────────────────────────────────────────────
+    def checkout(self, ms: float, fresh: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_ms += ms
+            if fresh:
+                self.fresh_connections += 1
+                self.connect_ms += ms
+
+    def add_query(self, rec: QueryRecord):
+        with self._lock:
+            self.queries.append(rec)
+
+    def finish_query(self, rec: QueryRecord):
+        """Push `rec` to the slow log once its fetches are accounted for."""
+        if rec.ms >= self.slow_ms:
+            with _slow_lock:
+                _slow_log.append({
+                    "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "page": self.page,
+                    **{k: v for k, v in asdict(rec).items() if not k.startswith("_")},
+                })
+
+    def note_import(self, module: str, ms: float):
+        with self._lock:
+            self.imports[module] = round(ms, 1)
+
+    def transaction(self, kind: str, ms: float):
+        with self._lock:
+            if kind == "commit":
+                self.commits += 1
+            else:
+                self.rollbacks += 1
+            self.tx_ms += ms
+
+    # ── reporting ───────────────────────────────────────────────────────────
+    def totals(self) -> dict:
+        with self._lock:
+            queries = list(self.queries)
+            return {
+                "wall_ms": round((time.perf_counter() - self._t0) * 1000, 1),
+                "statements": len(queries),
+                "round_trips": sum(q.round_trips for q in queries)
+                               + self.commits + self.rollbacks,
+                "db_ms": round(sum(q.ms for q in queries) + self.tx_ms, 1),
+                "rows": sum(q.rows for q in queries),
+                "est_bytes": sum(q.bytes for q in queries),
+                "checkouts": self.checkouts,
+                "fresh_connections": self.fresh_connections,
+                "checkout_ms": round(self.checkout_ms, 1),
+                "connect_ms": round(self.connect_ms, 1),
+                "commits": self.commits,
+                "rollbacks": self.rollbacks,
+            }
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            queries = [
+                {k: round(v, 2) if k == "ms" else v
+                 for k, v in asdict(q).items() if not k.startswith("_")}
+                for q in self.queries
+            ]
+        return {
+            "page": self.page,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "totals": self.totals(),
+            "queries": queries,
+            "imports_ms": dict(self.imports),
+            "slow_log": slow_queries(),
+        }
+
+
+def slow_queries() -> list[dict]:
+    with _slow_lock:
+        return list(_slow_log)
+
+
+# ── proxies ──────────────────────────────────────────────────────────────────
+class InstrumentedCursor:
+    """Cursor proxy timing execute / executemany and counting fetched rows."""
+
+    def __init__(self, raw, stats: RunStats, db: str):
+        self._raw, self._stats, self._db = raw, stats, db
+        self._rec: QueryRecord | None = None
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _start(self, sql) -> QueryRecord:
+        self._done()
+        text = sql.decode("utf-8", "replace") if isinstance(sql, bytes) else str(sql)
+        rec = QueryRecord(" ".join(text.split())[:_SQL_PREVIEW], self._db)
+        self._stats.add_query(rec)
+        self._rec = rec
+        return rec
+
+    def _done(self):
+        if self._rec is not None:
+            self._stats.finish_query(self._rec)
+            self._rec = None
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        rec = self._start(sql)
+        t0 = time.perf_counter()
+        try:
+            return self._raw.execute(sql, params, *args, **kwargs)
+        finally:
+            rec.ms += (time.perf_counter() - t0) * 1000
+            if not self._raw.with_rows:
+                rec.rows = max(self._raw.rowcount, 0)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        seq_params = list(seq_params)
+        rec = self._start(sql)
+        # the connector folds INSERT … VALUES into one multi-row statement
+        rec.round_trips = 1 if _INSERT_RE.match(str(sql)) else max(len(seq_params), 1)
+        t0 = time.perf_counter()
+        try:
+            return self._raw.executemany(sql, seq_params, *args, **kwargs)
+        finally:
+            rec.ms += (time.perf_counter() - t0) * 1000
+            rec.rows = max(self._raw.rowcount, 0)
+
+    def _fetched(self, rows: list, t0: float):
+        rec = self._rec
+        if rec is None:
+            return
+        rec.ms += (time.perf_counter() - t0) * 1000
+        if rows:
+            if not rec._row_size:
+                rec._row_size = _row_bytes(rows[0])
+            rec.rows += len(rows)
+            rec.bytes = rec._row_size * rec.rows
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = self._raw.fetchone()
+        self._fetched([row] if row is not None else [], t0)
+        return row
+
+    def fetchmany(self, size=1):
+        t0 = time.perf_counter()
+        rows = self._raw.fetchmany(size)
+        self._fetched(rows, t0)
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = self._raw.fetchall()
+        self._fetched(rows, t0)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._done()
+        return self._raw.close()
+
+
+class InstrumentedConnection:
+    """Pooled-connection proxy that hands out instrumented cursors."""
+
+    def __init__(self, pooled, stats: RunStats, db: str):
+        object.__setattr__(self, "_conn", pooled)
+        object.__setattr__(self, "_stats", stats)
+        object.__setattr__(self, "_db", db)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        if name == "database":
+            object.__setattr__(self, "_db", value)
+        setattr(self._conn, name, value)   # the pool proxy tracks `database`
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._stats, self._db)
+
+    def _timed(self, kind: str):
+        t0 = time.perf_counter()
+        try:
+            return getattr(self._conn, kind)()
+        finally:
+            self._stats.transaction(kind, (time.perf_counter() - t0) * 1000)
+
+    def commit(self):
+        return self._timed("commit")
+
+    def rollback(self):
+        return self._timed("rollback")
+
+    def close(self):
+        return self._conn.close()
+
+
+def instrument(pooled, stats: RunStats, checkout_ms: float, db: str | None = None):
+    stats.checkout(checkout_ms, getattr(pooled, "fresh", False))
+    return InstrumentedConnection(pooled, stats, db or "")
+
+
+# ── Streamlit panel ──────────────────────────────────────────────────────────
+def render_stats_panel(stats: RunStats, pool=None, cache_stats: dict | None = None):
+    """Sidebar summary of this rerun, the slow-query log and a JSON export."""
+    import pandas as pd
+
+    tot = stats.totals()
+    sb = st.sidebar
+    sb.markdown("### Query stats (this rerun)")
+    c1, c2 = sb.columns(2)
+    c1.metric("Statements", tot["statements"])
+    c2.metric("Round trips", tot["round_trips"])
+    c1.metric("DB time", f"{tot['db_ms']:.0f} ms")
+    c2.metric("Rerun", f"{tot['wall_ms']:.0f} ms")
+    c1.metric("Checkouts", tot["checkouts"])
+    c2.metric("New conns", tot["fresh_connections"])
+    sb.caption(
+        f"{tot['rows']:,} rows · ~{tot['est_bytes'] / 1e6:.2f} MB fetched · "
+        f"{tot['checkout_ms']:.0f} ms in checkout ({tot['connect_ms']:.0f} ms connecting) · "
+        f"{tot['commits']} commit(s), {tot['rollbacks']} rollback(s)"
+    )
+
+    if stats.imports:
+        sb.caption("Imported this rerun: " + ", ".join(
+            f"`{m}` {ms:.0f} ms" for m, ms in stats.imports.items()
+        ))
+
+    with sb.expander("Statements", expanded=False):
+        if stats.queries:
+            df = pd.DataFrame(stats.as_dict()["queries"])
+            st.dataframe(df.sort_values("ms", ascending=False), use_container_width=True)
+        else:
+            st.caption("No statements ran.")
+
+    with sb.expander(f"Slow queries (≥ {stats.slow_ms:.0f} ms)", expanded=False):
+        slow = slow_queries()
+        if slow:
+            st.dataframe(pd.DataFrame(slow[::-1]), use_container_width=True)
+        else:
+            st.caption("None logged since the server started.")
+
+    if pool is not None:
+        with sb.expander("Connection pool", expanded=False):
+            st.json(pool.stats())
+
+    if cache_stats is not None:
+        with sb.expander("Result cache", expanded=False):
+            st.json(cache_stats)
+
+    sb.download_button(
+        "⬇️ Export counters (JSON)",
+        json.dumps(stats.as_dict(), indent=2, default=str),
+        file_name=f"query_stats_{time.strftime('%Y%m%d_%H%M%S')}.json",
+        mime="application/json",
+        key="query_stats_json",
+    )
@@ -0,0 +1,309 @@
+# jobs.py
+"""
+jobs.py  –  Background jobs for long-running operations.
+
+Public API (used by app.py, edit.py, delete.py and sql_runner.py):
+    submit(kind, title, fn, db=None)      → Job   (raises JobQueueFull)
+    get(job_id)                           → Job | None
+    list_jobs()                           → [Job, …] newest first
+    cancel(job_id)
+    current()                             → Job the calling thread works for, or None
+    adopt(job)                            → mark a helper thread of `job` as its own
+    kill_query(get_connection, conn_id)   → KILL QUERY from a side connection
+    render_job_status(job, key)           → progress / status / Cancel widget
+    render_jobs_page(get_connection)      → the “Jobs” page
+
+`fn(job)` runs on a bounded thread pool shared by every session of this
+server process, so it keeps running when the browser tab that started
+it goes away.  It reports through `job.update(progress, message)`, polls
+`job.cancelled` and may register `job.on_cancel(callback)` to interrupt
+a statement in flight.  Whatever it returns (or leaves in `job.result`)
+is written as JSON to `JOBS_DIR` when the job ends, so finished jobs can
+be looked up again after a restart; the directory keeps the same
+`JOB_HISTORY` newest jobs as memory does.
+"""
+
+from __future__ import annotations
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+import streamlit as st
+
+JOB_WORKERS = 4            # jobs running at the same time
+MAX_QUEUED = 16            # jobs waiting for a worker before submit() refuses
+JOB_HISTORY = 200          # finished jobs kept in memory / on disk
+JOBS_DIR = os.environ.get(
+    "IMPACTDATA_JOBS_DIR", os.path.join(tempfile.gettempdir(), "impactdata_jobs")
+)
+
+ACTIVE = ("queued", "running")
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    title: str
+    db: str | None = None
+    status: str = "queued"           # queued | running | done | failed | cancelled
+    progress: float | None = None    # 0…1, None → indeterminate
+    message: str = ""
+    created: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    result: object = None            # JSON-able payload for the Jobs page
+    error: str | None = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _on_cancel: list = field(default_factory=list, repr=False)
+
+    # ── used by job functions ───────────────────────────────────────────────
+    def update(self, progress: float | None = None, message: str | None = None):
+        if progress is not None:
+            self.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def on_cancel(self, callback):
+        self._on_cancel.append(callback)
+
+    # ── used by the pages ───────────────────────────────────────────────────
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE
+
+    @property
+    def duration(self) -> float | None:
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if not k.startswith("_")}
+
+
+# ── manager state (process-wide) ─────────────────────────────────────────────
+_lock = threading.Lock()
+_jobs: dict[str, Job] = {}
+_executor: ThreadPoolExecutor | None = None
+_loaded = False
+_local = threading.local()     # .job on threads working for a job
+
+
+def _load_history():
+    """Finished jobs persisted by earlier server processes."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    if not os.path.isdir(JOBS_DIR):
+        return
+    names = sorted(n for n in os.listdir(JOBS_DIR) if n.endswith(".json"))
+    for name in names[:-JOB_HISTORY]:
+        _remove_file(name)
+    for name in names[-JOB_HISTORY:]:
+        try:
+            with open(os.path.join(JOBS_DIR, name), encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("status") in ACTIVE:      # the process died under it
+                data["status"], data["error"] = "failed", "Server restarted."
+            _jobs[data["id"]] = Job(**data)
+        except Exception:
+            continue
+
+
+def _file_name(job: Job) -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(job.created))}-{job.id}.json"
+
+
+def _remove_file(name: str):
+    try:
+        os.remove(os.path.join(JOBS_DIR, name))
+    except OSError:
+        pass
+
+
+def _persist(job: Job):
+    try:
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        with open(os.path.join(JOBS_DIR, _file_name(job)), "w", encoding="utf-8") as fh:
+            json.dump(job.to_dict(), fh, default=str)
+    except OSError:
+        pass   # history is a convenience; never fail the job over it
+
+
+def _trim_locked():
+    finished = sorted((j for j in _jobs.values() if not j.active), key=lambda j: j.created)
+    for job in finished[: max(len(finished) - JOB_HISTORY, 0)]:
+        del _jobs[job.id]
+        _remove_file(_file_name(job))
+
+
+def _run(job: Job, fn):
+    if job.cancelled:
+        job.status, job.finished = "cancelled", time.time()
+        _persist(job)
+        return
+    job.status, job.started = "running", time.time()
+    adopt(job)
+    try:
+        result = fn(job)
+        if result is not None:
+            job.result = result
+        job.status = "cancelled" if job.cancelled else "done"
+        if job.status == "done":
+            job.update(1.0)
+    except Exception as e:
+        job.error = str(e)
+        job.status = "cancelled" if job.cancelled else "failed"
+    finally:
+        adopt(None)
+        job.finished = time.time()
+        _persist(job)
+
+
+# ── public API ───────────────────────────────────────────────────────────────
+def current() -> Job | None:
+    """The job the calling thread runs for; None on a page's own threads."""
+    return getattr(_local, "job", None)
+
+
+def adopt(job: Job | None):
+    """Make `current()` return `job` on this thread (e.g. a job's own worker pool)."""
+    _local.job = job
+
+
+def submit(kind: str, title: str, fn, db: str | None = None) -> Job:
+    global _executor
+    with _lock:
+        _load_history()
+        queued = sum(1 for j in _jobs.values() if j.status == "queued")
+        if queued >= MAX_QUEUED:
+            raise JobQueueFull(
+                f"{queued} jobs are already waiting – try again when some have finished."
+            )
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+        job = Job(uuid.uuid4().hex[:10], kind, title, db)
+        _jobs[job.id] = job
+        _trim_locked()
+    _executor.submit(_run, job, fn)
+    return job
+
+
+def get(job_id: str | None) -> Job | None:
+    with _lock:
+        _load_history()
+        return _jobs.get(job_id)
+
+
+def list_jobs() -> list[Job]:
+    with _lock:
+        _load_history()
+        return sorted(_jobs.values(), key=lambda j: j.created, reverse=True)
+
+
+def cancel(job_id: str):
+    job = get(job_id)
+    if job is None or not job.active or job.cancelled:
+        return
+    job._cancel.set()
+    for callback in list(job._on_cancel):
+        try:
+            callback()
+        except Exception:
+            pass
+
+
+def kill_query(get_connection, conn_id: int):
+    conn = cur = None
+    try:
+        conn = get_connection(); cur = conn.cursor()
+        cur.execute(f"KILL QUERY {int(conn_id)}")
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+
+
+# ── Streamlit widgets ────────────────────────────────────────────────────────
+_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌", "cancelled": "⏹"}
+
+
+def render_job_status(job: Job, key: str):
+    """Progress bar, status line and (while active) a Cancel button."""
+    label = f"{_ICONS.get(job.status, '')} {job.title} – {job.status}"
+    if job.message:
+        label += f" · {job.message}"
+    if job.active:
+        st.progress(job.progress or 0.0, text=label)
+        st.button("⏹ Cancel", key=f"{key}_cancel_{job.id}", on_click=cancel, args=(job.id,))
+    else:
+        st.caption(label + (f" ({job.duration:.1f}s)" if job.duration is not None else ""))
+        if job.error:
+            st.error(job.error)
+
+
+def render_jobs_page(get_connection):
+    st.title("Background Jobs")
+    jobs = list_jobs()
+    if not jobs:
+        st.info("No jobs yet – drops, provisioning, large saves and SQL scripts show up here.")
+        return
+
+    st.dataframe(
+        [
+            {
+                "id": j.id, "kind": j.kind, "title": j.title, "db": j.db,
+                "status": f"{_ICONS.get(j.status, '')} {j.status}",
+                "progress": round((j.progress or 0.0) * 100),
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(j.started))
+                           if j.started else "",
+                "seconds": round(j.duration, 1) if j.duration is not None else None,
+                "message": j.error or j.message,
+            }
+            for j in jobs
+        ],
+        hide_index=True,
+        use_container_width=True,
+        column_config={"progress": st.column_config.ProgressColumn(
+            "progress", min_value=0, max_value=100, format="%d%%",
+        )},
+    )
+
+    job_id = st.selectbox(
+        "Job details", [j.id for j in jobs], key="jobs_detail",
+        format_func=lambda i: f"{i} – {get(i).title}" if get(i) else i,
+    )
+    job = get(job_id)
+    if job is not None:
+        render_job_status(job, key="jobs_page")
+        if job.result is not None:
+            st.json(job.result, expanded=False)
+        st.download_button(
+            "⬇️ Download job record (JSON)",
+            json.dumps(job.to_dict(), indent=2, default=str),
+            file_name=f"job_{job.id}.json",
+            mime="application/json",
+            key=f"job_dl_{job.id}",
+        )
+
+    if any(j.active for j in jobs) and st.checkbox(
+        "Auto-refresh while jobs run", value=True, key="jobs_autorefresh"
+    ):
+        time.sleep(1.0)
+        st.rerun()
@@ -0,0 +1,273 @@
+# pool.py
+"""
+pool.py  –  Process-wide pool of warm MySQL connections.
+
+Public API (used by app.py):
+    ConnectionPool(config, profile=PROFILES["lan"], max_size=…, idle_timeout=…, ping_interval=…)
+    pool.get(db_name:str|None)  → PooledConnection
+    pool.close_all()
+    PROFILES / ConnectionProfile              → wire-level connection settings
+    write_cursor(conn, repeated=True)         → DML cursor, prepared when repeated
+    read_cursor(conn)                         → (cursor, raw) for frames.py
+
+A `PooledConnection` behaves like the mysql.connector connection it wraps,
+so the pages keep their usual `cur.close(); conn.close()` pattern – the
+only difference is that `close()` hands the socket back to the pool
+instead of tearing down the TCP + auth handshake.
+
+Connections are kept per database (one idle stack per `db_name`), capped
+at `max_size` open connections per database, pinged on checkout once they
+have been idle longer than `ping_interval` seconds and closed once they
+have been idle longer than `idle_timeout` seconds.
+
+A `ConnectionProfile` decides how the sockets talk to the server and is
+carried on every PooledConnection as `conn.profile`:
+
+    use_pure=False    the connector's C extension (CMySQLConnection) parses
+                      packets and converts values in C when it is installed
+    compress          zlib protocol compression – worth it on WAN links,
+                      pure CPU cost on a LAN
+    prepared_writes   `write_cursor(…, repeated=True)` is a server-side
+                      prepared cursor: the full chunks of writer.py repeat
+                      the same text, so each shape is parsed once and then
+                      executed with binary parameters; one-off statements
+                      keep the text protocol (one round trip, not three)
+    raw_reads         `read_cursor` returns undecoded column bytes, which
+                      frames.py converts a whole column at a time
+"""
+
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass
+
+import mysql.connector
+from mysql.connector import errors
+
+
+# ── PROFILES ─────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class ConnectionProfile:
+    name: str
+    use_pure: bool = False           # False → C extension when available
+    compress: bool = False
+    prepared_writes: bool = True
+    raw_reads: bool = True
+
+    def connect_args(self) -> dict:
+        return {"use_pure": self.use_pure, "compress": self.compress}
+
+
+PROFILES = {
+    "lan": ConnectionProfile("lan"),
+    "wan": ConnectionProfile("wan", compress=True),
+    # the connector's defaults – plain Python cursors, for comparison
+    "plain": ConnectionProfile("plain", use_pure=True, prepared_writes=False, raw_reads=False),
+}
+
+
+def _profile(conn) -> ConnectionProfile | None:
+    return getattr(conn, "profile", None)
+
+
+def write_cursor(conn, repeated: bool = True):
+    """Cursor for DML: server-side prepared when the statement is `repeated`
+    and the profile says so, a plain text-protocol cursor otherwise."""
+    profile = _profile(conn)
+    if repeated and profile is not None and profile.prepared_writes:
+        return conn.cursor(prepared=True)
+    return conn.cursor()
+
+
+def read_cursor(conn):
+    """(cursor, raw) for bulk reads into DataFrames; raw cursors return bytes.
+
+    Only for callers that decode with frames.py (`frame_from_cursor(…, raw=raw)`).
+    """
+    profile = _profile(conn)
+    if profile is not None and profile.raw_reads:
+        return conn.cursor(raw=True), True
+    return conn.cursor(), False
+
+
+# ── PROXY ────────────────────────────────────────────────────────────────────
+class PooledConnection:
+    """Connection proxy whose `close()` returns the connection to its pool."""
+
+    def __init__(self, pool: "ConnectionPool", key: str, raw, fresh: bool = False):
+        object.__setattr__(self, "fresh", fresh)   # True → new TCP + auth handshake
+        object.__setattr__(self, "profile", pool.profile)
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_key", key)
+        object.__setattr__(self, "_raw", raw)
+        object.__setattr__(self, "_released", False)
+        object.__setattr__(self, "_dirty", False)
+
+    # everything else (cursor, commit, rollback, server_host, …) is forwarded
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name, value):
+        # switching the default database makes the socket unfit for this key
+        if name == "database":
+            object.__setattr__(self, "_dirty", True)
+        setattr(self._raw, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def discard(self):
+        """Close the underlying socket instead of pooling it on `close()`."""
+        object.__setattr__(self, "_dirty", True)
+
+    def close(self):
+        if self._released:
+            return
+        object.__setattr__(self, "_released", True)
+        self._pool._release(self._key, self._raw, self._dirty)
+
+
+# ── POOL ─────────────────────────────────────────────────────────────────────
+class ConnectionPool:
+    """Thread-safe pool of mysql.connector connections keyed per database."""
+
+    def __init__(
+        self,
+        config: dict,
+        *,
+        profile: ConnectionProfile = PROFILES["lan"],
+        max_size: int = 8,
+        idle_timeout: float = 300.0,
+        ping_interval: float = 10.0,
+        acquire_timeout: float = 10.0,
+    ):
+        self.config = dict(config)
+        self.profile = profile
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._idle: dict[str, list[tuple[object, float]]] = {}  # key → [(raw, last_used)]
+        self._open: dict[str, int] = {}                          # key → idle + checked out
+
+    # ── checkout ────────────────────────────────────────────────────────────
+    def get(self, db: str | None = None) -> PooledConnection:
+        key = db or ""
+        deadline = time.monotonic() + self.acquire_timeout
+        raw, last_used = None, 0.0
+
+        with self._cond:
+            expired = self._evict_idle_locked()
+            while True:
+                idle = self._idle.get(key)
+                if idle:
+                    raw, last_used = idle.pop()          # LIFO → warmest socket
+                    break
+                if self._open.get(key, 0) < self.max_size:
+                    self._open[key] = self._open.get(key, 0) + 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise errors.PoolError(
+                        f"No free connection for `{key or '(server)'}` "
+                        f"after {self.acquire_timeout:.0f}s "
+                        f"(max_size={self.max_size})."
+                    )
+                self._cond.wait(remaining)
+
+        for stale in expired:
+            _quiet_close(stale)
+
+        if raw is not None and time.monotonic() - last_used > self.ping_interval:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                _quiet_close(raw)
+                raw = None
+
+        fresh = raw is None
+        if fresh:
+            try:
+                raw = self._connect(db)
+            except Exception:
+                self._forget(key)
+                raise
+        return PooledConnection(self, key, raw, fresh)
+
+    def _connect(self, db: str | None):
+        cfg = {**self.profile.connect_args(), **self.config}
+        if db:
+            cfg["database"] = db
+        return mysql.connector.connect(**cfg)
+
+    # ── checkin ─────────────────────────────────────────────────────────────
+    def _release(self, key: str, raw, dirty: bool):
+        try:
+            if dirty or getattr(raw, "unread_result", False):
+                raise errors.InterfaceError("connection not reusable")
+            # end the implicit read snapshot so the next user sees fresh data
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            _quiet_close(raw)
+            self._forget(key)
+            return
+
+        with self._cond:
+            self._idle.setdefault(key, []).append((raw, time.monotonic()))
+            self._cond.notify()
+
+    def _forget(self, key: str):
+        with self._cond:
+            self._open[key] = max(self._open.get(key, 1) - 1, 0)
+            self._cond.notify()
+
+    # ── maintenance ─────────────────────────────────────────────────────────
+    def _evict_idle_locked(self) -> list:
+        """Drop connections idle longer than `idle_timeout` (caller holds lock)."""
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = []
+        for key, idle in self._idle.items():
+            keep = [(raw, t) for raw, t in idle if t >= cutoff]
+            if len(keep) != len(idle):
+                expired.extend(raw for raw, t in idle if t < cutoff)
+                self._open[key] -= len(idle) - len(keep)
+                idle[:] = keep
+        return expired
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on return)."""
+        with self._cond:
+            idle = [raw for stack in self._idle.values() for raw, _ in stack]
+            for key, stack in self._idle.items():
+                self._open[key] -= len(stack)
+            self._idle.clear()
+        for raw in idle:
+            _quiet_close(raw)
+
+    def stats(self) -> dict[str, dict]:
+        """Per-database counts of open and idle connections, plus the profile."""
+        with self._cond:
+            out = {
+                key or "(server)": {
+                    "open": self._open.get(key, 0),
+                    "idle": len(self._idle.get(key, ())),
+                }
+                for key in self._open
+            }
+            drivers = {type(raw).__name__ for stack in self._idle.values() for raw, _ in stack}
+        out["profile"] = {"name": self.profile.name, **self.profile.connect_args(),
+                          "drivers": sorted(drivers)}
+        return out
+
+
+def _quiet_close(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
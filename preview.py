@@ -0,0 +1,131 @@
+# preview.py
+"""
+preview.py  –  Page-at-a-time table previews.
+
+Public API (used by app.py):
+    fetch_page(get_connection, db, tbl, pk_cols, page_size,
+               after=None, before=None, where="", params=(), kinds=None)  → PreviewPage
+    fetch_offset_page(get_connection, db, tbl, page_size, page_no,
+                      where="", params=(), order_sql="", kinds=None)       → PreviewPage
+    exact_count(get_connection, db, tbl)                 → int  (full COUNT(*))
+
+`fetch_page` seeks on the primary key (`WHERE (pk…) > (%s…) ORDER BY pk
+LIMIT n`), so every page costs one index range scan no matter how deep
+into the table it is.  Tables without a primary key fall back to
+`fetch_offset_page`, whose cost grows with the offset, as do previews
+sorted on something other than the key.  `where` / `params` is a
+filter condition from filters.py, ANDed with the page bounds.  Pages come from
+`resultcache`, so re-reading an unchanged table costs one catalog probe.
+
+A page is a compact DataFrame (frames.py) read through the connection
+profile's raw cursor; `kinds` ({col: kind} from `frames.kinds_from_describe`)
+carries DECIMAL precision in.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import resultcache
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@dataclass
+class PreviewPage:
+    columns: list[str]
+    frame: pd.DataFrame              # pandas is imported with the first page
+    has_prev: bool = False
+    has_next: bool = False
+    first_key: tuple | None = None   # PK of rows[0]   (keyset mode only)
+    last_key: tuple | None = None    # PK of rows[-1]  (keyset mode only)
+    page_no: int = 0                 # offset mode only
+    pk_cols: list[str] = field(default_factory=list)
+
+
+def _run(get_connection, db: str, tbl: str, sql: str, params=()):
+    # pages are served from the shared result cache until `tbl` changes
+    return resultcache.query(get_connection, db, sql, params, tables=(tbl,))
+
+
+def _frame(get_connection, db: str, tbl: str, sql: str, params, kinds) -> pd.DataFrame:
+    return resultcache.frame(get_connection, db, sql, params, tables=(tbl,), overrides=kinds)
+
+
+def fetch_page(
+    get_connection,
+    db: str,
+    tbl: str,
+    pk_cols: list[str],
+    page_size: int,
+    after: tuple | None = None,
+    before: tuple | None = None,
+    where: str = "",
+    params=(),
+    kinds: dict | None = None,
+) -> PreviewPage:
+    """Return the page after `after`, before `before`, or the first page."""
+    key_sql = ", ".join(f"`{c}`" for c in pk_cols)
+    marks = ", ".join("%s" for _ in pk_cols)
+    conds, args = ([f"({where})"], list(params)) if where else ([], [])
+
+    if before is not None:
+        conds.append(f"({key_sql}) < ({marks})"); order = "DESC"; args += before
+    elif after is not None:
+        conds.append(f"({key_sql}) > ({marks})"); order = "ASC"; args += after
+    else:
+        order = "ASC"
+
+    where_sql = "WHERE " + " AND ".join(conds) if conds else ""
+    order_sql = ", ".join(f"`{c}` {order}" for c in pk_cols)
+    # one extra row tells us whether another page exists in that direction
+    df = _frame(
+        get_connection, db, tbl,
+        f"SELECT * FROM `{tbl}` {where_sql} ORDER BY {order_sql} LIMIT %s",
+        (*args, page_size + 1), kinds,
+    )
+    more = len(df) > page_size
+    df = df.iloc[:page_size]
+    if before is not None:
+        df = df.iloc[::-1]
+    df = df.reset_index(drop=True)
+
+    from diff import to_py
+
+    key = lambda i: tuple(to_py(df[c].iloc[i]) for c in pk_cols)
+    return PreviewPage(
+        columns=list(df.columns),
+        frame=df,
+        has_prev=more if before is not None else after is not None,
+        has_next=more if before is None else True,
+        first_key=key(0) if len(df) else None,
+        last_key=key(-1) if len(df) else None,
+        pk_cols=list(pk_cols),
+    )
+
+
+def fetch_offset_page(
+    get_connection, db: str, tbl: str, page_size: int, page_no: int,
+    where: str = "", params=(), order_sql: str = "", kinds: dict | None = None,
+) -> PreviewPage:
+    """LIMIT/OFFSET fallback for tables without a primary key (or custom sorts)."""
+    where_sql = f"WHERE {where}" if where else ""
+    df = _frame(
+        get_connection, db, tbl,
+        f"SELECT * FROM `{tbl}` {where_sql} {order_sql} LIMIT %s OFFSET %s",
+        (*params, page_size + 1, page_no * page_size), kinds,
+    )
+    return PreviewPage(
+        columns=list(df.columns),
+        frame=df.iloc[:page_size],
+        has_prev=page_no > 0,
+        has_next=len(df) > page_size,
+        page_no=page_no,
+    )
+
+
+def exact_count(get_connection, db: str, tbl: str) -> int:
+    """`SELECT COUNT(*)` – exact, but scans the smallest index of the table."""
+    _, rows = _run(get_connection, db, tbl, f"SELECT COUNT(*) FROM `{tbl}`")
+    return int(rows[0][0])
@@ -0,0 +1,335 @@
+# profiler.py
+"""
+profiler.py  –  EXPLAIN-based query profiler and index advisor.
+
+Public API (used by edit.py):
+    profile_script(get_connection, db, sql, analyze=False, timeout_s=…)
+                                         → [Profile, …]  (one per statement)
+    render_profile(profile)              → Streamlit view of one Profile
+
+For every statement `EXPLAIN FORMAT=JSON` gives the optimiser's plan:
+each step's access type, chosen / possible keys, estimated rows and
+cost.  With `analyze=True` read-only statements also run under
+`EXPLAIN ANALYZE` (MySQL ≥ 8.0.18), which executes them and reports the
+actual time and rows of every iterator – so it is opt-in and bounded by
+`max_execution_time`.
+
+Steps are flagged when they scan a whole table or index, sort with a
+filesort or build a temporary table.  The advisor then looks at the
+columns the flagged tables are filtered, joined and sorted on (from
+the plan's conditions and the statement's ORDER BY), orders them the
+way an index can use them – equality columns, then one range column,
+then sort columns – and proposes an index unless an existing one
+(catalog.indexes, i.e. SHOW INDEX) already starts with those columns.
+"""
+
+from __future__ import annotations
+import json
+import re
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+import catalog
+from sqlscript import is_read_only, iter_statements, main_verb
+
+TIMEOUT_S = 30           # max_execution_time for EXPLAIN ANALYZE
+
+_EXPLAINABLE = {"SELECT", "TABLE", "UPDATE", "DELETE", "INSERT", "REPLACE"}
+_FROM_RE = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(?:`?\w+`?\.)?`?(\w+)`?(?:\s+(?:AS\s+)?`?(?!(?:ON|USING|WHERE|JOIN|"
+    r"LEFT|RIGHT|INNER|OUTER|CROSS|NATURAL|GROUP|ORDER|LIMIT|SET|VALUES|STRAIGHT_JOIN)\b)(\w+)`?)?",
+    re.I,
+)
+_ORDER_RE = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\bFOR\b|$)", re.I | re.S)
+_COLREF = r"`(?:\w+)`\.`(\w+)`\.`(\w+)`"
+_EQ_RE = re.compile(_COLREF + r"\s*(?:=|<=>|\bin\s*\()", re.I)
+_RANGE_RE = re.compile(_COLREF + r"\s*(?:<|>|<=|>=|\bbetween\b|\blike\b)", re.I)
+_EQ_REVERSED_RE = re.compile(r"=\s*" + _COLREF, re.I)
+_ANALYZE_RE = re.compile(
+    r"^(?P<indent>\s*)-> (?P<op>.*?)"
+    r"(?:\s+\(cost=(?P<cost>[\d.e+]+)(?:\.\.[\d.e+]+)? rows=(?P<est>[\d.e+]+)\))?"
+    r"(?:\s+\(actual time=(?P<first>[\d.]+)\.\.(?P<last>[\d.]+) rows=(?P<rows>[\d.e+]+) loops=(?P<loops>\d+)\))?"
+    r"\s*$"
+)
+
+
+@dataclass
+class Profile:
+    no: int
+    sql: str
+    steps: list[dict] = field(default_factory=list)        # flattened plan tree
+    analyze: list[dict] = field(default_factory=list)      # EXPLAIN ANALYZE iterators
+    flags: list[str] = field(default_factory=list)
+    advice: list[dict] = field(default_factory=list)
+    plan_json: dict | None = None
+    error: str | None = None
+
+
+# ── plan tree ────────────────────────────────────────────────────────────────
+def _num(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+_BLOCKS = (
+    ("query_block", "query block"), ("ordering_operation", "ORDER BY"),
+    ("grouping_operation", "GROUP BY"), ("duplicates_removal", "DISTINCT"),
+    ("windowing", "window"), ("union_result", "UNION"),
+    ("nested_loop", "nested loop"), ("query_specifications", "UNION part"),
+    ("materialized_from_subquery", "derived table"),
+    ("attached_subqueries", "subquery"), ("optimized_away_subqueries", "subquery"),
+)
+
+
+def _step(depth: int, label: str, **values) -> dict:
+    row = {
+        "depth": depth, "step": "  " * depth + label, "access": "", "key": "",
+        "possible_keys": "", "rows_examined": None, "rows_produced": None,
+        "filtered_%": None, "cost": None, "condition": "", "table": "", "ref": "",
+    }
+    row.update(values)
+    return row
+
+
+def _walk(node, depth: int, steps: list[dict]):
+    """Flatten MySQL's JSON plan into one row per step, parents first."""
+    if isinstance(node, list):
+        for child in node:
+            _walk(child, depth, steps)
+        return
+    if not isinstance(node, dict):
+        return
+
+    if isinstance(node.get("table"), dict):
+        t = node["table"]
+        steps.append(_step(
+            depth, f"table `{t.get('table_name', '?')}`",
+            access=t.get("access_type", ""),
+            key=t.get("key") or "",
+            possible_keys=", ".join(t.get("possible_keys") or []),
+            rows_examined=_num(t.get("rows_examined_per_scan")),
+            rows_produced=_num(t.get("rows_produced_per_join")),
+            cost=_num(t.get("cost_info", {}).get("prefix_cost")),
+            condition=t.get("attached_condition", ""),
+            table=t.get("table_name", ""),
+            ref=", ".join(t.get("ref") or []),
+            **{"filtered_%": _num(t.get("filtered"))},
+        ))
+        for key in ("materialized_from_subquery", "attached_subqueries"):
+            if key in t:
+                _walk(t[key], depth + 1, steps)
+        return
+
+    for key, name in _BLOCKS:
+        if key not in node:
+            continue
+        sub = node[key]
+        if key == "query_block" and depth == 0:
+            _walk(sub, depth, steps)           # the statement itself
+            continue
+        info = sub if isinstance(sub, dict) else {}
+        extra = [label for flag, label in (("using_filesort", "filesort"),
+                                           ("using_temporary_table", "temporary table"))
+                 if info.get(flag)]
+        cost = info.get("cost_info", {})
+        steps.append(_step(
+            depth, name + (f" ({', '.join(extra)})" if extra else ""),
+            cost=_num(cost.get("query_cost") or cost.get("sort_cost")),
+        ))
+        _walk(sub, depth + 1, steps)
+
+
+def _flags(steps: list[dict]) -> list[str]:
+    out = []
+    for s in steps:
+        name = s["step"].strip()
+        if s["access"] == "ALL":
+            rows = f" (~{s['rows_examined']:,.0f} rows)" if s["rows_examined"] else ""
+            out.append(f"Full table scan of `{s['table']}`{rows}")
+            if s["possible_keys"]:
+                out.append(f"`{s['table']}` has usable keys ({s['possible_keys']}) the optimiser did not pick")
+        elif s["access"] == "index":
+            out.append(f"Full index scan of `{s['table']}` on `{s['key']}`")
+        if "filesort" in name:
+            out.append(f"{name.split(' (')[0]} sorts with a filesort")
+        if "temporary table" in name:
+            out.append(f"{name.split(' (')[0]} builds a temporary table")
+    return out
+
+
+# ── EXPLAIN ANALYZE ──────────────────────────────────────────────────────────
+def _parse_analyze(text: str) -> list[dict]:
+    rows = []
+    for line in text.splitlines():
+        m = _ANALYZE_RE.match(line)
+        if not m:
+            if rows:       # wrapped condition text
+                rows[-1]["operation"] += " " + line.strip()
+            continue
+        loops = int(m["loops"]) if m["loops"] else None
+        last = _num(m["last"])
+        rows.append({
+            "depth": len(m["indent"]) // 4,
+            "operation": "  " * (len(m["indent"]) // 4) + m["op"],
+            "est_rows": _num(m["est"]),
+            "est_cost": _num(m["cost"]),
+            "actual_rows": _num(m["rows"]),
+            "loops": loops,
+            "first_row_ms": _num(m["first"]),
+            "total_ms": last * loops if last is not None and loops else last,
+        })
+    return rows
+
+
+# ── index advisor ────────────────────────────────────────────────────────────
+def _aliases(sql: str) -> dict[str, str]:
+    """alias → table, from FROM / JOIN / UPDATE clauses (best effort)."""
+    out = {}
+    for tbl, alias in _FROM_RE.findall(sql):
+        out[tbl] = tbl
+        if alias:
+            out[alias] = tbl
+    return out
+
+
+def _order_columns(sql: str) -> list[tuple[str | None, str]]:
+    m = _ORDER_RE.search(sql)
+    if not m:
+        return []
+    out = []
+    for part in m.group(1).split(","):
+        ident = re.match(r"\s*(?:`?(\w+)`?\.)?`?(\w+)`?\s*(?:ASC|DESC)?\s*$", part, re.I)
+        if not ident:
+            return []          # expressions cannot use an index
+        out.append((ident.group(1), ident.group(2)))
+    return out
+
+
+def _advise(get_connection, db: str, sql: str, steps: list[dict]) -> list[dict]:
+    aliases = _aliases(sql)
+    order_cols = _order_columns(sql)
+    sorted_by_filesort = any("filesort" in s["step"] for s in steps)
+    advice = []
+    for s in steps:
+        if not s["table"]:
+            continue
+        alias = s["table"]
+        tbl = aliases.get(alias, alias)
+        table_cols = {c[0] for c in catalog.columns(get_connection, db, tbl)}
+        if not table_cols:
+            continue            # derived table / CTE
+        cond = " ".join([s["condition"], s["ref"]])
+        eq = [c for a, c in _EQ_RE.findall(cond) + _EQ_REVERSED_RE.findall(cond)
+              if a == alias and c in table_cols]
+        rng = [c for a, c in _RANGE_RE.findall(cond) if a == alias and c in table_cols]
+        eq = list(dict.fromkeys(eq))
+        rng = [c for c in dict.fromkeys(rng) if c not in eq]
+        sort = [c for a, c in order_cols if (a in (None, alias, tbl)) and c in table_cols]
+        scanning = s["access"] in ("ALL", "index")
+        if not (scanning or sorted_by_filesort):
+            continue
+
+        cols = eq + rng[:1]
+        reason = []
+        if eq:
+            reason.append("equality on " + ", ".join(eq))
+        if rng:
+            reason.append("range on " + rng[0])
+        if sorted_by_filesort and sort and not rng and len(sort) == len(order_cols):
+            cols += [c for c in sort if c not in cols]
+            reason.append("ORDER BY " + ", ".join(sort))
+        if not cols:
+            continue
+
+        existing = catalog.indexes(get_connection, db, tbl)
+        covered = next((name for name, idx_cols, *_ in existing if idx_cols[:len(cols)] == cols), None)
+        name = ("idx_" + "_".join(cols))[:64]
+        advice.append({
+            "table": tbl,
+            "columns": ", ".join(cols),
+            "why": "; ".join(reason) + (f" – {s['access']} scan now" if scanning else ""),
+            "existing": covered or "",
+            "ddl": "" if covered else
+                   f"ALTER TABLE `{tbl}` ADD INDEX `{name}` ({', '.join(f'`{c}`' for c in cols)});",
+        })
+    return advice
+
+
+# ── entry point ──────────────────────────────────────────────────────────────
+def profile_script(get_connection, db: str, sql: str, analyze: bool = False,
+                   timeout_s: float = TIMEOUT_S) -> list[Profile]:
+    out = []
+    conn = cur = None
+    try:
+        conn = get_connection(db); cur = conn.cursor()
+        conn.discard()          # max_execution_time below is session state
+        if analyze and timeout_s:
+            try:
+                cur.execute("SET SESSION max_execution_time = %s", (int(timeout_s * 1000),))
+            except Exception:
+                pass
+        for stmt in iter_statements([sql]):
+            prof = Profile(stmt.no, stmt.sql)
+            out.append(prof)
+            if main_verb(stmt.sql) not in _EXPLAINABLE:
+                prof.error = "Only SELECT / WITH / INSERT / UPDATE / DELETE / REPLACE can be explained."
+                continue
+            try:
+                cur.execute(f"EXPLAIN FORMAT=JSON {stmt.sql}")
+                prof.plan_json = json.loads(cur.fetchone()[0])
+                _walk(prof.plan_json, 0, prof.steps)
+                prof.flags = _flags(prof.steps)
+                prof.advice = _advise(get_connection, db, stmt.sql, prof.steps)
+                if analyze and is_read_only(stmt.sql):   # EXPLAIN ANALYZE executes it
+                    cur.execute(f"EXPLAIN ANALYZE {stmt.sql}")
+                    prof.analyze = _parse_analyze(cur.fetchone()[0])
+            except Exception as e:
+                prof.error = str(e)
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+    return out
+
+
+# ── Streamlit view ───────────────────────────────────────────────────────────
+def render_profile(prof: Profile):
+    head = prof.sql if len(prof.sql) <= 80 else prof.sql[:77] + "…"
+    with st.container(border=True):
+        st.markdown(f"##### Statement {prof.no}")
+        st.code(head, language="sql")
+        if prof.error:
+            st.error(prof.error)
+            return
+        for flag in prof.flags:
+            st.warning(flag)
+        if not prof.flags:
+            st.success("No full scans, filesorts or temporary tables in the plan.")
+
+        st.markdown("**Plan (estimates)**")
+        st.dataframe(
+            [{k: v for k, v in s.items() if k not in ("depth", "table", "ref")} for s in prof.steps],
+            hide_index=True, use_container_width=True,
+        )
+        if prof.analyze:
+            st.markdown("**EXPLAIN ANALYZE (actual)**")
+            st.dataframe(
+                [{k: v for k, v in r.items() if k != "depth"} for r in prof.analyze],
+                hide_index=True, use_container_width=True,
+                column_config={"total_ms": st.column_config.ProgressColumn(
+                    "total ms", format="%.2f", min_value=0,
+                    max_value=max((r["total_ms"] or 0 for r in prof.analyze), default=0) or 1,
+                )},
+            )
+        if prof.advice:
+            st.markdown("**Index suggestions**")
+            st.dataframe(prof.advice, hide_index=True, use_container_width=True)
+            ddl = "\n".join(a["ddl"] for a in prof.advice if a["ddl"])
+            if ddl:
+                st.code(ddl, language="sql")
+        st.caption("Raw JSON plan")
+        st.json(prof.plan_json, expanded=False)
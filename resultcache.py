@@ -0,0 +1,294 @@
+# resultcache.py
+"""
+resultcache.py  –  Process-wide LRU cache of read-only query results.
+
+Public API (used by preview.py, edit.py, sql_runner.py and the write paths):
+    configure(max_mb)                                   → set the memory budget
+    query(get_connection, db, sql, params=(), tables=None) → (columns, rows)
+    frame(get_connection, db, sql, params=(), tables=None,
+          overrides=None, read_only=True)               → compact DataFrame
+    lookup(get_connection, db, sql, params=(), tables=None, variant=())
+                                                        → (key, hit | None)
+    store(key, columns, rows, total=None, size=None)
+    cacheable(sql)                                      → bool
+    invalidate(db:str|None = None)                      → after a write
+    stats()                                             → {hits, misses, …}
+
+Entries are keyed on (database, normalised SQL, parameters, version).
+The version is the newest `information_schema.TABLES.UPDATE_TIME` of the
+tables involved (the named `tables`, or the whole database when they are
+not known) plus an in-process write generation that every write path of
+this app bumps through `invalidate()`.  So a write made here is visible
+on the very next read, and one made by another client as soon as MySQL
+reports it in UPDATE_TIME.  UPDATE_TIME has one-second resolution, so a
+second write in the same second would not move it: results are not
+stored while the newest UPDATE_TIME is under _SETTLE_S seconds old by
+the server's clock.  MySQL 8 also serves UPDATE_TIME from a stats cache
+(24 h by default); the probe's connection turns that off with
+`information_schema_stats_expiry = 0`.  Writes that never show up in
+UPDATE_TIME (e.g. to tables of engines that do not keep it) are only
+seen after an `invalidate()`.  A statement that names `other_db.table`
+is versioned on every schema it qualifies a name with as well (a table
+alias in that list matches no schema and costs nothing), and
+`invalidate(other_db)` drops it.
+
+Only plain SELECT / TABLE statements (after any WITH list) without
+locking clauses, INTO, non-deterministic functions, user or system
+variables or live system schemas are cached.  Entries
+are sized approximately (frames by their real memory usage, see
+frames.py); the cache drops least-recently-used entries to
+stay within `max_mb` and never keeps one result larger than a quarter
+of it.
+"""
+
+from __future__ import annotations
+import re
+import threading
+from collections import OrderedDict
+
+from pool import read_cursor
+from sqlscript import is_read_only
+
+RESULT_CACHE_MB = 64
+_MAX_ENTRY_SHARE = 0.25        # largest single result, as share of the budget
+_SAMPLE_ROWS = 20              # rows sampled to estimate a result's size
+_SETTLE_S = 2                  # UPDATE_TIME this recent (server clock) → do not store
+
+_lock = threading.Lock()
+_entries: OrderedDict[tuple, tuple[int, object]] = OrderedDict()   # key → (bytes, value)
+_generation: dict[str, int] = {}                                   # db → writes seen
+_epoch = 0                                                         # bumped by invalidate(None)
+_stats_expiry_off: set[int] = set()                                # connection ids already SET
+_budget = RESULT_CACHE_MB * 1_000_000
+_used = 0
+_hits = _misses = 0
+_latest: dict[tuple, tuple] = {}   # key without version → newest stored key
+
+_UNSAFE_RE = re.compile(
+    r"\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b|\bINTO\b"
+    r"|\b(NOW|SYSDATE|CURDATE|CURTIME|RAND|UUID|UUID_SHORT|SLEEP|LAST_INSERT_ID"
+    r"|FOUND_ROWS|ROW_COUNT|CONNECTION_ID|USER|SESSION_USER|SYSTEM_USER|DATABASE|SCHEMA"
+    r"|GET_LOCK|RELEASE_LOCK|IS_FREE_LOCK|IS_USED_LOCK|NEXTVAL)\s*\("
+    # these need no parentheses
+    r"|\b(CURRENT_(DATE|TIME|TIMESTAMP|USER|ROLE)|LOCALTIME|LOCALTIMESTAMP|UTC_\w+)\b"
+    r"|@"                                   # @user_var, @@system_var
+    r"|\b(information_schema|performance_schema|mysql|sys)\s*\.",
+    re.I,
+)
+_QUALIFIER_RE = re.compile(r"(?:`((?:[^`]|``)+)`|\b([A-Za-z_$][\w$]*))\s*\.\s*[`A-Za-z_$]")
+_COMMENT_RE = re.compile(r"/\*(?!!).*?\*/|--[ \t][^\n]*|#[^\n]*", re.S)
+
+
+# ── keys ─────────────────────────────────────────────────────────────────────
+def cacheable(sql: str) -> bool:
+    """Plain read whose result depends only on table contents."""
+    return is_read_only(sql) and not _UNSAFE_RE.search(sql)
+
+
+def _normalise(sql: str) -> str:
+    return " ".join(_COMMENT_RE.sub(" ", sql).split()).rstrip(";")
+
+
+def _freeze(params) -> tuple:
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params or ())
+
+
+def _schemas(db: str, sql: str) -> tuple:
+    """`db` plus every name `sql` qualifies something with (schemas, but also aliases)."""
+    others = {
+        (quoted.replace("``", "`") if quoted else plain)
+        for quoted, plain in _QUALIFIER_RE.findall(sql)
+    }
+    others.discard(db)
+    return (db, *sorted(others))
+
+
+def _generation_locked(schemas) -> tuple:
+    return (_epoch, tuple(_generation.get(s, 0) for s in schemas))
+
+
+def _version(get_connection, db: str, tables, others=()) -> tuple:
+    sql = (f"SELECT MAX(UPDATE_TIME), COUNT(*), MAX(UPDATE_TIME) > NOW() - INTERVAL {_SETTLE_S} SECOND"
+           " FROM information_schema.TABLES WHERE (TABLE_SCHEMA = %s")
+    params = [db]
+    if tables:
+        sql += " AND TABLE_NAME IN (" + ", ".join("%s" for _ in tables) + ")"
+        params += list(tables)
+    sql += ")"
+    if others:
+        sql += " OR TABLE_SCHEMA IN (" + ", ".join("%s" for _ in others) + ")"
+        params += list(others)
+    with _lock:
+        gen = _generation_locked((db, *others))   # read first: a later write wins
+    conn = cur = None
+    try:
+        conn = get_connection(); cur = conn.cursor()
+        conn_id = conn.connection_id
+        if conn_id not in _stats_expiry_off:
+            try:   # MySQL 8 otherwise serves UPDATE_TIME from a 24 h stats cache
+                cur.execute("SET SESSION information_schema_stats_expiry = 0")
+            except Exception:
+                pass   # MariaDB / 5.7 have no such cache
+            _stats_expiry_off.add(conn_id)
+        cur.execute(sql, params)
+        updated, count, recent = cur.fetchone()
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+    return (gen, str(updated), count, bool(recent))
+
+
+def _size(rows) -> int:
+    """Rough in-memory size of a list of tuples."""
+    if not rows:
+        return 64
+    step = max(len(rows) // _SAMPLE_ROWS, 1)
+    sample = rows[::step][:_SAMPLE_ROWS]
+    per_row = sum(
+        56 + sum(
+            (len(v) + 49) if isinstance(v, (str, bytes, bytearray)) else 32
+            for v in row
+        )
+        for row in sample
+    ) / len(sample)
+    return int(per_row * len(rows)) + 64
+
+
+# ── cache operations ─────────────────────────────────────────────────────────
+def configure(max_mb: float):
+    global _budget
+    with _lock:
+        _budget = int(max_mb * 1_000_000)
+        _evict_locked()
+
+
+def _evict_locked():
+    global _used
+    while _used > _budget and _entries:
+        key, (size, _) = _entries.popitem(last=False)
+        _latest.pop(key[:-1], None)
+        _used -= size
+
+
+def lookup(get_connection, db: str, sql: str, params=(), tables=None, variant=()):
+    """(key, cached (columns, rows, total) or None).  Pass the key to `store` on a miss.
+
+    `variant` keys anything else the cached value depends on (e.g. a row cap).
+    """
+    global _hits, _misses
+    sql = _normalise(sql)
+    schemas = _schemas(db, sql)
+    key = (db, sql, _freeze(params), tuple(tables or ()), variant, schemas,
+           _version(get_connection, db, tables, schemas[1:]))
+    with _lock:
+        hit = _entries.get(key)
+        if hit is not None:
+            _entries.move_to_end(key)
+            _hits += 1
+            return key, hit[1]
+        _misses += 1
+    return key, None
+
+
+def store(key: tuple, columns, rows, total: int | None = None, size: int | None = None):
+    global _used
+    size = _size(rows) if size is None else size
+    with _lock:
+        gen, _, _, recent = key[-1]
+        if size > _budget * _MAX_ENTRY_SHARE or recent or gen != _generation_locked(key[-2]):
+            return   # too big, still being written, or a write happened while the query ran
+        # an older version of the same query can never be hit again
+        for stale in {key, _latest.get(key[:-1])}:
+            old = _entries.pop(stale, None) if stale else None
+            if old:
+                _used -= old[0]
+        _latest[key[:-1]] = key
+        _entries[key] = (size, (columns, rows, len(rows) if total is None else total))
+        _used += size
+        _evict_locked()
+
+
+def query(get_connection, db: str, sql: str, params=(), tables=None):
+    """`(columns, rows)` of a statement run on `db`, cached when `cacheable`."""
+    key, hit = lookup(get_connection, db, sql, params, tables) if cacheable(sql) else (None, None)
+    if hit is not None:
+        return hit[0], hit[1]
+    conn = cur = None
+    try:
+        conn = get_connection(db); cur = conn.cursor()
+        cur.execute(sql, params)
+        cols = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+    if key is not None:
+        store(key, cols, rows)
+    return cols, rows
+
+
+def frame(get_connection, db: str, sql: str, params=(), tables=None,
+          overrides=None, read_only: bool = True):
+    """Result of `sql` as a compact DataFrame (frames.py), cached when `cacheable`.
+
+    The cached frame is shared between sessions; callers get a shallow
+    copy and must not modify values in place.
+    """
+    import frames   # pulls in pandas – only when a frame is asked for
+
+    key, hit = (
+        lookup(get_connection, db, sql, params, tables,
+               variant=("frame", read_only, tuple(sorted((overrides or {}).items()))))
+        if cacheable(sql) else (None, None)
+    )
+    if hit is not None:
+        return hit[1].copy(deep=False)
+    conn = cur = None
+    try:
+        conn = get_connection(db)
+        # read-only frames decode whole columns from raw bytes (pool.read_cursor);
+        # the editor keeps the connector's own conversion for exact round trips
+        cur, raw = read_cursor(conn) if read_only else (conn.cursor(), False)
+        cur.execute(sql, params)
+        df = frames.frame_from_cursor(cur, overrides, read_only, raw=raw)
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+    if key is not None:
+        store(key, list(df.columns), df, size=frames.frame_bytes(df))
+    return df.copy(deep=False)
+
+
+def invalidate(db: str | None = None):
+    """Drop cached results for `db` (or all) and bump its write generation."""
+    global _used, _epoch
+    with _lock:
+        if db is None:
+            _epoch += 1
+            _entries.clear()
+            _latest.clear()
+            _used = 0
+            return
+        _generation[db] = _generation.get(db, 0) + 1
+        for key in [k for k in _entries if db in k[-2]]:
+            _used -= _entries.pop(key)[0]
+            _latest.pop(key[:-1], None)
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "entries": len(_entries),
+            "mb_used": round(_used / 1e6, 2),
+            "mb_budget": round(_budget / 1e6, 2),
+            "hits": _hits,
+            "misses": _misses,
+        }
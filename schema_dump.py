@@ -0,0 +1,158 @@
+# schema_dump.py
+"""
+schema_dump.py  –  DDL of a whole database with few, parallel round trips.
+
+Public API (used by edit.py):
+    dump_schema(get_connection, db, workers=DUMP_WORKERS)  → str
+
+One information_schema query lists every table, view, routine, trigger
+and event together with its CREATE_TIME / UPDATE_TIME / LAST_ALTERED
+and an MD5 of its definition (view body, trigger action, a table's
+columns, indexes and foreign keys …).
+That listing is the cache key: if nothing changed since the last dump
+the cached text is returned straight away.  Otherwise the `SHOW CREATE …`
+calls are spread over `workers` pooled connections and run concurrently.
+"""
+
+from __future__ import annotations
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DUMP_WORKERS = 4
+_CACHE_SIZE = 32
+
+# kind → (SHOW CREATE keyword, column holding the DDL), in output order
+_SHOW_CREATE = {
+    "BASE TABLE": ("TABLE", 1),
+    "VIEW": ("VIEW", 1),
+    "FUNCTION": ("FUNCTION", 2),
+    "PROCEDURE": ("PROCEDURE", 2),
+    "TRIGGER": ("TRIGGER", 2),
+    "EVENT": ("EVENT", 3),
+}
+
+def _part_digest(view: str, columns: str) -> str:
+    """Per-table BIT_XOR of a 64-bit hash over each row of an information_schema view."""
+    return (
+        f"SELECT TABLE_NAME, BIT_XOR(CAST(CONV(LEFT(MD5(CONCAT_WS('|', {columns})), 16), 16, 10)"
+        f" AS UNSIGNED)) AS h FROM information_schema.{view}"
+        f" WHERE TABLE_SCHEMA = %s GROUP BY TABLE_NAME"
+    )
+
+
+# the MD5 column catches what the timestamps miss: views and triggers carry
+# no ALTER time, a drop + re-create can land in the same second, and an
+# INSTANT / INPLACE ALTER (new column, index rename, comment …) leaves a
+# table's CREATE_TIME and UPDATE_TIME alone – so base tables hash their
+# options, columns, indexes and foreign keys as well
+_INVENTORY_SQL = f"""
+    SELECT t.TABLE_TYPE, t.TABLE_NAME, t.CREATE_TIME, t.UPDATE_TIME,
+           MD5(CONCAT_WS('|', v.VIEW_DEFINITION, v.CHECK_OPTION, v.SECURITY_TYPE, v.DEFINER,
+                         t.ENGINE, t.TABLE_COLLATION, t.CREATE_OPTIONS, t.TABLE_COMMENT,
+                         c.h, s.h, k.h))
+      FROM information_schema.TABLES t
+      LEFT JOIN information_schema.VIEWS v
+        ON v.TABLE_SCHEMA = t.TABLE_SCHEMA AND v.TABLE_NAME = t.TABLE_NAME
+      LEFT JOIN ({_part_digest("COLUMNS",
+                               "COLUMN_NAME, ORDINAL_POSITION, COLUMN_TYPE, IS_NULLABLE, "
+                               "ISNULL(COLUMN_DEFAULT), COLUMN_DEFAULT, COLLATION_NAME, "
+                               "EXTRA, GENERATION_EXPRESSION, COLUMN_COMMENT")}) c
+        ON c.TABLE_NAME = t.TABLE_NAME
+      LEFT JOIN ({_part_digest("STATISTICS",
+                               "INDEX_NAME, SEQ_IN_INDEX, COLUMN_NAME, NON_UNIQUE, "
+                               "SUB_PART, INDEX_TYPE, COLLATION, INDEX_COMMENT")}) s
+        ON s.TABLE_NAME = t.TABLE_NAME
+      LEFT JOIN ({_part_digest("KEY_COLUMN_USAGE",
+                               "CONSTRAINT_NAME, ORDINAL_POSITION, COLUMN_NAME, "
+                               "REFERENCED_TABLE_SCHEMA, REFERENCED_TABLE_NAME, "
+                               "REFERENCED_COLUMN_NAME")}) k
+        ON k.TABLE_NAME = t.TABLE_NAME
+     WHERE t.TABLE_SCHEMA = %s
+    UNION ALL
+    SELECT ROUTINE_TYPE, ROUTINE_NAME, CREATED, LAST_ALTERED, MD5(ROUTINE_DEFINITION)
+      FROM information_schema.ROUTINES WHERE ROUTINE_SCHEMA = %s
+    UNION ALL
+    SELECT 'TRIGGER', TRIGGER_NAME, CREATED, NULL,
+           MD5(CONCAT_WS('|', ACTION_TIMING, EVENT_MANIPULATION, EVENT_OBJECT_TABLE,
+                         ACTION_ORDER, ACTION_STATEMENT, DEFINER))
+      FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = %s
+    UNION ALL
+    SELECT 'EVENT', EVENT_NAME, CREATED, LAST_ALTERED, MD5(EVENT_DEFINITION)
+      FROM information_schema.EVENTS   WHERE EVENT_SCHEMA = %s
+"""
+
+_lock = threading.Lock()
+_cache: dict[tuple, str] = {}   # (db, inventory) → DDL text
+
+
+def _s(val):
+    return val.decode("utf-8") if isinstance(val, (bytes, bytearray)) else val
+
+
+def _inventory(get_connection, db: str) -> tuple:
+    conn = cur = None
+    try:
+        conn = get_connection(); cur = conn.cursor()
+        cur.execute(_INVENTORY_SQL, (db,) * _INVENTORY_SQL.count("%s"))
+        rows = cur.fetchall()
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+    order = list(_SHOW_CREATE)
+    return tuple(sorted(
+        ((_s(kind), _s(name), created, altered, _s(digest))
+         for kind, name, created, altered, digest in rows if _s(kind) in _SHOW_CREATE),
+        key=lambda r: (order.index(r[0]), r[1]),
+    ))
+
+
+def _show_create(get_connection, db: str, objects) -> list[str | None]:
+    """SHOW CREATE for a batch of (kind, name) on one pooled connection."""
+    out = []
+    conn = cur = None
+    try:
+        conn = get_connection(db); cur = conn.cursor()
+        for kind, name in objects:
+            keyword, col = _SHOW_CREATE[kind]
+            cur.execute(f"SHOW CREATE {keyword} `{name}`")
+            row = cur.fetchone()
+            out.append(_s(row[col]) if row else None)   # None → no privilege
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+    return out
+
+
+def dump_schema(get_connection, db: str, workers: int = DUMP_WORKERS) -> str:
+    """`CREATE …;` statements for every object in `db`, tables first."""
+    inventory = _inventory(get_connection, db)
+    key = (db, inventory)
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+
+    objects = [(kind, name) for kind, name, *_ in inventory]
+    workers = max(1, min(workers, len(objects)))
+    batches = [objects[i::workers] for i in range(workers)]   # round-robin
+    ddl: dict[tuple, str | None] = {}
+    if objects:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                (batch, pool.submit(_show_create, get_connection, db, batch))
+                for batch in batches
+            ]
+            for batch, fut in futures:
+                ddl.update(zip(batch, fut.result()))
+
+    text = "".join(
+        f"{ddl[obj]};\n\n" for obj in objects if ddl.get(obj)
+    )
+    with _lock:
+        if len(_cache) >= _CACHE_SIZE:
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = text
+    return text
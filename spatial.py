@@ -0,0 +1,267 @@
+# spatial.py
+"""
+spatial.py  –  POINT columns with a SPATIAL INDEX, and area search.
+
+Public API (used by importer.py and app.py):
+    EOV_SRID                                    → 23700 (HD72 / EOV)
+    coordinate_pairs(columns)                   → [(x_col, y_col), …]  (EOVx/EOVy, …)
+    point_defs(x_col, y_col, srid=EOV_SRID, point_col="geom") → [column def, index def]
+    add_point_sql(tbl, x_col, y_col, srid=EOV_SRID, point_col="geom") → ALTER TABLE …
+    point_columns(get_connection, db, tbl)      → [(col, srid, spatial_index), …]
+    area_query(tbl, columns, point_col, srid, bbox=None, center=None, radius=None,
+               limit=…)                         → (sql, params)
+    render_point_builder(get_connection, db, tbl, columns, key)
+    render_area_search(get_connection, db, tbl)
+
+The point is a STORED generated column, so it follows its coordinate
+columns through imports and editor saves without anyone writing it, and
+it is NOT NULL with the SRID attribute – what InnoDB needs for a SPATIAL
+INDEX the optimiser will use.  Rows without coordinates get POINT(0 0),
+which lies far outside any EOV area of interest.
+
+EOV's "y" is the easting and "x" the northing, so a VMOEov_EOVx /
+VMOEov_EOVy pair becomes POINT(EOVy EOVx) in SRID 23700, a projected
+system in metres: ST_Distance returns metres and MBRContains compares
+plain coordinates.
+
+Area searches filter with MBRContains(box, point), which the spatial
+index answers as a range lookup; a radius search uses the circle's
+bounding box that way and then ST_Distance for the exact cut.
+"""
+
+from __future__ import annotations
+import re
+
+import streamlit as st
+
+import catalog
+import jobs
+import resultcache
+
+EOV_SRID = 23700
+AREA_LIMIT = 5_000                        # rows returned by one area search
+EOV_EXTENT = (420_000.0, 30_000.0, 940_000.0, 370_000.0)   # E/N bounds of Hungary
+
+
+
+def _text(val):
+    return val.decode("utf-8") if isinstance(val, (bytes, bytearray)) else val
+
+
+# ── schema ───────────────────────────────────────────────────────────────────
+def coordinate_pairs(columns) -> list[tuple[str, str]]:
+    """(x column, y column) pairs recognised by name: …EOVx/…EOVy first, then …x/…y."""
+    names = list(columns)
+    lower = {c.lower(): c for c in names}
+    out = []
+    for c in names:
+        m = re.match(r"^(.*?)EOVx$", c, re.I)
+        if m and (m.group(1) + "eovy").lower() in lower:
+            out.append((c, lower[(m.group(1) + "eovy").lower()]))
+    for c in names:
+        m = re.match(r"^(.*?)(?<![a-z])x$", c, re.I)
+        if m and (m.group(1) + "y").lower() in lower and all(c != x for x, _ in out):
+            out.append((c, lower[(m.group(1) + "y").lower()]))
+    return out
+
+
+def point_defs(x_col: str, y_col: str, srid: int = EOV_SRID,
+               point_col: str = "geom") -> list[str]:
+    """Column + SPATIAL INDEX definitions of POINT(y x), for CREATE / ALTER TABLE.
+
+    `x_col` / `y_col` follow EOV naming: x is the northing, y the easting.
+    """
+    east = f"CAST(COALESCE(`{y_col}`, 0) AS DOUBLE)"
+    north = f"CAST(COALESCE(`{x_col}`, 0) AS DOUBLE)"
+    return [
+        f"`{point_col}` POINT SRID {int(srid)} GENERATED ALWAYS AS "
+        f"(ST_SRID(POINT({east}, {north}), {int(srid)})) STORED NOT NULL",
+        f"SPATIAL INDEX `sp_{point_col}` (`{point_col}`)",
+    ]
+
+
+def add_point_sql(tbl: str, x_col: str, y_col: str, srid: int = EOV_SRID,
+                  point_col: str = "geom") -> str:
+    col, idx = point_defs(x_col, y_col, srid, point_col)
+    return f"ALTER TABLE `{tbl}`\n  ADD COLUMN {col},\n  ADD {idx}"
+
+
+def point_columns(get_connection, db: str, tbl: str) -> list[tuple[str, int | None, bool]]:
+    spatial = {
+        cols[0] for name, cols, _, kind in catalog.indexes(get_connection, db, tbl)
+        if kind == "SPATIAL" and cols
+    }
+    conn = cur = None
+    try:
+        conn = get_connection(); cur = conn.cursor()
+        cur.execute(
+            "SELECT COLUMN_NAME, SRS_ID FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND DATA_TYPE IN ('point', 'geometry') "
+            "ORDER BY ORDINAL_POSITION",
+            (db, tbl),
+        )
+        rows = cur.fetchall()
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+    return [(_text(c), srid, _text(c) in spatial) for c, srid in rows]
+
+
+# ── queries ──────────────────────────────────────────────────────────────────
+def _wkt_box(xmin, ymin, xmax, ymax) -> str:
+    return (f"POLYGON(({xmin} {ymin}, {xmax} {ymin}, {xmax} {ymax}, "
+            f"{xmin} {ymax}, {xmin} {ymin}))")
+
+
+def area_query(tbl: str, columns, point_col: str, srid: int, bbox=None,
+               center=None, radius: float | None = None, limit: int = AREA_LIMIT):
+    """SELECT of the rows inside `bbox` (E/N min/max) or within `radius` of `center`.
+
+    Adds `_east` / `_north` (and `_distance` for radius searches); the raw
+    geometry column itself is left out of the result.
+    """
+    plain = ", ".join(f"`{c}`" for c in columns if c != point_col)
+    sel = f"{plain}, ST_X(`{point_col}`) AS _east, ST_Y(`{point_col}`) AS _north"
+    if center is not None:
+        cx, cy = float(center[0]), float(center[1])
+        r = float(radius)
+        bbox = (cx - r, cy - r, cx + r, cy + r)
+        sql = (
+            f"SELECT {sel}, ST_Distance(`{point_col}`, ST_GeomFromText(%s, %s)) AS _distance "
+            f"FROM `{tbl}` "
+            f"WHERE MBRContains(ST_GeomFromText(%s, %s), `{point_col}`) "
+            f"HAVING _distance <= %s ORDER BY _distance LIMIT %s"
+        )
+        return sql, [f"POINT({cx} {cy})", srid, _wkt_box(*bbox), srid, r, int(limit)]
+    xmin, ymin, xmax, ymax = (float(v) for v in bbox)
+    sql = (
+        f"SELECT {sel} FROM `{tbl}` "
+        f"WHERE MBRContains(ST_GeomFromText(%s, %s), `{point_col}`) LIMIT %s"
+    )
+    return sql, [_wkt_box(min(xmin, xmax), min(ymin, ymax), max(xmin, xmax), max(ymin, ymax)),
+                 srid, int(limit)]
+
+
+def _explain(get_connection, db: str, sql: str, params) -> str:
+    """How MySQL reads the table for `sql`: "range on sp_geom", "ALL", …"""
+    conn = cur = None
+    try:
+        conn = get_connection(db); cur = conn.cursor()
+        cur.execute(f"EXPLAIN {sql}", params)
+        names = [d[0] for d in cur.description]
+        row = dict(zip(names, cur.fetchone()))
+    finally:
+        if cur is not None:
+            cur.close()
+        if conn is not None:
+            conn.close()
+    kind, key = _text(row.get("type")), _text(row.get("key"))
+    return f"{kind} on `{key}`" if key else f"{kind} (no index)"
+
+
+# ── Streamlit widgets ────────────────────────────────────────────────────────
+def _build_job(get_connection, db, sql):
+    def run(job):
+        conn = cur = None
+        try:
+            conn = get_connection(db); cur = conn.cursor()
+            job.on_cancel(lambda: jobs.kill_query(get_connection, conn.connection_id))
+            job.update(message="rebuilding the table with the point column…")
+            cur.execute(sql)
+        finally:
+            catalog.invalidate(db)
+            resultcache.invalidate(db)
+            if cur is not None:
+                cur.close()
+            if conn is not None:
+                conn.close()
+    return run
+
+
+def render_point_builder(get_connection, db: str, tbl: str, columns, key: str):
+    """Offer to add a POINT column + SPATIAL INDEX from a coordinate pair."""
+    pairs = coordinate_pairs(columns)
+    if not pairs:
+        st.info("No coordinate column pair (…EOVx / …EOVy, …x / …y) found.")
+        return
+    pair = st.selectbox(
+        "Coordinate columns (x = northing, y = easting)", pairs, key=f"{key}_pair",
+        format_func=lambda p: f"{p[0]} / {p[1]}",
+    )
+    srid = st.number_input("SRID", min_value=0, value=EOV_SRID, step=1, key=f"{key}_srid",
+                           help="23700 = HD72 / EOV")
+    sql = add_point_sql(tbl, pair[0], pair[1], int(srid))
+    st.code(sql, language="sql")
+    if st.button("Build POINT column + SPATIAL INDEX", key=f"{key}_go"):
+        try:
+            job = jobs.submit("spatial", f"Spatial index on `{db}`.`{tbl}`",
+                              _build_job(get_connection, db, sql), db=db)
+            st.success(f"Queued as job `{job.id}` – see the Jobs page for progress.")
+        except jobs.JobQueueFull as e:
+            st.error(e)
+
+
+def render_area_search(get_connection, db: str, tbl: str):
+    columns = [c[0] for c in catalog.columns(get_connection, db, tbl)]
+    try:
+        points = point_columns(get_connection, db, tbl)
+    except Exception as e:
+        st.error(f"Could not read spatial columns: {e}"); return
+    if not points:
+        st.caption(f"`{tbl}` has no POINT column yet.")
+        render_point_builder(get_connection, db, tbl, columns, key=f"sp_build_{db}_{tbl}")
+        return
+
+    key = f"sp_{db}_{tbl}"
+    point_col, srid, indexed = points[0]
+    if len(points) > 1:
+        point_col, srid, indexed = st.selectbox(
+            "Point column", points, key=f"{key}_col", format_func=lambda p: p[0],
+        )
+    srid = int(srid or 0)
+    if not indexed:
+        st.warning(f"`{point_col}` has no SPATIAL INDEX – searches scan the table.")
+
+    mode = st.radio("Search", ["Bounding box", "Radius"], horizontal=True, key=f"{key}_mode")
+    ext = EOV_EXTENT if srid == EOV_SRID else (0.0, 0.0, 0.0, 0.0)
+    a, b, c, d = st.columns(4)
+    if mode == "Bounding box":
+        bbox = (
+            a.number_input("min easting", value=ext[0], key=f"{key}_x0"),
+            b.number_input("min northing", value=ext[1], key=f"{key}_y0"),
+            c.number_input("max easting", value=ext[2], key=f"{key}_x1"),
+            d.number_input("max northing", value=ext[3], key=f"{key}_y1"),
+        )
+        query = dict(bbox=bbox)
+    else:
+        center = (
+            a.number_input("centre easting", value=(ext[0] + ext[2]) / 2, key=f"{key}_cx"),
+            b.number_input("centre northing", value=(ext[1] + ext[3]) / 2, key=f"{key}_cy"),
+        )
+        radius = c.number_input("radius (SRS units, m for EOV)", min_value=0.0,
+                                value=5_000.0, key=f"{key}_r")
+        query = dict(center=center, radius=radius)
+    limit = st.number_input("Max rows", min_value=1, max_value=100_000,
+                            value=AREA_LIMIT, key=f"{key}_limit")
+
+    if st.button("Search area", key=f"{key}_go"):
+        sql, params = area_query(tbl, columns, point_col, srid, limit=int(limit), **query)
+        try:
+            cols, rows = resultcache.query(get_connection, db, sql, params, tables=(tbl,))
+            access = _explain(get_connection, db, sql, params)
+        except Exception as e:
+            st.error(f"Area search failed: {e}"); return
+        st.session_state[f"{key}_result"] = (cols, rows, access)
+
+    result = st.session_state.get(f"{key}_result")
+    if result:
+        import pandas as pd
+
+        cols, rows, access = result
+        df = pd.DataFrame(rows, columns=cols)
+        st.caption(f"{len(df):,} row(s) · table access: {access}")
+        if len(df):
+            st.scatter_chart(df, x="_east", y="_north", use_container_width=True)
+        st.dataframe(df, use_container_width=True)
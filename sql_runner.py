@@ -0,0 +1,302 @@
+# sql_runner.py
+"""
+sql_runner.py  –  Run SQL-editor scripts off the Streamlit script thread.
+
+Public API (used by edit.py):
+    ScriptRun(get_connection, db, sql, row_cap=…, timeout_s=…, fetch_size=…)
+        .start()                  → queue it as a background job (jobs.py)
+        .cancel(get_connection)   → KILL QUERY from a side connection
+        .done / .results / .error / .committed / .cancelled / .job
+    FanOut(get_connection, dbs, sql, workers=…, stop_on_error=True, **run_opts)
+        .start() / .cancel(get_connection)
+        .runs {db: ScriptRun} / .skipped / .not_started / .done / .summary()
+
+The script is split with `sqlscript` (so DELIMITER blocks work) and
+each statement runs on its own.  The worker pulls every result set with
+`fetchmany`, keeps at most `row_cap` rows per statement (the rest are
+read and counted, never stored) and runs with `max_execution_time` set,
+so neither a runaway SELECT nor a huge result can take the app down.  Because the script
+thread only polls the run, a Cancel button stays clickable meanwhile.
+
+`FanOut` runs the same script against many databases (one schema per
+tenant) as a single job: a bounded thread pool of `workers` runs one
+ScriptRun per database, each in its own transaction.  With
+`stop_on_error` the first failure stops databases that have not started
+yet (running ones finish; the others are `skipped`); otherwise every
+database is tried.  Cancel stops running databases and records the ones
+it kept from starting in `not_started`.
+
+Leading read-only SELECTs are answered from `resultcache` when the
+tables of the database have not changed; once a script writes or runs
+anything else, the rest of it goes to the server.
+"""
+
+from __future__ import annotations
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import catalog
+import jobs
+import resultcache
+from sqlscript import iter_statements
+
+ROW_CAP = 1_000        # rows kept per result set
+TIMEOUT_S = 30         # server-side limit per SELECT (0 = none)
+FETCH_SIZE = 500       # rows per fetchmany round trip
+FANOUT_WORKERS = 4     # databases a fan-out runs at the same time
+
+
+@dataclass
+class StatementResult:
+    idx: int
+    columns: list[str] | None = None      # None → statement without rows
+    rows: list[tuple] = field(default_factory=list)
+    total: int = 0                        # rows produced (≥ len(rows))
+    rowcount: int = 0                     # affected rows for writes
+    done: bool = False
+    cached: bool = False                  # served from resultcache
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.rows)
+
+
+class ScriptRun:
+    def __init__(
+        self,
+        get_connection,
+        db: str,
+        sql: str,
+        *,
+        row_cap: int = ROW_CAP,
+        timeout_s: float = TIMEOUT_S,
+        fetch_size: int = FETCH_SIZE,
+        use_cache: bool = True,
+    ):
+        self._get_connection = get_connection
+        self.db, self.sql = db, sql
+        self.row_cap, self.timeout_s, self.fetch_size = row_cap, timeout_s, fetch_size
+        self.use_cache = use_cache
+
+        self.results: list[StatementResult] = []
+        self.error: str | None = None
+        self.committed = False
+        self.cancelled = False
+        self.done = False
+        self.conn_id: int | None = None
+        self.job: jobs.Job | None = None
+        self._started = False
+
+    # ── control ─────────────────────────────────────────────────────────────
+    def start(self):
+        """Queue the script on the shared job pool (may raise JobQueueFull)."""
+        self.job = jobs.submit(
+            "sql", f"SQL script on `{self.db}`", self._job, db=self.db
+        )
+        self.job.on_cancel(self.cancel)
+        return self
+
+    def cancel(self, get_connection=None):
+        """Abort the statement in flight; the worker then rolls back."""
+        if self.cancelled:
+            return
+        self.cancelled = True
+        if self.job is not None:
+            jobs.cancel(self.job.id)             # comes back here via on_cancel
+        if not self._started and not self.done:
+            self.error, self.done = "Cancelled by user.", True   # never ran
+        if self.done or self.conn_id is None:
+            return
+        jobs.kill_query(get_connection or self._get_connection, self.conn_id)
+
+    def _job(self, job):
+        self._run()
+        job.result = [
+            {"statement": r.idx, "rows": r.total, "affected": r.rowcount, "cached": r.cached}
+            for r in self.results
+        ]
+        if self.error:
+            raise RuntimeError(self.error)
+        return job.result
+
+    # ── worker ──────────────────────────────────────────────────────────────
+    def _set_timeout(self, cur):
+        if not self.timeout_s:
+            return
+        try:
+            cur.execute(
+                "SET SESSION max_execution_time = %s", (int(self.timeout_s * 1000),)
+            )
+        except Exception:   # MariaDB spells it differently
+            cur.execute("SET SESSION max_statement_time = %s", (float(self.timeout_s),))
+
+    def _drain(self, cur, res: StatementResult):
+        while batch := cur.fetchmany(self.fetch_size):
+            room = self.row_cap - len(res.rows)
+            if room > 0:
+                res.rows.extend(batch[:room])
+            res.total += len(batch)
+
+    def _run(self):
+        any_write = False
+        conn = cur = None
+        self._started = True
+        try:
+            if self.cancelled:
+                raise InterruptedError
+            conn = self._get_connection(self.db); cur = conn.cursor()
+            conn.discard()   # free-form SQL may change session state
+            self.conn_id = conn.connection_id
+            self._set_timeout(cur)
+
+            pristine = self.use_cache   # no write / session change so far
+            for stmt in iter_statements([self.sql]):
+                res = StatementResult(stmt.no)
+                self.results.append(res)
+                key = None
+                if pristine and resultcache.cacheable(stmt.sql):
+                    key, hit = resultcache.lookup(
+                        self._get_connection, self.db, stmt.sql, variant=(self.row_cap,)
+                    )
+                    if hit is not None:
+                        res.columns, rows, res.total = hit
+                        res.rows, res.cached, res.done = list(rows), True, True
+                        continue
+                else:
+                    pristine = False
+                cur.execute(stmt.sql)
+                if cur.with_rows:
+                    res.columns = [d[0] for d in cur.description]
+                    self._drain(cur, res)
+                    if key is not None:
+                        resultcache.store(key, res.columns, res.rows, res.total)
+                else:
+                    any_write, pristine = True, False   # SET / USE / DML change what follows
+                    res.rowcount = cur.rowcount
+                res.done = True
+                if self.cancelled:
+                    raise InterruptedError
+
+            if any_write:
+                conn.commit()
+                self.committed = True
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            self.error = "Cancelled by user." if self.cancelled else str(e)
+        finally:
+            if any_write or self.error:
+                catalog.invalidate()   # scripts may run DDL on any schema
+                resultcache.invalidate()
+            try:
+                if cur is not None:
+                    cur.close()
+            except Exception:
+                pass
+            if conn is not None:
+                conn.close()
+            self.done = True
+
+
+class FanOut:
+    def __init__(
+        self,
+        get_connection,
+        dbs,
+        sql: str,
+        *,
+        workers: int = FANOUT_WORKERS,
+        stop_on_error: bool = True,
+        **run_opts,
+    ):
+        self._get_connection = get_connection
+        self.sql = sql
+        self.workers, self.stop_on_error = max(int(workers), 1), stop_on_error
+        self.runs = {db: ScriptRun(get_connection, db, sql, **run_opts) for db in dbs}
+        self.skipped: set[str] = set()       # not run: an earlier database failed
+        self.not_started: set[str] = set()   # not run: the fan-out was cancelled
+        self.stopped = False          # no new databases are started
+        self.cancelled = False
+        self.done = False
+        self.job: jobs.Job | None = None
+        self._lock = threading.Lock()
+
+    # ── control ─────────────────────────────────────────────────────────────
+    def start(self):
+        """Queue the fan-out as one job (may raise JobQueueFull)."""
+        self.job = jobs.submit(
+            "fanout", f"SQL script on {len(self.runs)} database(s)", self._job
+        )
+        self.job.on_cancel(self.cancel)
+        return self
+
+    def cancel(self, get_connection=None):
+        # under the lock: every database `_one` has started is seen here,
+        # and none is started after it
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = self.stopped = True
+            started = [run for run in self.runs.values() if run._started]
+        if self.job is not None:
+            jobs.cancel(self.job.id)
+        for run in started:
+            if not run.done:
+                run.cancel(get_connection)
+
+    # ── worker ──────────────────────────────────────────────────────────────
+    def _one(self, db: str, run: ScriptRun):
+        with self._lock:
+            if self.stopped:
+                (self.not_started if self.cancelled else self.skipped).add(db)
+                run.done = True
+                return
+            run._started = True
+        run._run()
+        if run.error and self.stop_on_error:
+            with self._lock:
+                self.stopped = True
+
+    def _job(self, job):
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="fanout",
+                                    initializer=jobs.adopt, initargs=(job,)) as pool:
+                futures = [pool.submit(self._one, db, run) for db, run in self.runs.items()]
+                for n, _ in enumerate(as_completed(futures), 1):
+                    failed = sum(1 for r in self.runs.values() if r.error)
+                    job.update(n / len(futures), f"{n}/{len(futures)} databases, {failed} failed")
+        finally:
+            self.done = True
+        job.result = self.summary()
+        failed = [row["database"] for row in job.result if row["status"] == "failed"]
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {len(self.runs)} database(s) failed: "
+                               + ", ".join(failed))
+        return job.result
+
+    def summary(self) -> list[dict]:
+        """One row per database: status, statements, affected / returned rows, error."""
+        out = []
+        for db, run in self.runs.items():
+            if db in self.skipped:
+                status = "skipped"
+            elif db in self.not_started:
+                status = "cancelled"
+            elif not run.done:
+                status = "running" if run._started else "queued"
+            elif run.error:
+                status = "cancelled" if run.cancelled else "failed"
+            else:
+                status = "committed" if run.committed else "ok"
+            out.append({
+                "database": db,
+                "status": status,
+                "statements": sum(1 for r in run.results if r.done),
+                "affected": sum(r.rowcount for r in run.results if r.columns is None),
+                "rows": sum(r.total for r in run.results if r.columns is not None),
+                "error": run.error or "",
+            })
+        return out
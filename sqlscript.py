@@ -0,0 +1,344 @@
+# sqlscript.py
+"""
+sqlscript.py  –  Incremental SQL script splitter and batch runner.
+
+Public API (used by app.py / sql_runner.py):
+    iter_statements(chunks, delimiter=";")   → Statement(no, sql)…
+    split_sql(text)                          → [sql, …]
+    read_chunks(text_file, size=CHUNK_CHARS) → str chunks of a text file
+    main_verb(sql)                           → "SELECT", "UPDATE", … ("" if none)
+    is_read_only(sql)                        → bool  (SELECT / TABLE / VALUES, CTEs allowed)
+    run_script(conn, statements, start_at=1, skip=(), batch_size=…, …)
+                                             → ScriptReport
+
+The splitter understands what the `mysql` command-line client does:
+`DELIMITER` lines, '…' "…" `…` quoting (backslash and doubled-quote
+escapes), `--`, `#` and `/* … */` comments, and BEGIN … END bodies of
+CREATE PROCEDURE / FUNCTION / TRIGGER / EVENT written without a custom
+delimiter (CASE … END CASE statements and labelled blocks included).
+It is fed text chunk by chunk and keeps only the statement being
+assembled in memory, so dumps of any size can be streamed from disk.
+"""
+
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from typing import Iterable, NamedTuple
+
+CHUNK_CHARS = 1 << 20        # 1 MiB of text per read
+BATCH_SIZE = 200             # statements per COMMIT in run_script
+
+_COMPOUND_KINDS = {"PROCEDURE", "FUNCTION", "TRIGGER", "EVENT"}
+_HEAD_WORDS = 6              # words inspected to spot a compound CREATE
+_DELIMITER_RE = re.compile(r"[ \t]*DELIMITER[ \t]+(\S+)[ \t]*\r?(?:\n|$)", re.I)
+_END_BLOCK_RE = re.compile(r"\s+(IF|LOOP|WHILE|REPEAT|CASE)\b", re.I)
+_LABEL_RE = re.compile(r"[ \t]*:(?!=)")
+# after these words a compound body expects a new statement (where CASE is
+# the CASE statement, closed by END CASE, rather than a CASE expression)
+_STATEMENT_OPENERS = {"BEGIN", "THEN", "ELSE", "DO", "LOOP", "REPEAT"}
+_READ_VERBS = {"SELECT", "TABLE", "VALUES"}
+_CTE_VERBS = _READ_VERBS | {"UPDATE", "DELETE", "INSERT", "REPLACE"}
+# quoted text and comments are skipped; /*! … */ is code to MySQL, so only
+# its markers are
+_QUERY_TOKEN_RE = re.compile(
+    r"'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'|\"[^\"\\]*(?:(?:\\.|\"\")[^\"\\]*)*\"|`[^`]*(?:``[^`]*)*`"
+    r"|/\*(?!!).*?\*/|/\*!\d*|\*/|(?:--(?=[ \t\r\n]|$)|\#)[^\n]*"
+    r"|(?P<p>[()])|(?P<w>[A-Za-z_][A-Za-z_0-9$]*)",
+    re.S,
+)
+_CLOSERS = {
+    "'": re.compile(r"'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'", re.S),
+    '"': re.compile(r'"[^"\\]*(?:(?:\\.|"")[^"\\]*)*"', re.S),
+    "`": re.compile(r"`[^`]*(?:``[^`]*)*`"),
+}
+
+
+class Statement(NamedTuple):
+    no: int        # 1-based position in the script
+    sql: str
+
+
+def _token_re(delimiter: str, words: bool) -> re.Pattern:
+    alts = [
+        r"(?P<q>['\"`])",
+        r"(?P<lc>--(?=[ \t\r\n]|$)|\#)",
+        r"(?P<bc>/\*)",
+        r"(?P<nl>\n)",
+        r"(?P<d>" + re.escape(delimiter) + ")",
+    ]
+    if words:
+        alts.append(r"(?P<w>[A-Za-z_][A-Za-z_0-9]*)")
+    return re.compile("|".join(alts))
+
+
+class SqlSplitter:
+    """Push text in with `feed()`, get complete statements back."""
+
+    def __init__(self, delimiter: str = ";"):
+        self.buf = ""
+        self.pos = 0              # scan position in buf
+        self.start = 0            # start of the statement being built
+        self.count = 0
+        self._set_delimiter(delimiter)
+        self._reset_statement()
+
+    # ── state helpers ───────────────────────────────────────────────────────
+    def _set_delimiter(self, delimiter: str):
+        self.delimiter = delimiter
+        self._plain = _token_re(delimiter, words=False)
+        self._wordy = _token_re(delimiter, words=True)
+
+    def _reset_statement(self):
+        self.has_code = False     # any non-blank code since `start`
+        self.head: list[str] = []
+        self.compound: bool | None = None
+        self.blocks: list[str] = []   # open BEGIN / CASE statement / CASE expression
+        self.at_statement = False     # next word starts a statement in the body
+        self.skip_word = False        # the IF / CASE / … of an END IF, END CASE, …
+
+    def _emit(self, end: int, out: list):
+        sql = self.buf[self.start:end].strip()
+        if sql and self.has_code:     # comment-only tails are not statements
+            self.count += 1
+            out.append(Statement(self.count, sql))
+        self._reset_statement()
+
+    def _note_code(self, text: str):
+        if not self.has_code and text.strip():
+            self.has_code = True
+
+    def _word(self, word: str, m_end: int):
+        w = word.upper()
+        if self.compound is None:
+            self.head.append(w)
+            if self.head[0] not in ("CREATE", "ALTER"):
+                self.compound = False
+            elif w in _COMPOUND_KINDS:
+                self.compound = True
+            elif len(self.head) >= _HEAD_WORDS:
+                self.compound = False
+        elif self.compound:
+            if self.skip_word:
+                self.skip_word = False
+                return
+            if _LABEL_RE.match(self.buf, m_end):
+                return                    # `label:` – a statement still follows
+            at_statement, self.at_statement = self.at_statement, w in _STATEMENT_OPENERS
+            if w == "BEGIN":
+                self.blocks.append("BEGIN")
+            elif w == "CASE":
+                self.blocks.append("CASE" if at_statement else "CASE expr")
+            elif w == "END":
+                m = _END_BLOCK_RE.match(self.buf, m_end)
+                if m:
+                    self.skip_word = True
+                    if m.group(1).upper() != "CASE":
+                        return            # END IF / LOOP / … close no counted block
+                if self.blocks:
+                    self.blocks.pop()
+
+    # ── scanning ────────────────────────────────────────────────────────────
+    def _scan(self, eof: bool) -> list[Statement]:
+        out: list[Statement] = []
+        buf = self.buf
+        # without EOF only scan whole lines, so no token is cut in half
+        limit = len(buf) if eof else buf.rfind("\n", self.pos) + 1
+        while self.pos < limit:
+            # DELIMITER is a client command: only at the start of a statement line
+            if not self.has_code and (self.pos == 0 or buf[self.pos - 1] == "\n"):
+                m = _DELIMITER_RE.match(buf, self.pos)
+                if m:
+                    self._set_delimiter(m.group(1))
+                    self.pos = self.start = m.end()
+                    continue
+
+            pattern = self._wordy if self.compound is not False else self._plain
+            m = pattern.search(buf, self.pos, limit)
+            if m is None:
+                self._note_code(buf[self.pos:limit])
+                self.pos = limit
+                break
+            self._note_code(buf[self.pos:m.start()])
+            kind, j = m.lastgroup, m.start()
+
+            if kind == "nl":
+                self.pos = m.end()
+            elif kind == "q":
+                c = _CLOSERS[m.group()].match(buf, j)
+                if c is None or (c.end() == len(buf) and not eof):
+                    if not eof:
+                        break             # closing quote not read yet
+                    self.pos = len(buf)
+                else:
+                    self.pos = c.end()
+                self.has_code = True
+            elif kind == "bc":
+                k = buf.find("*/", j + 2)
+                if k < 0:
+                    if not eof:
+                        break
+                    k = len(buf) - 2
+                self.pos = k + 2
+            elif kind == "lc":
+                k = buf.find("\n", j)
+                self.pos = k if k >= 0 else len(buf)
+            elif kind == "w":
+                self.has_code = True
+                self._word(m.group(), m.end())
+                self.pos = m.end()
+            elif kind == "d":
+                if self.compound and self.blocks and self.delimiter == ";":
+                    self.pos = m.end()    # `;` inside a BEGIN … END body
+                    self.at_statement = True
+                    continue
+                self._emit(j, out)
+                self.pos = self.start = m.end()
+            # a quote / comment may have jumped past the line-aligned limit
+            limit = max(limit, min(self.pos, len(buf)))
+        return out
+
+    def feed(self, text: str) -> list[Statement]:
+        # drop text that belongs to statements already handed out
+        if self.start:
+            self.buf = self.buf[self.start:]
+            self.pos -= self.start
+            self.start = 0
+        self.buf += text
+        return self._scan(eof=False)
+
+    def close(self) -> list[Statement]:
+        out = self._scan(eof=True)
+        self._emit(len(self.buf), out)
+        self.buf, self.pos, self.start = "", 0, 0
+        return out
+
+
+# ── convenience wrappers ─────────────────────────────────────────────────────
+def iter_statements(chunks: Iterable[str], delimiter: str = ";"):
+    splitter = SqlSplitter(delimiter)
+    for chunk in chunks:
+        yield from splitter.feed(chunk)
+    yield from splitter.close()
+
+
+def split_sql(text: str) -> list[str]:
+    return [s.sql for s in iter_statements([text])]
+
+
+def read_chunks(text_file, size: int = CHUNK_CHARS):
+    while chunk := text_file.read(size):
+        yield chunk
+
+
+# ── classification ───────────────────────────────────────────────────────────
+def main_verb(sql: str) -> str:
+    """Keyword that decides what one statement does, upper-cased.
+
+    Leading parentheses are looked through, and for `WITH … AS (…)` it is
+    the statement after the CTE list – `WITH x AS (SELECT …) DELETE …`
+    is a DELETE.
+    """
+    depth, lead, cte = 0, True, False
+    for m in _QUERY_TOKEN_RE.finditer(sql):
+        if m.group("p"):
+            depth += 1 if m.group("p") == "(" else -1
+            continue
+        w = m.group("w")
+        if not w:
+            continue
+        w = w.upper()
+        if lead:
+            lead = False
+            if w != "WITH":
+                return w
+            cte = True
+        elif cte and depth == 0 and w in _CTE_VERBS:
+            return w
+    return ""
+
+
+def is_read_only(sql: str) -> bool:
+    """A query that only reads: SELECT / TABLE / VALUES (after any CTEs), no INTO."""
+    if main_verb(sql) not in _READ_VERBS:
+        return False
+    return not any(
+        (m.group("w") or "").upper() == "INTO" for m in _QUERY_TOKEN_RE.finditer(sql)
+    )
+
+
+# ── execution ────────────────────────────────────────────────────────────────
+# statements after which MySQL has committed everything on its own
+_IMPLICIT_COMMIT_RE = re.compile(
+    r"(?:\s+|--[^\n]*\n|\#[^\n]*\n|/\*(?!!).*?\*/)*"
+    r"(CREATE|ALTER|DROP|RENAME|TRUNCATE|GRANT|REVOKE|LOCK|UNLOCK)\b",
+    re.I | re.S,
+)
+
+
+@dataclass
+class ScriptReport:
+    executed: int = 0                 # statements run in this call
+    last_ok: int = 0                  # last statement known to be committed
+    resume_at: int | None = None      # where a re-run should start after an error
+    failed_no: int | None = None      # statement that raised
+    failed_sql: str | None = None
+    error: str | None = None
+
+
+def run_script(
+    conn,
+    statements: Iterable[Statement],
+    *,
+    start_at: int = 1,
+    skip=(),
+    batch_size: int = BATCH_SIZE,
+    on_progress=None,
+    should_stop=None,
+) -> ScriptReport:
+    """Execute statements in order, committing every `batch_size` of them.
+
+    Statements numbered below `start_at` or listed in `skip` are not run, so
+    a failed run can be resumed (optionally leaving out the bad statement).  On error the open batch is rolled back and `resume_at` points
+    at the first statement whose effect was lost (DDL commits implicitly, so
+    it never has to be repeated).  `on_progress(report)` is called after
+    each batch; `should_stop()` is polled between statements.
+    """
+    report = ScriptReport(last_ok=start_at - 1)
+    pending, last_run = 0, None     # statements since the last commit, newest of them
+    cur = conn.cursor()
+    try:
+        for stmt in statements:
+            if stmt.no < start_at or stmt.no in skip:
+                continue
+            if should_stop and should_stop():
+                conn.commit()
+                if pending:
+                    report.last_ok = last_run
+                report.resume_at, report.error = stmt.no, "Stopped."
+                return report
+            try:
+                cur.execute(stmt.sql)
+                if cur.with_rows:
+                    cur.fetchall()
+            except Exception as e:
+                conn.rollback()
+                report.resume_at = report.last_ok + 1
+                report.failed_no, report.failed_sql, report.error = stmt.no, stmt.sql, str(e)
+                return report
+            report.executed += 1
+            last_run = stmt.no
+            if _IMPLICIT_COMMIT_RE.match(stmt.sql):
+                report.last_ok, pending = stmt.no, 0
+            else:
+                pending += 1
+                if pending >= batch_size:
+                    conn.commit()
+                    report.last_ok, pending = stmt.no, 0
+            if on_progress and report.executed % batch_size == 0:
+                on_progress(report)
+        conn.commit()
+        if pending:
+            report.last_ok = last_run
+    finally:
+        cur.close()
+    return report
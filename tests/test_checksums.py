@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from checksums import MIN_CHUNK_ROWS, Snapshot, find_conflicts, row_hash_sql
+from diff import FrameDiff
+
+
+class _Cursor:
+    def __init__(self, rows, description=None):
+        self.rows, self.description, self.sql = rows, description, None
+
+    def execute(self, sql, params=()):
+        self.sql, self.params = sql, list(params)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+def _frame(n):
+    df = pd.DataFrame({"id": np.arange(1, n + 1), "v": [f"r{i}" for i in range(n)]})
+    return df, np.arange(100, 100 + n, dtype=np.uint64)
+
+
+def test_row_hash_sql_flags_nulls():
+    sql = row_hash_sql(["a", "b"])
+    assert "ISNULL(`a`), `a`, ISNULL(`b`), `b`" in sql
+
+
+def test_numeric_keys_are_cut_into_ranges():
+    df, hashes = _frame(3 * MIN_CHUNK_ROWS)
+    snap = Snapshot.build(df, hashes, "id")
+    assert snap.bounds == [MIN_CHUNK_ROWS + 1, 2 * MIN_CHUNK_ROWS + 1]
+    assert list(snap.chunk_of([1, MIN_CHUNK_ROWS + 1, None])) == [0, 1, -1]
+    n, x = snap.digests[0]
+    assert n == MIN_CHUNK_ROWS
+    assert x == int(np.bitwise_xor.reduce(hashes[:MIN_CHUNK_ROWS]))
+
+
+def test_text_keys_are_one_chunk():
+    df = pd.DataFrame({"id": ["b", "a", "c"]})
+    snap = Snapshot.build(df, [1, 2, 4], "id")
+    assert snap.bounds == [] and snap.digests == {0: (3, 7)}
+
+
+def test_verify_returns_chunks_whose_digest_moved():
+    df, hashes = _frame(2 * MIN_CHUNK_ROWS)
+    snap = Snapshot.build(df, hashes, "id", where="`v` <> %s", params=("x",))
+    server = [(c, n, x) for c, (n, x) in snap.digests.items()]
+    server[1] = (server[1][0], server[1][1], server[1][2] ^ 1)
+    cur = _Cursor(server)
+    assert snap.verify(lambda db: _Conn(cur), "d", "t", ["id", "v"]) == [server[1][0]]
+    assert "WHERE (`v` <> %s) GROUP BY c" in cur.sql
+    assert cur.params == [*snap.bounds, "x"]
+
+
+def test_find_conflicts_only_reports_rows_changed_on_both_sides():
+    df = pd.DataFrame({"id": [1, 2, 3], "v": ["a", "b", "c"]})
+    snap = Snapshot.build(df, [11, 22, 33], "id")
+    current = {
+        1: (99, {"id": 1, "v": "theirs"}),     # changed by someone else
+        2: (22, {"id": 2, "v": "b"}),          # untouched
+    }                                          # 3 deleted by someone else
+    changes = FrameDiff(updates={1: {"v": "mine"}, 2: {"v": "ok"}, 3: {"v": "x"}},
+                        inserts=[{"id": 2, "v": "dup"}])
+    out = find_conflicts(snap, df, current, [0], changes)
+    assert [(c["pk"], c["kind"].split(" · ")[1]) for c in out] == [
+        (1, "changed by someone else"), (3, "deleted by someone else"),
+    ]
+    assert out[0]["theirs"] == "theirs" and out[0]["yours"] == "mine"
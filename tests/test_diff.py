@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from diff import diff_frames, diff_from_editor, to_py
+
+
+def _orig():
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "name": ["a", "b", "c", None],
+        "qty": [1.0, np.nan, 3.0, 4.0],
+        "total": [10, 20, 30, 40],            # generated column
+    })
+
+
+def test_to_py():
+    assert to_py(np.int64(3)) == 3 and type(to_py(np.int64(3))) is int
+    assert to_py(np.nan) is None
+    assert to_py(pd.NA) is None
+    assert to_py(pd.NaT) is None
+    assert to_py(pd.Timestamp("2024-01-02")).year == 2024
+
+
+def test_diff_frames_update_delete_insert():
+    orig = _orig()
+    edited = orig.copy()
+    edited.loc[0, "name"] = "A"
+    edited.loc[2, "total"] = 999              # generated → ignored
+    edited = edited[edited["id"] != 4]
+    edited = pd.concat([edited, pd.DataFrame([{"id": 5, "name": "e", "qty": 5.0}])],
+                       ignore_index=True)
+
+    d = diff_frames(orig, edited, "id", generated_cols={"total"})
+    assert d.deletes == [4]
+    assert d.updates == {1: {"name": "A"}}
+    assert d.inserts == [{"id": 5, "name": "e", "qty": 5.0}]
+
+
+def test_diff_frames_nan_is_not_a_change():
+    orig = _orig()
+    assert not diff_frames(orig, orig.copy(), "id")
+
+
+def test_diff_frames_changed_key_is_delete_plus_insert():
+    orig = _orig()
+    edited = orig.copy()
+    edited.loc[1, "id"] = 20
+    d = diff_frames(orig, edited, "id", generated_cols={"total"})
+    assert d.deletes == [2]
+    assert d.updates == {}
+    assert [row["id"] for row in d.inserts] == [20]
+
+
+def test_diff_frames_ignores_rows_without_key():
+    orig = _orig()
+    edited = pd.concat([orig, pd.DataFrame([{"id": None, "name": "x"}])], ignore_index=True)
+    assert not diff_frames(orig, edited, "id")
+
+
+def test_diff_from_editor():
+    orig = _orig()
+    edited = orig.copy()
+    edited.loc[0, "qty"] = 7.0
+    edited.loc[1, "id"] = 22                  # key change → update of the key itself
+    edited.loc[2, "name"] = "c"               # reported, but equal → dropped
+    # like st.data_editor: additions get the next labels, then deletions drop rows
+    added = pd.DataFrame([{"id": 9, "name": "n", "qty": 1.0, "total": 0},
+                          {"id": None, "name": "no key"}], index=[4, 5])
+    edited = pd.concat([edited, added]).drop(index=3)
+    state = {
+        "edited_rows": {"0": {"qty": 7.0}, "1": {"id": 22}, "2": {"name": "c"}},
+        "added_rows": [{"id": 9}, {"name": "no key"}],
+        "deleted_rows": [3],
+    }
+    d = diff_from_editor(orig, edited, state, "id", generated_cols={"total"})
+    assert d.deletes == [4]
+    assert d.updates == {1: {"qty": 7.0}, 2: {"id": 22}}
+    assert d.inserts == [{"id": 9, "name": "n", "qty": 1.0}]
+
+
+def test_diff_from_editor_never_blanks_a_key():
+    orig = _orig()
+    edited = orig.copy()
+    edited.loc[0, "id"] = None
+    edited.loc[0, "name"] = "z"
+    d = diff_from_editor(orig, edited, {"edited_rows": {0: {"id": None, "name": "z"}}}, "id")
+    assert d.updates == {1: {"name": "z"}}
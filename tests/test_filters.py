@@ -0,0 +1,53 @@
+import pytest
+
+from filters import FilterSpec, Predicate, index_report
+
+
+def test_predicates_compile_to_parameters():
+    assert Predicate("a", "=", "1").compile() == ("`a` = %s", ["1"])
+    assert Predicate("a", "≠", "1").compile() == ("`a` <> %s", ["1"])
+    assert Predicate("a", "between", "1", "5").compile() == ("`a` BETWEEN %s AND %s", ["1", "5"])
+    assert Predicate("a", "in", "1, 2 ,3").compile() == ("`a` IN (%s, %s, %s)", ["1", "2", "3"])
+    assert Predicate("a", "is null").compile() == ("`a` IS NULL", [])
+
+
+def test_like_wildcards_in_values_are_escaped():
+    assert Predicate("a", "starts with", "50%_x").compile() == ("`a` LIKE %s", ["50\\%\\_x%"])
+    assert Predicate("a", "contains", "a\\b").compile() == ("`a` LIKE %s", ["%a\\\\b%"])
+
+
+def test_select_with_where_order_and_limit():
+    spec = FilterSpec(
+        [Predicate("a", "=", "1"), Predicate("b", ">", "2")],
+        order=[("c", True), ("a", False)], limit=10,
+    )
+    sql, params = spec.select("t", extra="1 AS x")
+    assert sql == ("SELECT *, 1 AS x FROM `t` WHERE `a` = %s AND `b` > %s "
+                   "ORDER BY `c` DESC, `a` ASC LIMIT %s")
+    assert params == ["1", "2", 10]
+
+
+def test_empty_spec_selects_everything():
+    spec = FilterSpec()
+    assert not spec
+    assert spec.select("t") == ("SELECT * FROM `t`", [])
+
+
+def test_validate_rejects_unknown_columns_and_operators():
+    with pytest.raises(ValueError, match="nope"):
+        FilterSpec([Predicate("nope", "=", "1")]).validate(["a"])
+    with pytest.raises(ValueError, match="LIKE"):
+        FilterSpec([Predicate("a", "LIKE", "1")]).validate(["a"])
+
+
+def test_index_report():
+    indexes = [("PRIMARY", ["id"], True, "BTREE"), ("ix_ab", ["a", "b"], False, "BTREE")]
+    spec = FilterSpec(
+        [Predicate("a", "=", "1"), Predicate("b", ">", "2"), Predicate("c", "contains", "x")],
+        order=[("b", False)],
+    )
+    rows = {r["condition"].split()[0]: r for r in index_report(spec, indexes)}
+    assert rows["`a`"]["index"] == "ix_ab" and rows["`a`"]["note"] == "index lookup"
+    assert rows["`b`"]["index"] == "ix_ab" and rows["`b`"]["note"] == "index range"
+    assert rows["`c`"]["index"] == "—" and "wildcard" in rows["`c`"]["note"]
+    assert rows["ORDER"]["index"] == "ix_ab"
@@ -0,0 +1,79 @@
+import datetime
+
+import pandas as pd
+from mysql.connector.constants import FieldFlag, FieldType
+
+from frames import (
+    CATEGORY_MIN_ROWS, frame_from_cursor, frame_from_rows, kinds_from_describe,
+    kinds_from_description,
+)
+
+
+def _desc(name, type_code, flags=0, charset=45):
+    return (name, type_code, None, None, None, None, True, flags, charset)
+
+
+class _Cursor:
+    def __init__(self, description, rows):
+        self.description, self.rows = description, list(rows)
+
+    def fetchmany(self, n):
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+
+def test_kinds():
+    desc = [_desc("a", FieldType.LONG, FieldFlag.UNSIGNED), _desc("b", FieldType.DOUBLE),
+            _desc("c", FieldType.DATETIME), _desc("d", FieldType.VAR_STRING),
+            _desc("e", FieldType.NEWDECIMAL)]
+    assert kinds_from_description(desc) == ["uint32", "float64", "datetime", "text", "object"]
+    assert kinds_from_describe([("p", "decimal(10,2)"), ("q", "decimal(20,2)"),
+                                ("r", "bigint unsigned"), ("s", "json")]) == {
+        "p": "float64", "q": "object", "r": "uint64", "s": "object",
+    }
+
+
+def test_nulls_give_nullable_integers_and_nan():
+    df = frame_from_rows(["i", "f", "t"], [(1, 1.5, "x"), (None, None, None)],
+                         ["int64", "float64", "text"], read_only=False)
+    assert str(df["i"].dtype) == "Int64" and df["i"].isna().tolist() == [False, True]
+    assert df["f"].isna().tolist() == [False, True]
+    assert df["t"].isna().tolist() == [False, True]
+
+
+def test_read_only_frames_are_narrowed():
+    n = CATEGORY_MIN_ROWS
+    rows = [(i, "ab"[i % 2]) for i in range(n)]
+    df = frame_from_rows(["i", "t"], rows, {"i": "int64", "t": "text"})
+    assert df["i"].dtype == "int8"
+    assert isinstance(df["t"].dtype, pd.CategoricalDtype)
+    df = frame_from_rows(["i", "t"], rows, {"i": "int64", "t": "text"}, read_only=False)
+    assert df["i"].dtype == "int64"
+    assert isinstance(df["t"].dtype, pd.StringDtype)
+
+
+def test_batches_are_concatenated_then_compacted():
+    desc = [_desc("i", FieldType.LONGLONG), _desc("t", FieldType.VAR_STRING)]
+    rows = [(i, "ab"[i % 2]) for i in range(3 * CATEGORY_MIN_ROWS)]
+    df = frame_from_cursor(_Cursor(desc, rows), batch_rows=CATEGORY_MIN_ROWS - 1)
+    assert len(df) == len(rows) and df["i"].tolist() == list(range(len(rows)))
+    assert df["i"].dtype == "int16"
+    assert isinstance(df["t"].dtype, pd.CategoricalDtype)
+
+
+def test_raw_rows_with_nulls_and_zero_dates():
+    desc = [_desc("i", FieldType.LONGLONG), _desc("d", FieldType.DATE),
+            _desc("e", FieldType.DATE), _desc("t", FieldType.VAR_STRING),
+            _desc("b", FieldType.BLOB, charset=63)]
+    rows = [
+        (bytearray(b"7"), bytearray(b"2024-01-02"), bytearray(b"2024-01-02"),
+         bytearray("é".encode()), bytearray(b"\xff")),
+        (None, None, bytearray(b"0000-00-00"), None, None),
+    ]
+    df = frame_from_cursor(_Cursor(desc, rows), raw=True)
+    assert df["i"].tolist()[0] == 7 and df["i"].isna().tolist() == [False, True]
+    assert df["d"].dtype.kind == "M" and df["d"].isna().tolist() == [False, True]
+    assert df["e"].tolist()[0] == pd.Timestamp(datetime.date(2024, 1, 2))
+    assert df["e"].isna().tolist() == [False, True]           # zero date → NULL
+    assert df["t"].tolist()[0] == "é" and df["t"].isna().tolist() == [False, True]
+    assert df["b"].tolist()[0] == b"\xff"
@@ -0,0 +1,124 @@
+import pytest
+
+import resultcache
+
+
+class _Server:
+    """Answers the version probe and counts the queries that reach it."""
+
+    def __init__(self):
+        self.updated, self.recent, self.queries = "2024-01-01 00:00:00", 0, 0
+
+    def __call__(self, db=None):
+        return _Conn(self)
+
+
+class _Cursor:
+    def __init__(self, server):
+        self.server, self.description = server, None
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+        if sql.startswith("SELECT") and "information_schema" not in sql:
+            self.server.queries += 1
+            self.description = [("x",)]
+
+    def fetchone(self):
+        return self.server.updated, 1, self.server.recent
+
+    def fetchall(self):
+        return [("x" * 100,)] * 10
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    connection_id = 1
+
+    def __init__(self, server):
+        self.server = server
+
+    def cursor(self):
+        return _Cursor(self.server)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    resultcache.invalidate(None)
+    resultcache.configure(resultcache.RESULT_CACHE_MB)
+    yield
+    resultcache.invalidate(None)
+    resultcache.configure(resultcache.RESULT_CACHE_MB)
+
+
+def test_cacheable():
+    assert resultcache.cacheable("SELECT * FROM t")
+    assert not resultcache.cacheable("SELECT * FROM t FOR UPDATE")
+    assert not resultcache.cacheable("SELECT NOW()")
+    assert not resultcache.cacheable("SELECT @x")
+    assert not resultcache.cacheable("UPDATE t SET a = 1")
+
+
+def test_repeated_query_is_served_from_cache():
+    server = _Server()
+    resultcache.query(server, "d", "SELECT * FROM t", tables=["t"])
+    resultcache.query(server, "d", "SELECT  *  FROM t;", tables=["t"])
+    assert server.queries == 1
+
+
+def test_write_or_newer_update_time_misses():
+    server = _Server()
+    resultcache.query(server, "d", "SELECT * FROM t")
+    resultcache.invalidate("d")
+    resultcache.query(server, "d", "SELECT * FROM t")
+    server.updated = "2024-01-01 00:00:01"
+    resultcache.query(server, "d", "SELECT * FROM t")
+    assert server.queries == 3
+    assert resultcache.stats()["entries"] == 1      # superseded versions are dropped
+
+
+def test_least_recently_used_entry_is_evicted():
+    server = _Server()
+    resultcache.configure(0.0016)                    # 1600 bytes: four 400-byte entries fit
+    keys = {q: resultcache.lookup(server, "d", f"SELECT {q} FROM t")[0] for q in "abcde"}
+    for q in "abcd":
+        resultcache.store(keys[q], ["x"], [(1,)], size=400)
+    resultcache.store(keys["c"], ["x"], [(2,)], size=400)   # replaced, not counted twice
+    assert resultcache.lookup(server, "d", "SELECT a FROM t")[1] is not None   # a is now newest
+    resultcache.store(keys["e"], ["x"], [(1,)], size=400)
+    assert resultcache.lookup(server, "d", "SELECT b FROM t")[1] is None
+    for q in "acde":
+        assert resultcache.lookup(server, "d", f"SELECT {q} FROM t")[1] is not None
+    assert resultcache.stats()["entries"] == 4
+
+
+def test_oversized_result_is_not_stored():
+    server = _Server()
+    resultcache.configure(0.001)
+    key, _ = resultcache.lookup(server, "d", "SELECT a FROM t")
+    resultcache.store(key, ["x"], [(1,)], size=251)
+    assert resultcache.stats()["entries"] == 0
+
+
+def test_store_after_a_concurrent_write_is_dropped():
+    server = _Server()
+    key, _ = resultcache.lookup(server, "d", "SELECT a FROM t")
+    resultcache.invalidate("d")
+    resultcache.store(key, ["x"], [(1,)])
+    assert resultcache.stats()["entries"] == 0
+
+
+def test_tables_written_in_the_last_seconds_are_not_cached():
+    server = _Server()
+    server.recent = 1                              # a same-second write would not show
+    resultcache.query(server, "d", "SELECT * FROM t")
+    resultcache.query(server, "d", "SELECT * FROM t")
+    assert server.queries == 2 and resultcache.stats()["entries"] == 0
+    server.recent = 0
+    resultcache.query(server, "d", "SELECT * FROM t")
+    resultcache.query(server, "d", "SELECT * FROM t")
+    assert server.queries == 3
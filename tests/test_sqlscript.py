@@ -0,0 +1,135 @@
+from sqlscript import is_read_only, iter_statements, main_verb, run_script, split_sql
+
+
+def test_case_statement_in_procedure():
+    sql = (
+        "CREATE PROCEDURE p() BEGIN CASE WHEN 1 THEN SELECT 1; END CASE; END; SELECT 9;"
+    )
+    assert split_sql(sql) == [
+        "CREATE PROCEDURE p() BEGIN CASE WHEN 1 THEN SELECT 1; END CASE; END",
+        "SELECT 9",
+    ]
+
+
+def test_case_expression_in_procedure():
+    sql = (
+        "CREATE FUNCTION f(x INT) RETURNS INT BEGIN\n"
+        "  DECLARE y INT;\n"
+        "  SET y = CASE WHEN x > 0 THEN 1 ELSE 0 END;\n"
+        "  CASE y WHEN 1 THEN SET y = 2; ELSE SET y = CASE x WHEN 0 THEN 3 END; END CASE;\n"
+        "  RETURN y;\n"
+        "END;\n"
+        "SELECT f(1);"
+    )
+    stmts = split_sql(sql)
+    assert len(stmts) == 2
+    assert stmts[0].endswith("RETURN y;\nEND")
+    assert stmts[1] == "SELECT f(1)"
+
+
+def test_labelled_loop():
+    sql = (
+        "CREATE PROCEDURE q() BEGIN\n"
+        "  DECLARE i INT DEFAULT 0;\n"
+        "  l1: LOOP\n"
+        "    SET i = i + 1;\n"
+        "    IF i > 3 THEN LEAVE l1; END IF;\n"
+        "  END LOOP l1;\n"
+        "END;\n"
+        "SELECT 2;"
+    )
+    stmts = split_sql(sql)
+    assert len(stmts) == 2
+    assert stmts[0].startswith("CREATE PROCEDURE q()") and stmts[0].endswith("END")
+    assert stmts[1] == "SELECT 2"
+
+
+def test_chunked_feed_matches_whole_text():
+    sql = (
+        "CREATE TRIGGER t BEFORE INSERT ON a FOR EACH ROW BEGIN\n"
+        "  CASE NEW.k WHEN 1 THEN SET NEW.v = 'x;y'; END CASE;\n"
+        "END;\n"
+        "INSERT INTO a VALUES (1);\n"
+    )
+    chunks = [sql[i:i + 7] for i in range(0, len(sql), 7)]
+    assert [s.sql for s in iter_statements(chunks)] == split_sql(sql)
+    assert len(split_sql(sql)) == 2
+
+
+def test_read_only_queries():
+    assert is_read_only("SELECT 1")
+    assert is_read_only("(SELECT a FROM t) UNION (SELECT a FROM u)")
+    assert is_read_only("WITH x AS (SELECT 1) SELECT * FROM x")
+    assert is_read_only("TABLE t")
+    assert is_read_only("SELECT 'INTO; DELETE' FROM t -- DELETE")
+
+
+def test_writes_are_not_read_only():
+    assert main_verb("WITH x AS (SELECT 1) DELETE FROM t WHERE id IN (SELECT * FROM x)") == "DELETE"
+    assert not is_read_only("WITH x AS (SELECT 1) UPDATE t JOIN x SET a = 1")
+    assert not is_read_only("SELECT * INTO OUTFILE '/tmp/t.csv' FROM t")
+    assert not is_read_only("/*!40000 DELETE FROM t */")
+    assert not is_read_only("SHOW TABLES")
+
+
+# ── run_script ───────────────────────────────────────────────────────────────
+class _Cursor:
+    with_rows = False
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql):
+        if sql in self.conn.failing:
+            raise RuntimeError(f"bad: {sql}")
+        self.conn.pending.append(sql)
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    def __init__(self, failing=()):
+        self.failing, self.pending, self.committed = set(failing), [], []
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.committed += self.pending
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+
+_SCRIPT = "INSERT 1; INSERT 2; INSERT 3; INSERT 4; INSERT 5; INSERT 6"
+
+
+def test_run_script_resumes_after_the_last_commit():
+    conn = _Conn(failing={"INSERT 5"})
+    report = run_script(conn, iter_statements([_SCRIPT]), batch_size=2)
+    assert (report.last_ok, report.resume_at, report.failed_no) == (4, 5, 5)
+    assert conn.committed == ["INSERT 1", "INSERT 2", "INSERT 3", "INSERT 4"]
+
+    conn.failing.clear()
+    report = run_script(conn, iter_statements([_SCRIPT]), start_at=5, batch_size=2)
+    assert (report.executed, report.last_ok, report.error) == (2, 6, None)
+
+
+def test_run_script_last_ok_is_a_statement_number_across_skips():
+    conn = _Conn(failing={"INSERT 6"})
+    report = run_script(conn, iter_statements([_SCRIPT]), start_at=2, skip={3, 4}, batch_size=10)
+    assert (report.last_ok, report.resume_at) == (1, 2)   # nothing of this run committed
+    conn.failing.clear()
+    report = run_script(conn, iter_statements([_SCRIPT]), start_at=2, skip={3, 4}, batch_size=10)
+    assert report.last_ok == 6
+    assert conn.committed == ["INSERT 2", "INSERT 5", "INSERT 6"]
+
+
+def test_run_script_stop_reports_the_last_statement_run():
+    conn = _Conn()
+    calls = iter([False, False, False, True])
+    report = run_script(conn, iter_statements([_SCRIPT]), skip={2}, batch_size=10,
+                        should_stop=lambda: next(calls))
+    assert (report.last_ok, report.resume_at, report.error) == (4, 5, "Stopped.")
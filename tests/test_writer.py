@@ -0,0 +1,88 @@
+from diff import FrameDiff
+from pool import PROFILES
+from writer import MAX_PARAMS, BatchWriter
+
+
+class _Cursor:
+    def __init__(self, log, prepared=False):
+        self.log, self.rowcount, self.prepared = log, 0, prepared
+
+    def execute(self, sql, params=()):
+        self.log.append((sql, list(params), self.prepared))
+        self.rowcount = sql.count("), (") + 1 if sql.startswith("INSERT") else 1
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    """Connection without a pool profile: write_cursor falls back to conn.cursor()."""
+
+    def __init__(self):
+        self.log = []
+
+    def cursor(self, prepared=False):
+        return _Cursor(self.log, prepared)
+
+
+class _LanConn(_Conn):
+    profile = PROFILES["lan"]
+
+
+def test_delete_is_chunked_and_reuses_statement_text():
+    conn = _Conn()
+    BatchWriter(conn, "t", chunk_size=2).delete("id", [1, 2, 3, 4, 5])
+    assert [params for _, params, _ in conn.log] == [[1, 2], [3, 4], [5]]
+    assert conn.log[0][0] == "DELETE FROM `t` WHERE `id` IN (%s, %s)"
+    assert conn.log[0][0] is conn.log[1][0]          # same object → no re-prepare
+    assert conn.log[2][0] == "DELETE FROM `t` WHERE `id` IN (%s)"
+
+
+def test_update_builds_case_per_column_and_assigns_the_key_last():
+    conn = _Conn()
+    BatchWriter(conn, "t").update("id", {1: {"id": 10, "a": "x"}, 2: {"id": 20, "a": "y"}})
+    (sql, params, _), = conn.log
+    assert sql == (
+        "UPDATE `t` SET "
+        "`a` = CASE `id` WHEN %s THEN %s WHEN %s THEN %s ELSE `a` END, "
+        "`id` = CASE `id` WHEN %s THEN %s WHEN %s THEN %s ELSE `id` END "
+        "WHERE `id` IN (%s, %s)"
+    )
+    assert params == [1, "x", 2, "y", 1, 10, 2, 20, 1, 2]
+
+
+def test_update_groups_rows_by_column_set():
+    conn = _Conn()
+    BatchWriter(conn, "t").update("id", {1: {"a": 1}, 2: {"b": 2}, 3: {"a": 3}, 4: {}})
+    assert len(conn.log) == 2
+    assert conn.log[0][1] == [1, 1, 3, 3, 1, 3]
+
+
+def test_insert_groups_by_columns_and_respects_the_parameter_limit():
+    conn = _Conn()
+    wide = {f"c{i}": i for i in range(MAX_PARAMS // 2 + 1)}
+    count = BatchWriter(conn, "t", chunk_size=500).insert(
+        [{"a": 1, "b": 2}, {"a": 3}, {"a": 4, "b": 5}, wide, dict(wide)]
+    )
+    assert [len(params) for _, params, _ in conn.log] == [4, 1, len(wide), len(wide)]
+    assert conn.log[0][0] == "INSERT INTO `t` (`a`, `b`) VALUES (%s, %s), (%s, %s)"
+    assert count == 5
+
+
+def test_apply_skips_updates_of_deleted_rows():
+    conn = _Conn()
+    changes = FrameDiff(deletes=[1], updates={1: {"a": 9}, 2: {"a": 8}}, inserts=[{"a": 7}])
+    BatchWriter(conn, "t").apply("id", changes, extra_deletes=[3])
+    kinds = [sql.split()[0] for sql, *_ in conn.log]
+    assert kinds == ["DELETE", "UPDATE", "INSERT"]
+    assert sorted(conn.log[0][1]) == [1, 3]
+    assert conn.log[1][1] == [2, 8, 2]
+
+
+def test_only_repeated_shapes_are_prepared():
+    conn = _LanConn()
+    writer = BatchWriter(conn, "t", chunk_size=2)
+    writer.delete("id", [1, 2, 3, 4, 5])       # two full chunks + a remainder
+    writer.delete("id", [6, 7])                # one-off
+    writer.insert([{"a": 1}])                  # one-off
+    assert [prepared for *_, prepared in conn.log] == [True, True, False, False, False]
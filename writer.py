@@ -0,0 +1,170 @@
+# writer.py
+"""
+writer.py  –  Set-based, chunked writes for the edit and add pages.
+
+Public API (used by edit.py / add.py):
+    BatchWriter(conn, tbl, chunk_size=DEFAULT_CHUNK_SIZE)
+        .delete(pk_col, pks)         → rows deleted
+        .update(pk_col, updates)     → rows updated   ({pk: {col: val}})
+        .insert(rows)                → rows inserted  ([{col: val}, …])
+        .apply(pk_col, changes)      → (inserted, updated, deleted)
+
+Every call sends one statement per *chunk* rather than per row or cell:
+    DELETE … WHERE pk IN (…)
+    UPDATE … SET c = CASE pk WHEN … THEN … END, … WHERE pk IN (…)
+    INSERT … VALUES (…), (…), …      (one multi-row statement per chunk)
+
+When a call sends the same full-chunk shape more than once, it goes
+through `pool.write_cursor(conn, repeated=True)`, which is server-side
+prepared under the default connection profile: MySQL parses the text
+once and the rows travel as binary parameters.  One-off shapes (the
+remainder chunk, a small save) use the text protocol, which needs one
+round trip instead of prepare + execute + close.  A prepared statement
+takes at most 65 535 parameters, so wide tables get proportionally
+shorter chunks.
+
+The writer never commits – the caller owns the transaction, so a whole
+save is still all-or-nothing.
+"""
+
+from __future__ import annotations
+from itertools import islice
+
+from pool import write_cursor
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_PARAMS = 65_535         # placeholders one prepared statement may hold
+
+
+def _chunks(items, size: int):
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+class BatchWriter:
+    def __init__(self, conn, tbl: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.conn = conn
+        self.tbl = tbl
+        self.chunk_size = max(int(chunk_size), 1)
+        self._sql: dict[tuple, str] = {}
+
+    def _statement(self, shape: tuple, build) -> str:
+        """One str object per statement shape – a prepared cursor re-prepares
+        whenever it is handed a different object, even with equal text."""
+        sql = self._sql.get(shape)
+        if sql is None:
+            sql = self._sql[shape] = build()
+        return sql
+
+    def _run(self, statements) -> int:
+        """Execute `(shape, build, params, repeated)` statements; returns rows affected.
+
+        Only shapes that run more than once in this call use the prepared
+        cursor – for a one-off, prepare + execute + close costs three round
+        trips where the text protocol needs one.
+        """
+        count = 0
+        cursors: dict[bool, object] = {}
+        try:
+            for shape, build, params, repeated in statements:
+                cur = cursors.get(repeated)
+                if cur is None:
+                    cur = cursors[repeated] = write_cursor(self.conn, repeated=repeated)
+                cur.execute(self._statement(shape, build), params)
+                count += cur.rowcount
+        finally:
+            for cur in cursors.values():
+                cur.close()
+        return count
+
+    # ── DELETE ──────────────────────────────────────────────────────────────
+    def delete(self, pk_col: str, pks) -> int:
+        return self._run(self._deletes(pk_col, list(pks)))
+
+    def _deletes(self, pk_col: str, pks: list):
+        size = min(self.chunk_size, MAX_PARAMS)
+        repeated = len(pks) >= 2 * size          # full chunks come at least twice
+        for chunk in _chunks(pks, size):
+            yield (
+                ("delete", pk_col, len(chunk)),
+                lambda: f"DELETE FROM `{self.tbl}` WHERE `{pk_col}` IN "
+                        f"({', '.join('%s' for _ in chunk)})",
+                chunk,
+                repeated and len(chunk) == size,
+            )
+
+    # ── UPDATE ──────────────────────────────────────────────────────────────
+    def update(self, pk_col: str, updates: dict) -> int:
+        """`updates` maps PK → {column: new value}; one UPDATE per chunk and column set."""
+        groups: dict[tuple, list] = {}
+        for pk_val, new_vals in updates.items():
+            if new_vals:
+                groups.setdefault(tuple(new_vals), []).append((pk_val, new_vals))
+        return self._run(self._updates(pk_col, groups))
+
+    def _updates(self, pk_col: str, groups: dict):
+        for set_cols, rows in groups.items():
+            # the PK is matched by the CASEs, so it must be assigned last
+            set_cols = sorted(set_cols, key=lambda c: c == pk_col)
+            size = min(self.chunk_size, MAX_PARAMS // (2 * len(set_cols) + 1))
+            repeated = len(rows) >= 2 * size
+            for chunk in _chunks(rows, size):
+                params = [
+                    v for c in set_cols
+                    for pk_val, new_vals in chunk
+                    for v in (pk_val, new_vals[c])
+                ]
+                params += [pk_val for pk_val, _ in chunk]
+                yield (
+                    ("update", pk_col, tuple(set_cols), len(chunk)),
+                    lambda: self._update_sql(pk_col, set_cols, len(chunk)),
+                    params,
+                    repeated and len(chunk) == size,
+                )
+
+    def _update_sql(self, pk_col: str, set_cols, n: int) -> str:
+        whens = " ".join("WHEN %s THEN %s" for _ in range(n))
+        assignments = ", ".join(
+            f"`{c}` = CASE `{pk_col}` {whens} ELSE `{c}` END" for c in set_cols
+        )
+        marks = ", ".join("%s" for _ in range(n))
+        return (
+            f"UPDATE `{self.tbl}` SET {assignments} "
+            f"WHERE `{pk_col}` IN ({marks})"
+        )
+
+    # ── INSERT ──────────────────────────────────────────────────────────────
+    def insert(self, rows) -> int:
+        """`rows` is a list of {column: value}; rows sharing columns batch together."""
+        groups: dict[tuple, list] = {}
+        for row in rows:
+            groups.setdefault(tuple(row), []).append(tuple(row.values()))
+        return self._run(self._inserts(groups))
+
+    def _inserts(self, groups: dict):
+        for cols, values in groups.items():
+            col_list = ", ".join(f"`{c}`" for c in cols)
+            row_marks = "(" + ", ".join("%s" for _ in cols) + ")"
+            size = min(self.chunk_size, MAX_PARAMS // max(len(cols), 1))
+            repeated = len(values) >= 2 * size
+            for chunk in _chunks(values, size):
+                yield (
+                    ("insert", cols, len(chunk)),
+                    lambda: f"INSERT INTO `{self.tbl}` ({col_list}) VALUES "
+                            + ", ".join(row_marks for _ in chunk),
+                    [v for row in chunk for v in row],
+                    repeated and len(chunk) == size,
+                )
+
+    # ── all three, in a safe order ──────────────────────────────────────────
+    def apply(self, pk_col: str, changes, extra_deletes=()) -> tuple[int, int, int]:
+        """Apply a `diff.FrameDiff`; returns (inserted, updated, deleted)."""
+        del_pks = set(changes.deletes) | set(extra_deletes)
+        del_cnt = self.delete(pk_col, del_pks)
+        upd_cnt = self.update(
+            pk_col,
+            {pk: vals for pk, vals in changes.updates.items() if pk not in del_pks},
+        )
+        ins_cnt = self.insert(changes.inserts)
+        return ins_cnt, upd_cnt, del_cnt